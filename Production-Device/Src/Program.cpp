@@ -81,14 +81,44 @@ void getUserInput()
 	// PRODUCTION CODE (end)
 	////////////////////////////////////////
 	
-	::IDMessage = "ID;MODEL=" + ::localModel + ";Serial=" + ::localSerial + ";";
+	std::string channelList;
+	for (const ChannelSpec& channel : ::channels)
+	{
+		channelList += (channelList.empty() ? "" : ",") + channel.name + ":" + channel.type + ":" + channel.unit + ":" + channel.label;
+	}
+	::IDMessage = "ID;MODEL=" + ::localModel + ";Serial=" + ::localSerial + ";FORMATS=" + ::SUPPORTED_FORMATS +
+					";MODES=" + ::SUPPORTED_MODES + ";CHANNELS=" + channelList + ";";
 	std::cout << std::endl << "Activating connection for " << ::localModel
 				<< " (Serial Number: " << ::localSerial << ")..." << std::endl;
 }
 
+/*
+ * The first channels are always MV and MA (as sent before channels were announced); any more are i16 channels
+ * CH3, CH4, ... so wider devices can be simulated
+ */
+void configureChannels(int channelCount)
+{
+	::channels.clear();
+	::channels.push_back({"MV", "i32", "mV", "Voltage", 4});
+	::channels.push_back({"MA", "i32", "mA", "Current", 4});
+	::channels.resize(std::min(channelCount, static_cast<int>(::channels.size())));
+	for (int number = ::channels.size() + 1; number <= channelCount; number++)
+	{
+		::channels.push_back({"CH" + std::to_string(number), "i16", "mV", "Channel " + std::to_string(number), 2});
+	}
+}
+
+/*
+ * Fields are matched from the preceding delimiter, so that e.g. "RATE=" doesn't match inside another field name
+ */
+bool hasMessageValue(std::string message, std::string value)
+{
+	return message.find(::MSG_DELIMITER + value) != std::string::npos;
+}
+
 std::string getMessageValue(std::string message, std::string value)
 {
-	int start = message.find(value) + value.length();
+	int start = message.find(::MSG_DELIMITER + value) + ::MSG_DELIMITER.length() + value.length();
 	int end;
 	for (end = start; end < message.length(); end++)
 	{
@@ -98,11 +128,20 @@ std::string getMessageValue(std::string message, std::string value)
 	return message.substr(start, count);
 }
 
-void sendMessage(std::string message)
+int getMessageInt(std::string message, std::string value, int defaultValue)
 {
-	int result = sendto(serverSocket, message.c_str(), strlen(message.c_str()), 0,
-							(sockaddr*)&::clientAddr, sizeof(::clientAddr));
-	if (result == SO_ERROR)
+	if (!::hasMessageValue(message, value)) { return defaultValue; }
+	return std::stoi(::getMessageValue(message, value));
+}
+
+/*
+ * Safe to call from any thread (each datagram is sent with a single sendto on the shared socket)
+ */
+void sendMessage(std::string message, const sockaddr_in& client)
+{
+	int result = sendto(serverSocket, message.data(), message.size(), 0,	// Size (not strlen) as binary messages may contain null bytes
+							(const sockaddr*)&client, sizeof(client));
+	if (result < 0)
 	{
 		coutLock.lock();
 		std::cout << std::endl << "Error sending message" << std::endl;
@@ -112,162 +151,542 @@ void sendMessage(std::string message)
 }
 
 /*
- * Duration: Measured in milliseconds
- * Rate: Measured in milliseconds
+ * Appends the low `size` bytes of an integer in little-endian byte order (two's complement, so the same bytes serve
+ * signed and unsigned channel types)
+ */
+void appendIntLE(std::string& buffer, int value, int size)
+{
+	uint32_t bits = static_cast<uint32_t>(value);
+	for (int shift = 0; shift < size * 8; shift += 8)
+	{
+		buffer.push_back(static_cast<char>((bits >> shift) & 0xFF));
+	}
+}
+
+/*
+ * Appends a 32-bit integer in little-endian byte order, independent of the host byte order
+ */
+void appendInt32LE(std::string& buffer, int value)
+{
+	::appendIntLE(buffer, value, 4);
+}
+
+/*
+ * Appends a 32-bit IEEE 754 float in little-endian byte order
+ */
+void appendFloatLE(std::string& buffer, float value)
+{
+	uint32_t bits;
+	memcpy(&bits, &value, sizeof(bits));
+	::appendIntLE(buffer, static_cast<int>(bits), 4);
+}
+
+/*
+ * Adds a sample (its channel values, and its binary `record` for the tail) to the window, which starts with the first
+ * sample added after it was emptied (see encodeWindow)
+ */
+void addToWindow(AggregateWindow& window, uint32_t sequence, int time, const std::vector<int>& values,
+					const std::string& record, int tail)
+{
+	if (window.count == 0)
+	{
+		window.first = sequence;
+		window.start = time;
+		window.minima = values;
+		window.maxima = values;
+		window.sums.assign(values.size(), 0);
+		window.tail.clear();
+	}
+	window.end = time;
+	window.count++;
+	for (size_t index = 0; index < values.size(); index++)
+	{
+		window.minima[index] = std::min(window.minima[index], values[index]);
+		window.maxima[index] = std::max(window.maxima[index], values[index]);
+		window.sums[index] += values[index];
+	}
+	if (tail > 0)
+	{
+		window.tail.push_back(record);
+		if (static_cast<int>(window.tail.size()) > tail) { window.tail.pop_front(); }
+	}
+}
+
+/*
+ * Returns the aggregate record of a window and empties it: an int32 start TIME, int32 end TIME and uint32 count, then
+ * the int32 minimum of each channel, the int32 maximum of each channel and the float32 mean of each channel, then
+ * `tail` binary records (as in BINARY datagrams) of the window's last samples, zero-filled if it has fewer samples
+ */
+std::string encodeWindow(AggregateWindow& window, int tail)
+{
+	std::string record;
+	::appendInt32LE(record, window.start);
+	::appendInt32LE(record, window.end);
+	::appendInt32LE(record, window.count);
+	for (int minimum : window.minima) { ::appendInt32LE(record, minimum); }
+	for (int maximum : window.maxima) { ::appendInt32LE(record, maximum); }
+	for (long long sum : window.sums)
+	{
+		::appendFloatLE(record, static_cast<float>(static_cast<double>(sum) / window.count));
+	}
+	int recordSize = 4;	// TIME
+	for (const ChannelSpec& channel : ::channels) { recordSize += channel.size; }
+	for (const std::string& sample : window.tail) { record += sample; }
+	record.append((tail - window.tail.size()) * recordSize, '\0');
+	window.count = 0;
+	return record;
+}
+
+/*
+ * xorshift32: much cheaper than rand(), which takes a lock in glibc, and good enough for simulated readings
+ */
+uint32_t nextRandom(uint32_t& state)
+{
+	state ^= state << 13;
+	state ^= state >> 17;
+	state ^= state << 5;
+	return state;
+}
+
+std::string clientName(const sockaddr_in& client)
+{
+	char buffer[INET_ADDRSTRLEN];
+	inet_ntop(AF_INET, &client.sin_addr, buffer, INET_ADDRSTRLEN);
+	return std::string(buffer) + ":" + std::to_string(ntohs(client.sin_port));
+}
+
+/*
+ * Returns the session of the interface at `client` (its IP address and port), creating it on first contact
+ */
+std::shared_ptr<ClientSession> getSession(const sockaddr_in& client)
+{
+	uint64_t key = (static_cast<uint64_t>(ntohl(client.sin_addr.s_addr)) << 16) | ntohs(client.sin_port);
+	std::lock_guard<std::mutex> guard(::sessionsLock);
+	std::shared_ptr<ClientSession>& session = ::sessions[key];
+	if (!session)
+	{
+		session = std::make_shared<ClientSession>();
+		session->address = client;
+		session->status = ::STOPPED;
+	}
+	return session;
+}
+
+TestConfig parseTestConfig(std::string message)
+{
+	TestConfig config;
+	config.duration = std::stoi(::getMessageValue(message, ::VAL_DURATION));
+	config.interval = ::hasMessageValue(message, ::VAL_RATE_US) ?
+						::getMessageInt(message, ::VAL_RATE_US, 1) :
+						::getMessageInt(message, ::VAL_RATE, 1) * 1000;
+	config.interval = std::max(1, config.interval);
+	config.binary = ::hasMessageValue(message, ::VAL_FORMAT) &&
+					::getMessageValue(message, ::VAL_FORMAT) == ::FORMAT_BINARY;
+	config.batchSize = std::max(1, ::getMessageInt(message, ::VAL_BATCH, 1));
+	config.batchWindow = std::max(0, ::getMessageInt(message, ::VAL_BATCH_WINDOW, 0));
+	config.sequenced = ::getMessageInt(message, ::VAL_SEQ, 0) == 1;
+	int window = std::max(0, ::getMessageInt(message, ::VAL_AGGREGATE, 0));	// Milliseconds
+	config.windowSamples = window > 0 ? std::max(1, static_cast<int>(window * 1000LL / config.interval)) : 0;
+	int recordSize = 4;	// TIME
+	for (const ChannelSpec& channel : ::channels) { recordSize += channel.size; }
+	int aggregateSize = 12 + 12 * static_cast<int>(::channels.size());	// Without the tail (see encodeWindow)
+	config.tail = std::min({std::max(0, ::getMessageInt(message, ::VAL_TAIL, 0)), config.windowSamples,	// Fits a datagram
+							(::BUFFER_SIZE - 5 - aggregateSize) / recordSize});
+	config.maxInterval = ::hasMessageValue(message, ::VAL_MAX_RATE_US) ?
+							std::max(config.interval, ::getMessageInt(message, ::VAL_MAX_RATE_US, 0)) : 0;
+	return config;
+}
+
+/*
+ * Applies the interface's latest LAG report to an adaptive test (see TestConfig) before its next sample. While the
+ * interface is behind (LAG_HIGH_US or BACKLOG_HIGH) and not catching up (neither its lag nor its backlog has fallen
+ * since the previous report), samples are first packed into as few datagrams as `config.batchWindow` allows (which
+ * still bounds how long a sample is held back, so there is no such step if the interface set no window), then sent at
+ * half the rate at each further report, down to `config.maxInterval`. Once it has caught up (LAG_LOW_US and
+ * BACKLOG_LOW) for CALM_REPORTS reports in a row, the same steps are undone one at a time, back to the requested rate
+ * and batching.
+ * Returns whether the interval or batching changed.
  */
-void sendStatusMessages(int duration, int rate)
+bool adaptRate(const ClientSession& session, const TestConfig& config, RateControl& rate)
 {
-	statusLock.lock();
-	::status = ::STARTED;
-	statusLock.unlock();
-	for (int i = 0; i <= duration; i += rate)
-	{
-		statusLock.lock();
-		if (::status == ::CANCELLED) {
-			statusLock.unlock();
-			break;
+	int lag = session.lag.load();
+	int backlog = session.backlog.load();
+	bool behind = lag > ::LAG_HIGH_US || backlog > ::BACKLOG_HIGH;
+	bool catchingUp = lag < rate.lag || backlog < rate.backlog;
+	rate.lag = lag;
+	rate.backlog = backlog;
+	rate.calmReports = (lag < ::LAG_LOW_US && backlog < ::BACKLOG_LOW) ? rate.calmReports + 1 : 0;
+	if (behind && !catchingUp)
+	{
+		if (config.batchWindow > 0 && rate.batchSize < ::BUFFER_SIZE)	// Batches are still capped at BUFFER_SIZE bytes
+		{
+			rate.batchSize = ::BUFFER_SIZE;
+			return true;
+		}
+		if (rate.interval < config.maxInterval)
+		{
+			rate.interval = std::min(rate.interval * 2, config.maxInterval);
+			return true;
 		}
-		statusLock.unlock();
-		int mv = rand() % SIGNAL_LIMIT;
-		int ma = rand() % SIGNAL_LIMIT;
-		std::string message = "STATUS;TIME=" + std::to_string(i) +
-								";MV=" + std::to_string(mv) +
-								";MA=" + std::to_string(ma) + ";";
-		::sendMessage(message);
-		std::this_thread::sleep_for(std::chrono::milliseconds(rate));	// Simulates device polling delay
 	}
-	statusLock.lock();
-	::status = ::STOPPED;
-	statusLock.unlock();
+	else if (rate.calmReports >= ::CALM_REPORTS)
+	{
+		rate.calmReports = 0;
+		if (rate.interval > config.interval)
+		{
+			rate.interval = std::max(rate.interval / 2, config.interval);
+			return true;
+		}
+		if (rate.batchSize != config.batchSize)
+		{
+			rate.batchSize = config.batchSize;
+			return true;
+		}
+	}
+	return false;
 }
 
-void processReceivedMsgs()
+/*
+ * Sleeps until `deadline` unless the test is cancelled first, checking at least every CANCEL_CHECK_US so that long
+ * intervals don't delay a STOP. Returns false if the test was cancelled.
+ */
+bool sleepUntil(const ClientSession& session, std::chrono::steady_clock::time_point deadline)
 {
-	while (true)
+	const auto slice = std::chrono::microseconds(::CANCEL_CHECK_US);
+	if (session.cancelRequested.load(std::memory_order_relaxed)) { return false; }
+	while (deadline - std::chrono::steady_clock::now() > slice)
+	{
+		std::this_thread::sleep_for(slice);
+		if (session.cancelRequested.load(std::memory_order_relaxed)) { return false; }
+	}
+	std::this_thread::sleep_until(deadline);
+	return true;
+}
+
+/*
+ * Runs on its own thread for each test (the session's `sender`, joined before its next test starts), streaming to the
+ * session's interface; the session is shared with the message workers (which may cancel it), and the STOPPED message
+ * is sent from here once the test completes.
+ * Each sample is sent at an absolute deadline on the steady clock (start + i * interval while the rate is unchanged),
+ * so the cost of building and sending messages doesn't accumulate as drift, and sub-millisecond intervals are
+ * possible. If the loop falls behind, samples are sent immediately until it catches up, and the worst lag is
+ * reported with the achieved rate.
+ * TIME stays in milliseconds, so at sub-millisecond intervals consecutive samples can share a TIME.
+ * Cancellation is through the session's atomic `cancelRequested` flag, so no lock is taken per sample.
+ * Samples are packed into batches of up to `config.batchSize` samples (or `config.batchWindow` milliseconds of
+ * samples), each sent as one datagram that never exceeds BUFFER_SIZE:
+ * Text:	"STATUS;" followed by "TIME=..;" and "<channel>=..;" for each channel (e.g. "TIME=..;MV=..;MA=..;") per sample
+ * Binary:	STATUS_BINARY_MAGIC followed by one little-endian record per sample: an int32 TIME, then each channel's value
+ *			in the size of its type
+ * A batch size of 1 produces exactly the original one-sample-per-datagram messages.
+ * If `config.sequenced`, each datagram also carries the sequence number of its first sample (counted from 0, unsigned
+ * and wrapping around at 2^32), so the interface can detect lost and reordered datagrams:
+ * Text:	"STATUS;SEQ=..;" followed by the samples
+ * Binary:	STATUS_SEQUENCED_MAGIC and a little-endian uint32 sequence number, followed by the records
+ * If `config.windowSamples` is set, every `config.windowSamples` consecutive samples are summarised in one aggregate
+ * record instead (see encodeWindow), with the last window of the test holding the samples left over. Aggregate records
+ * are always binary, and batched as samples are, each datagram starting with STATUS_AGGREGATE_MAGIC and a little-endian
+ * uint32 sequence number of the first sample of its first window.
+ * If the test is adaptive (`config.maxInterval`), the interface's LAG reports are applied as they arrive (see
+ * adaptRate), and each change is reported as "TEST;RESULT=RATE;SEQ=..;RATEUS=..;BATCH=..;BATCHWINDOW=..;", where SEQ
+ * is the first sample sent with the new settings. TIME always follows the actual spacing of the samples.
+ */
+void sendStatusMessages(std::shared_ptr<ClientSession> session, TestConfig config)
+{
+	const long long duration = static_cast<long long>(config.duration) * 1000;	// Microseconds
+	const bool aggregated = config.windowSamples > 0;
+	RateControl rate = {config.interval, config.batchSize, 0, 0, 0, 0};
+	long long offset = 0;	// Microseconds from the first sample to the current one
+	std::string batch;
+	int batchCount = 0;		// Records
+	int batchSamples = 0;
+	uint64_t sequence = 0;	// Sent as its low 32 bits (a uint32 that wraps around, see LinkMonitor)
+	long long lag = 0;
+	std::vector<int> values(::channels.size());
+	AggregateWindow window;
+	window.count = 0;
+	// Adds a record of `samples` samples (from sequence number `first` on) to the batch, sending the batch when full
+	auto addRecord = [&](const std::string& record, uint32_t first, int samples)
 	{
-		if (::receivedMsgs.size() > 0)
+		if (batchCount > 0 && batch.size() + record.size() > ::BUFFER_SIZE)
 		{
-			::processing = true;
-			msgLock.lock();
-			std::string message = ::receivedMsgs.front();
-			::receivedMsgs.pop_front();
-			msgLock.unlock();
-			std::string msgType;
-			if (message.find(::MSG_DELIMITER) == std::string::npos)
+			::sendMessage(batch, session->address);
+			batchCount = 0;
+		}
+		if (batchCount == 0)
+		{
+			batchSamples = 0;
+			if (aggregated || (config.binary && config.sequenced))
+			{
+				batch = std::string(1, aggregated ? ::STATUS_AGGREGATE_MAGIC : ::STATUS_SEQUENCED_MAGIC);
+				::appendInt32LE(batch, static_cast<int>(first));
+			}
+			else if (config.binary)
 			{
-				msgType = message;
+				batch = std::string(1, ::STATUS_BINARY_MAGIC);
 			}
 			else
 			{
-				int start = 0;
-				int count = message.find(::MSG_DELIMITER);
-				msgType = message.substr(start, count);
+				batch = config.sequenced ? ::MSG_STATUS + ::VAL_SEQ + std::to_string(first) + ";" : ::MSG_STATUS;
+			}
+		}
+		batch += record;
+		batchCount++;
+		batchSamples += samples;
+		if (batchCount >= rate.batchSize ||
+				(config.batchWindow > 0 && static_cast<long long>(batchSamples) * rate.interval >= config.batchWindow * 1000LL))
+		{
+			::sendMessage(batch, session->address);
+			batchCount = 0;
+		}
+	};
+	uint32_t randomState = static_cast<uint32_t>(std::chrono::steady_clock::now().time_since_epoch().count()) | 1;
+	const auto start = std::chrono::steady_clock::now();
+	auto sent = start;
+	for (; offset <= duration; sequence++, offset += rate.interval)
+	{
+		if (config.maxInterval > 0 && session->lagReports.load(std::memory_order_acquire) != rate.reports)
+		{
+			rate.reports = session->lagReports.load(std::memory_order_acquire);
+			if (::adaptRate(*session, config, rate))
+			{
+				::sendMessage(::MSG_RATE + ::VAL_SEQ + std::to_string(static_cast<uint32_t>(sequence)) + ";" +
+								::VAL_RATE_US + std::to_string(rate.interval) + ";" +
+								::VAL_BATCH + std::to_string(rate.batchSize) + ";" +
+								::VAL_BATCH_WINDOW + std::to_string(config.batchWindow) + ";", session->address);
+				coutLock.lock();
+				std::cout << "Test for " << ::clientName(session->address) << " now at " << 1e6 / rate.interval
+							<< " samples per second (interface lag " << session->lag.load() << " us)" << std::endl;
+				coutLock.unlock();
+			}
+		}
+		const auto deadline = start + std::chrono::microseconds(offset);
+		if (!::sleepUntil(*session, deadline)) { break; }	// Simulates device polling delay
+		sent = std::chrono::steady_clock::now();
+		lag = std::max(lag, static_cast<long long>(std::chrono::duration_cast<std::chrono::microseconds>(sent - deadline).count()));
+		int i = static_cast<int>(offset / 1000);	// Milliseconds
+		for (int& value : values)
+		{
+			value = ::nextRandom(randomState) % SIGNAL_LIMIT;
+		}
+		std::string record;
+		if ((config.binary && !aggregated) || config.tail > 0)	// Aggregate tails are always binary
+		{
+			::appendInt32LE(record, i);
+			for (size_t index = 0; index < ::channels.size(); index++)
+			{
+				::appendIntLE(record, values[index], ::channels[index].size);
+			}
+		}
+		else if (!aggregated)
+		{
+			record = ::VAL_TIME + std::to_string(i) + ";";
+			for (size_t index = 0; index < ::channels.size(); index++)
+			{
+				record += ::channels[index].name + "=" + std::to_string(values[index]) + ";";
+			}
+		}
+		if (!aggregated)
+		{
+			addRecord(record, static_cast<uint32_t>(sequence), 1);
+			continue;
+		}
+		::addToWindow(window, static_cast<uint32_t>(sequence), i, values, record, config.tail);
+		if (window.count >= config.windowSamples)
+		{
+			uint32_t first = window.first;
+			addRecord(::encodeWindow(window, config.tail), first, config.windowSamples);
+		}
+	}
+	if (window.count > 0)	// The samples left over (end of test or cancellation)
+	{
+		uint32_t first = window.first;
+		int count = window.count;
+		addRecord(::encodeWindow(window, config.tail), first, count);
+	}
+	if (batchCount > 0)	// Flush a partial batch (end of test or cancellation)
+	{
+		::sendMessage(batch, session->address);
+	}
+	double elapsed = std::chrono::duration<double>(sent - start).count();	// Seconds from the first sample to the last
+	double requestedRate = 1e6 / config.interval;
+	double achievedRate = (sequence > 1 && elapsed > 0) ? (sequence - 1) / elapsed : 0;
+	session->lock.lock();
+	bool cancelled = session->status == ::CANCELLED;	// A cancelled test stays CANCELLED
+	if (!cancelled)
+	{
+		session->status = ::STOPPED;
+	}
+	session->lock.unlock();
+	::activeTests--;
+	if (!cancelled)	// Don't do this if the test was cancelled by the interface
+	{
+		std::string stoppedMsg = ::MSG_STOPPED + ::VAL_SENT + std::to_string(static_cast<uint32_t>(sequence)) + ";" +	// Every generated sample has been sent by now
+									::VAL_REQUESTED_RATE + std::to_string(requestedRate) + ";" +
+									::VAL_ACHIEVED_RATE + std::to_string(achievedRate) + ";" +
+									::VAL_MAX_LAG + std::to_string(lag) + ";";
+		::sendMessage(stoppedMsg, session->address);
+		coutLock.lock();
+		std::cout << "Finished sending test data to " << ::clientName(session->address) << "! (" << achievedRate
+					<< " of " << requestedRate << " samples per second)" << std::endl;
+		coutLock.unlock();
+	}
+}
+
+void handleMessage(const ReceivedMessage& received)
+{
+	const std::string& message = received.text;
+	std::string msgType;
+	if (message.find(::MSG_DELIMITER) == std::string::npos)
+	{
+		msgType = message;
+	}
+	else
+	{
+		int start = 0;
+		int count = message.find(::MSG_DELIMITER);
+		msgType = message.substr(start, count);
+	}
+	
+	// Triage message types
+	if (msgType == "ID")
+	{
+		::sendMessage(::IDMessage, received.client);
+	}
+	else if (msgType == "TEST")
+	{
+		std::string msgCommand = ::getMessageValue(message, ::VAL_CMD);
+		std::shared_ptr<ClientSession> session = ::getSession(received.client);
+		
+		if (msgCommand == "START")
+		{
+			TestConfig config = ::parseTestConfig(message);
+			std::lock_guard<std::mutex> starting(session->startLock);
+			session->lock.lock();
+			if (session->status == ::STARTED)
+			{
+				session->lock.unlock();
+				std::string errorMsg = "TEST;RESULT=ERROR;MSG=Test was already started";
+				::sendMessage(errorMsg, received.client);
 			}
-			
-			// Triage message types
-			if (msgType == "ID")
+			else if (::activeTests.fetch_add(1) >= ::MAX_ACTIVE_TESTS)	// Reserves a slot (released by sendStatusMessages)
 			{
-				::sendMessage(::IDMessage);
+				::activeTests--;
+				session->lock.unlock();
+				std::string errorMsg = "TEST;RESULT=ERROR;MSG=Too many tests are running";
+				::sendMessage(errorMsg, received.client);
 			}
-			else if (msgType == "TEST")
+			else
 			{
-				std::string msgCommand = ::getMessageValue(message, ::VAL_CMD);
-				
-				if (msgCommand == "START")
+				session->lock.unlock();
+				if (session->sender.joinable())	// The previous test's thread, which has been stopped or cancelled
 				{
-					statusLock.lock();
-					if (::status == ::STARTED)
-					{
-						statusLock.unlock();
-						std::string errorMsg = "TEST;RESULT=ERROR;MSG=Test was already started";
-						::sendMessage(errorMsg);
-					}
-					else
-					{
-						coutLock.lock();
-						std::cout << "Running test..." << std::endl;
-						coutLock.unlock();
-						statusLock.unlock();
-						::sendMessage(::MSG_STARTED);
-						int duration = std::stoi(::getMessageValue(message, ::VAL_DURATION));
-						int rate = std::stoi(::getMessageValue(message, ::VAL_RATE));
-						std::thread statusMessagesThread(::sendStatusMessages, duration, rate);
-						std::thread processingThread2(::processReceivedMsgs);
-						statusMessagesThread.join();
-						statusLock.lock();
-						if (::status == ::STOPPED)	// Don't do this if the test was cancelled by the interface
-						{
-							statusLock.unlock();
-							::sendMessage(::MSG_STOPPED);
-							coutLock.lock();
-							std::cout << "Finished sending test data!" << std::endl;
-							coutLock.unlock();
-						}
-						statusLock.unlock();
-						processingThread2.join();
-					}
-					
+					session->sender.join();		// Its last messages are sent before the new test starts
 				}
-				else if (msgCommand == "STOP")
+				session->lock.lock();
+				session->status = ::STARTED;
+				session->cancelRequested.store(false);
+				session->lock.unlock();
+				coutLock.lock();
+				std::cout << "Running test for " << ::clientName(received.client) << "..." << std::endl;
+				coutLock.unlock();
+				std::string startedMsg = ::MSG_STARTED;
+				if (config.windowSamples > 0)	// The window as the device applies it (in samples), and the tail sent with it
 				{
-					statusLock.lock();
-					if (::status == ::CANCELLED)
-					{
-						statusLock.unlock();
-						std::string errorMsg = "TEST;RESULT=ERROR;MSG=Test was already stopped";
-						::sendMessage(errorMsg);
-					}
-					else
-					{
-						::status = ::CANCELLED;
-						if (::status == ::STOPPED)
-						{
-							statusLock.unlock();
-							coutLock.lock();
-							std::cout << std::endl << "Cancel command received - stopping test" << std::endl;
-							coutLock.unlock();
-							::sendMessage(::MSG_STOPPED);
-						}
-						else { statusLock.unlock(); }	// Both separate branches must unlock the Mutex
-					}
+					startedMsg += ::VAL_WINDOW + std::to_string(config.windowSamples) + ";" +
+									::VAL_TAIL + std::to_string(config.tail) + ";";
 				}
+				::sendMessage(startedMsg, received.client);
+				session->sender = std::thread(::sendStatusMessages, session, config);
+			}
+		}
+		else if (msgCommand == "LAG")	// Applied by sendStatusMessages (only if the test is adaptive)
+		{
+			session->lag.store(::getMessageInt(message, ::VAL_LAG, 0));
+			session->backlog.store(::getMessageInt(message, ::VAL_BACKLOG, 0));
+			session->lagReports.fetch_add(1, std::memory_order_release);
+		}
+		else if (msgCommand == "STOP")
+		{
+			session->lock.lock();
+			if (session->status != ::STARTED)
+			{
+				session->lock.unlock();
+				std::string errorMsg = "TEST;RESULT=ERROR;MSG=Test was already stopped";
+				::sendMessage(errorMsg, received.client);
 			}
 			else
 			{
-				// Do nothing
+				session->status = ::CANCELLED;
+				session->cancelRequested.store(true);
+				session->lock.unlock();
+				coutLock.lock();
+				std::cout << std::endl << "Cancel command received from " << ::clientName(received.client)
+							<< " - stopping test" << std::endl;
+				coutLock.unlock();
 			}
-			::processing = false;
-		}
-		else
-		{
-			std::this_thread::sleep_for(std::chrono::milliseconds(10));
 		}
 	}
+	else
+	{
+		// Do nothing
+	}
+}
+
+/*
+ * Run by each of the WORKER_THREADS message workers; sleeps until the listener queues a message
+ */
+void processReceivedMsgs()
+{
+	while (true)
+	{
+		std::unique_lock<std::mutex> guard(msgLock);
+		::msgAvailable.wait(guard, [] { return !::receivedMsgs.empty(); });
+		ReceivedMessage received = std::move(::receivedMsgs.front());
+		::receivedMsgs.pop_front();
+		guard.unlock();
+		::handleMessage(received);
+	}
 }
 
 void listenForMsgs()
 {
+	coutLock.lock();
+	std::cout << std::endl << "*** Device connection open - ready for transmission ***" << std::endl 
+							<< "Model Name: "	 << ::localModel << std::endl
+							<< "Serial Number: " << ::localSerial << std::endl
+							<< "IP Address: " 	 << ::localIP   << std::endl
+							<< "Port Number: "	 << ::localPort << std::endl
+							<< "*** (Press Ctrl+C to terminate the program) ***" << std::endl << std::endl;
+	coutLock.unlock();
+	char msgBuffer[Program::BUFFER_SIZE];
 	while (true)
 	{
-		::listening = true;
-		coutLock.lock();
-		std::cout << std::endl << "*** Device connection open - ready for transmission ***" << std::endl 
-								<< "Model Name: "	 << ::localModel << std::endl
-								<< "Serial Number: " << ::localSerial << std::endl
-								<< "IP Address: " 	 << ::localIP   << std::endl
-								<< "Port Number: "	 << ::localPort << std::endl
-								<< "*** (Press Ctrl+C to terminate the program) ***" << std::endl << std::endl;
-		coutLock.unlock();
+		ReceivedMessage received;
+		socklen_t clientAddrLen = sizeof(received.client);
 		int receivedBytes = ::recvfrom(serverSocket, msgBuffer, sizeof(msgBuffer), 0,
-								(struct sockaddr *)(&::clientAddr), &::clientAddrLen);
+								(struct sockaddr *)(&received.client), &clientAddrLen);
 		if (receivedBytes > 0)
 		{
-			std::string receivedMsg((char*) msgBuffer);
-			// std::cout << "Message received: " << receivedMsg << std::endl;
+			received.text.assign(msgBuffer, receivedBytes);
+			// std::cout << "Message received: " << received.text << std::endl;
 			msgLock.lock();
-			::receivedMsgs.push_back(receivedMsg);
+			bool queued = ::receivedMsgs.size() < ::MAX_QUEUED_MSGS;
+			if (queued)
+			{
+				::receivedMsgs.push_back(std::move(received));
+			}
 			msgLock.unlock();
-			memset(&::msgBuffer, 0, sizeof(::msgBuffer));
+			if (queued)
+			{
+				::msgAvailable.notify_one();
+			}
+			else
+			{
+				coutLock.lock();
+				std::cout << "Message queue full - message dropped" << std::endl;
+				coutLock.unlock();
+			}
 		}
 		else if (receivedBytes < 0)
 		{
@@ -284,8 +703,6 @@ void listenForMsgs()
 			std::cout << "Empty message received" << std::endl;
 			coutLock.unlock();
 		}
-		::listening = false;
-		std::this_thread::sleep_for(std::chrono::milliseconds(10));
 	}
 }
 
@@ -310,13 +727,6 @@ int openConnection()
 	::serverAddr.sin_addr.s_addr = inet_addr(deviceIP.c_str());
 	::serverAddrLen = sizeof(::serverAddr);
 	
-	// Create client address
-	memset(&::clientAddr, 0, sizeof(::clientAddr));
-	::clientAddr.sin_family = AF_INET;
-	::clientAddr.sin_port = htons(9080);						// Doesn't matter (will be overridden upon receipt)
-	::clientAddr.sin_addr.s_addr = inet_addr("192.168.1.2");	// Doesn't matter (will be overridden upon receipt)
-	::clientAddrLen = sizeof(::clientAddr);
-	
 	// Bind socket to server address object
 	int errorCode = bind(serverSocket, (struct sockaddr *) &::serverAddr, sizeof(::serverAddr));
     if (errorCode < 0)
@@ -328,16 +738,33 @@ int openConnection()
 	return 0;
 }
 
+/*
+ * Usage: Program [channels] (1 - MAX_CHANNELS channels per sample, DEFAULT_CHANNELS if not given)
+ */
 int main(int argc, char const *argv[])
 {	
+	int channelCount = argc > 1 ? std::atoi(argv[1]) : ::DEFAULT_CHANNELS;
+	if (channelCount < 1 || channelCount > ::MAX_CHANNELS)
+	{
+		std::cout << "Channels must be 1-" << ::MAX_CHANNELS << std::endl;
+		return 1;
+	}
+	::configureChannels(channelCount);
 	::getLocalIP();
 	::getUserInput();
 	::openConnection();
 
 	std::thread listeningThread(::listenForMsgs);
-	std::thread processingThread(::processReceivedMsgs);
+	std::vector<std::thread> processingThreads;
+	for (int i = 0; i < ::WORKER_THREADS; i++)
+	{
+		processingThreads.emplace_back(::processReceivedMsgs);
+	}
 	listeningThread.join();
-	processingThread.join();
+	for (std::thread& processingThread : processingThreads)
+	{
+		processingThread.join();
+	}
 
 	::close(serverSocket);
 	
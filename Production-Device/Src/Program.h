@@ -1,8 +1,14 @@
+#include <algorithm>
 #include <arpa/inet.h>
+#include <atomic>
 #include <chrono>
+#include <condition_variable>
+#include <cstdint>
+#include <deque>
 #include <errno.h>
 #include <iostream>
-#include <list>
+#include <map>
+#include <memory>
 #include <mutex>
 #include <netinet/in.h>
 #include <stdlib.h>
@@ -14,22 +20,138 @@
 #include <vector>
 
 namespace Program {
+	////////////////////////////////////////
+	// DATA TYPES
+	/*
+	 * Parameters of a test, as requested in the START command
+	 */
+	struct TestConfig
+	{
+		int duration;		// Milliseconds
+		int interval;		// Microseconds between samples (RATE= in milliseconds, or RATEUS= in microseconds)
+		bool binary;		// Send binary STATUS records instead of text
+		int batchSize;		// Maximum samples per STATUS datagram
+		int batchWindow;	// Maximum milliseconds of samples per STATUS datagram (0 = no limit)
+		bool sequenced;		// Start each STATUS datagram with the sequence number of its first sample
+		int windowSamples;	// Samples summarised per aggregate record (0 = send every sample; AGGREGATE= in milliseconds)
+		int tail;			// Raw samples from the end of each window sent with its aggregate record (TAIL=)
+		int maxInterval;	// Longest microseconds between samples the device may slow down to when the interface falls
+							// behind (MAXRATEUS=; 0 = the rate is fixed; see adaptRate)
+	};
+	/*
+	 * One channel of the samples, announced in the ID response as NAME:TYPE:UNIT:LABEL (see CHANNELS)
+	 * Valid values for type (with their size in bytes):
+	 * 
+	 * i8 (1), u8 (1), i16 (2), u16 (2), i32 (4)
+	 */
+	struct ChannelSpec
+	{
+		std::string name;
+		std::string type;
+		std::string unit;
+		std::string label;
+		int size;			// Bytes of the channel's field in binary STATUS records
+	};
+	/*
+	 * Sending settings of a test as adapted to the interface's LAG reports (see adaptRate), and the reports seen so far
+	 */
+	struct RateControl
+	{
+		int interval;		// Microseconds between samples
+		int batchSize;		// Within the interface's batchWindow (see TestConfig)
+		int reports;		// LAG reports applied (see ClientSession)
+		int lag;			// Microseconds, in the previous report
+		int backlog;		// Bytes, in the previous report
+		int calmReports;	// Consecutive reports with the interface caught up
+	};
+	/*
+	 * Count, minimum, maximum and sum of each channel of the samples of one aggregation window (see TestConfig), and
+	 * its most recent raw samples as binary records (its tail)
+	 */
+	struct AggregateWindow
+	{
+		uint32_t first;				// Sequence number of the window's first sample
+		int start;					// TIME of the first sample
+		int end;					// TIME of the last sample
+		int count;
+		std::vector<int> minima;
+		std::vector<int> maxima;
+		std::vector<long long> sums;
+		std::deque<std::string> tail;
+	};
+	/*
+	 * A datagram received from an interface, queued for the message workers
+	 */
+	struct ReceivedMessage
+	{
+		std::string text;
+		sockaddr_in client;
+	};
+	/*
+	 * Test state of one interface (keyed by its IP address and port), so tests for different interfaces run independently
+	 * Valid values for status:
+	 * 
+	 * STARTED
+	 * STOPPED
+	 * CANCELLED
+	 * ----------------------------------------
+	 * NB: These must also be defined as constants
+	 */
+	struct ClientSession
+	{
+		sockaddr_in address;
+		std::string status;							// Guarded by lock
+		std::atomic<bool> cancelRequested{false};	// Checked by the sending loop without taking lock
+		std::atomic<int> lag{0};					// Latest LAG report of the interface (microseconds)
+		std::atomic<int> backlog{0};				// Latest LAG report of the interface (bytes)
+		std::atomic<int> lagReports{0};				// Incremented after each LAG report is stored
+		std::mutex lock;
+		std::thread sender;							// Streams the current (or last) test; guarded by startLock
+		std::mutex startLock;						// Held while a START is handled, so tests never overlap
+	};
 	////////////////////////////////////////
 	// FUNCTIONS
 	int getLocalIP();
 	void getUserInput();
-	void sendStatusMessages(int duration, int rate);
+	void configureChannels(int channelCount);
+	std::string clientName(const sockaddr_in& client);
+	std::shared_ptr<ClientSession> getSession(const sockaddr_in& client);
+	TestConfig parseTestConfig(std::string message);
+	void sendStatusMessages(std::shared_ptr<ClientSession> session, TestConfig config);
+	bool sleepUntil(const ClientSession& session, std::chrono::steady_clock::time_point deadline);
+	uint32_t nextRandom(uint32_t& state);
+	void appendInt32LE(std::string& buffer, int value);
+	void appendIntLE(std::string& buffer, int value, int size);
+	void appendFloatLE(std::string& buffer, float value);
+	void addToWindow(AggregateWindow& window, uint32_t sequence, int time, const std::vector<int>& values,
+						const std::string& record, int tail);
+	std::string encodeWindow(AggregateWindow& window, int tail);
+	bool adaptRate(const ClientSession& session, const TestConfig& config, RateControl& rate);
+	bool hasMessageValue(std::string message, std::string value);
 	std::string getMessageValue(std::string message, std::string value);
-	void sendMessage();
+	int getMessageInt(std::string message, std::string value, int defaultValue);
+	void sendMessage(std::string message, const sockaddr_in& client);
+	void handleMessage(const ReceivedMessage& received);
 	void processReceivedMsgs();
 	void listenForMsgs();
 	int openConnection();
 	////////////////////////////////////////
 	// GENERAL SETTINGS
 	const int BUFFER_SIZE						= 1024;
-	const int SIGNAL_LIMIT						= 1000;
+	const int WORKER_THREADS					= 4;		// Threads handling received messages
+	const size_t MAX_QUEUED_MSGS				= 4096;		// Received messages waiting for a worker (more are dropped)
+	const int MAX_ACTIVE_TESTS					= 256;		// Tests streaming at once (one thread each)
+	const int CANCEL_CHECK_US					= 50000;	// Longest sleep between checks for cancellation
+	const int SIGNAL_LIMIT						= 1000;		// Generated values are 0 - 999 (fits every channel type but i8/u8)
+	const int DEFAULT_CHANNELS					= 2;		// MV and MA
+	const int MAX_CHANNELS						= 32;
 	const int MIN_PORT							= 1024;
 	const int MAX_PORT							= 65535;
+	const int LAG_HIGH_US						= 200000;	// Interface lag (LAG reports) above which the test is slowed
+	const int LAG_LOW_US						= 50000;	// Interface lag below which the test may speed up again
+	const int BACKLOG_HIGH						= 1048576;	// Bytes queued at the interface above which the test is slowed
+	const int BACKLOG_LOW						= 65536;	// Bytes queued at the interface below which it may speed up
+	const int CALM_REPORTS						= 4;		// Consecutive calm LAG reports before each step back up
 	////////////////////////////////////////
 	// CONSTANT MESSAGE VALUES
 	const std::string MSG_DELIMITER 			= ";";
@@ -40,41 +162,56 @@ namespace Program {
 	const int VAL_DURATION_LEN					= 9;
 	const std::string VAL_RATE					= "RATE=";
 	const int VAL_RATE_LEN						= 5;
+	const std::string VAL_RATE_US				= "RATEUS=";
+	const std::string VAL_FORMAT				= "FORMAT=";
+	const std::string VAL_BATCH					= "BATCH=";
+	const std::string VAL_BATCH_WINDOW			= "BATCHWINDOW=";
+	const std::string VAL_SEQ					= "SEQ=";
+	const std::string VAL_AGGREGATE				= "AGGREGATE=";
+	const std::string VAL_TAIL					= "TAIL=";
+	const std::string VAL_WINDOW				= "WINDOW=";
+	const std::string VAL_MAX_RATE_US			= "MAXRATEUS=";
+	const std::string VAL_LAG					= "LAGUS=";
+	const std::string VAL_BACKLOG				= "BACKLOG=";
+	const std::string VAL_SENT					= "SENT=";
+	const std::string VAL_REQUESTED_RATE		= "REQUESTEDHZ=";
+	const std::string VAL_ACHIEVED_RATE			= "ACHIEVEDHZ=";
+	const std::string VAL_MAX_LAG				= "MAXLAGUS=";
+	const std::string FORMAT_TEXT				= "TEXT";
+	const std::string FORMAT_BINARY				= "BINARY";
+	const std::string SUPPORTED_FORMATS			= "TEXT,BINARY";
+	const std::string SUPPORTED_MODES			= "RAW,AGGREGATE,ADAPTIVE";	// Modes the device supports (see TestConfig)
+	const std::string VAL_TIME					= "TIME=";
+	const char STATUS_BINARY_MAGIC				= '\xb5';	// First byte of binary STATUS datagrams without a sequence number
+	const char STATUS_SEQUENCED_MAGIC			= '\xb6';	// First byte of binary STATUS datagrams with a sequence number
+	const char STATUS_AGGREGATE_MAGIC			= '\xb7';	// First byte of aggregate STATUS datagrams (always sequenced)
+	const std::string MSG_STATUS				= "STATUS;";
 	const std::string MSG_STARTED				= "TEST;RESULT=STARTED;";
 	const std::string MSG_STOPPED				= "TEST;RESULT=STOPPED;";
+	const std::string MSG_RATE					= "TEST;RESULT=RATE;";
 	////////////////////////////////////////
 	// DYNAMIC MESSAGE VALUES
 	std::string IDMessage;
-	char* msgBuffer[Program::BUFFER_SIZE];
+	std::vector<ChannelSpec> channels;	// Set once at startup (see configureChannels)
 	////////////////////////////////////////
 	// MESSAGING DATA STRUCTURES
-	std::list<std::string> receivedMsgs;
+	std::deque<ReceivedMessage> receivedMsgs;
 	std::mutex msgLock;
+	std::condition_variable msgAvailable;	// Signalled (with msgLock) for each message queued
 	std::mutex coutLock;	// Keeps terminal messages tidy; Only needed after first multithreading fork
 	////////////////////////////////////////
 	// STATE VALUES
 	const std::string STARTED					= "STARTED";
 	const std::string STOPPED					= "STOPPED";
 	const std::string CANCELLED					= "CANCELLED";
-	/*
-	 * Valid values for status:
-	 * 
-	 * STARTED
-	 * STOPPED
-	 * ----------------------------------------
-	 * NB: These must also be defined as constants
-	 */
-	std::string status							= Program::STOPPED;
-	std::mutex statusLock;
-	bool listening								= false;
-	bool processing								= false;
+	std::map<uint64_t, std::shared_ptr<ClientSession>> sessions;	// Keyed by IP address and port (see getSession)
+	std::mutex sessionsLock;
+	std::atomic<int> activeTests(0);
 	////////////////////////////////////////
 	// SOCKET VALUES
 	int serverSocket;
 	struct sockaddr_in serverAddr;
 	socklen_t serverAddrLen;
-	struct sockaddr_in clientAddr;
-	socklen_t clientAddrLen;
 	////////////////////////////////////////
 	// DEVICE VALUES
 	std::string localModel;
@@ -0,0 +1,155 @@
+########################################
+# ***** IMPORTS *****
+import multiprocessing
+import threading
+
+from Config import *
+from RemoteSession import RemoteSession
+from ReplayManager import ReplayManager
+from SampleRing import SampleRing
+from SessionManager import SessionManager
+from StageProfiler import StageProfiler
+from TestSession import TestSession
+########################################
+
+# Runs the acquisition side of a test (a SessionManager or ReplayManager and its TestSessions: receiving, decoding,
+# link telemetry, statistics, limits and capture) in a child process of its own, so receiving datagrams never waits
+# on the GUI (repaints, dialogs, report rendering) for the GIL, and can use a core of its own.
+# Each session writes its samples to a SampleRing created by the GUI process, which the live view reads in place (see
+# RemoteSession). Only control and state cross the pipe between the processes, as tuples whose first item is one of
+# the ACQUISITION_* kinds: progress messages, the state of every session and the stage timings (every
+# SESSION_GRID_INTERVAL ms), the final results, and cancellation.
+# A test is described by a plain dictionary (see `TestExecutionWorker.updateParameters`), as the process is spawned
+# and only receives what can be pickled.
+class AcquisitionProcess:
+	def __init__(self):
+		self.__process = None
+		self.__connection = None
+		self.__cancelled = False
+
+	# "spawn" avoids forking a process that is running Qt (see ReportRenderer)
+	def start(self, job):
+		context = multiprocessing.get_context("spawn")
+		self.__connection, connection = context.Pipe()
+		self.__process = context.Process(target=runAcquisition, args=(connection, job), daemon=True)
+		self.__process.start()
+		connection.close()
+		if self.__cancelled:	# Cancelled before it started
+			self.cancel()
+
+	# Called from another thread (e.g. the GUI)
+	def cancel(self):
+		self.__cancelled = True
+		connection = self.__connection
+		if connection is not None:
+			try:
+				connection.send((ACQUISITION_CANCEL,))
+			except OSError:
+				pass	# The process has already exited
+
+	# Yields each message from the process until the test has finished, ending with an ACQUISITION_FINISHED or
+	# ACQUISITION_ERROR message (including if the process exits unexpectedly), then waits for the process to exit
+	def messages(self):
+		try:
+			while True:
+				try:
+					message = self.__connection.recv()
+				except EOFError:
+					self.__process.join(ACQUISITION_TIMEOUT)
+					yield ACQUISITION_ERROR, f"Acquisition process exited unexpectedly (exit code {self.__process.exitcode})"
+					return
+				yield message
+				if message[0] in (ACQUISITION_FINISHED, ACQUISITION_ERROR):
+					return
+		finally:
+			self.__stop()
+
+	def __stop(self):
+		self.__process.join(ACQUISITION_TIMEOUT)
+		if self.__process.is_alive():
+			self.__process.terminate()
+			self.__process.join()
+		connection, self.__connection = self.__connection, None
+		connection.close()
+
+# Runs in the acquisition process
+def runAcquisition(connection, job):
+	lock = threading.Lock()	# The pipe is written to by both threads
+	def send(*message):
+		with lock:
+			connection.send(message)
+	rings = []
+	try:
+		rings = [SampleRing(name=name) for name in job["rings"]]
+		profiler = StageProfiler(job["trace"]) if job["profile"] else None
+		sessions, manager = createSessions(job, rings, send, profiler)
+		finished = threading.Event()
+		control = threading.Thread(target=controlSessions, \
+									args=(connection, manager, sessions, send, finished, profiler), daemon=True)
+		control.start()
+		try:
+			manager.run()
+		finally:
+			finished.set()
+			control.join()
+		send(ACQUISITION_FINISHED, {
+			"sessions": [(RemoteSession.describe(session), session.getResults(), getReportJob(session, job)) \
+							for session in sessions],
+			"lossReport": manager.getLossReport(),
+			"profile": profiler.snapshot() if profiler is not None else None,
+			"trace": profiler.getEvents() if profiler is not None else []	# See `StageProfiler.writeTrace`
+		})
+	except Exception as error:
+		send(ACQUISITION_ERROR, str(error))
+	finally:
+		for ring in rings:
+			ring.close()
+		connection.close()
+
+# Returns ([TestSession], manager) for a test of devices or a replay of recordings. Session messages are prefixed
+# with the device name when more than one device is being tested.
+def createSessions(job, rings, send, profiler=None):
+	sessions = []
+	def sessionLog(index):
+		def log(text):
+			if len(sessions) > 1:
+				text = f"[{sessions[index].getDeviceName()}] {text}"
+			send(ACQUISITION_LOG, text)
+		return log
+	if job["replay"]:
+		manager = ReplayManager(job["speed"])
+		for index, (path, ring) in enumerate(zip(job["replay"], rings)):
+			metadata, datagrams = ReplayManager.loadRecording(path)
+			IPDevice, portDevice = ReplayManager.replayAddress(index)
+			sessions.append(TestSession(IPDevice, portDevice, metadata["duration"], metadata["interval"], \
+										sessionLog(index), logDatagrams=False, ring=ring, profiler=profiler, \
+										capture=False))
+			manager.addSession(sessions[-1], datagrams)
+	else:
+		manager = SessionManager(job["portInterface"], profiler)
+		for index, ((IPDevice, portDevice), ring) in enumerate(zip(job["devices"], rings)):
+			sessions.append(TestSession(IPDevice, portDevice, job["duration"], job["interval"], sessionLog(index), \
+										ring=ring, profiler=profiler))
+			manager.addSession(sessions[-1])
+	return sessions, manager
+
+# Runs on a thread of the acquisition process until `finished` is set: passes on cancellation (also if the GUI
+# process has gone), and sends the state of the sessions (and the stage timings) every SESSION_GRID_INTERVAL ms
+def controlSessions(connection, manager, sessions, send, finished, profiler=None):
+	while not finished.is_set():
+		try:
+			if connection.poll(SESSION_GRID_INTERVAL / 1000) and connection.recv()[0] == ACQUISITION_CANCEL:
+				manager.cancel()
+			send(ACQUISITION_STATUS, [RemoteSession.describe(session) for session in sessions])
+			if profiler is not None:
+				profiler.gauge("backlog", manager.getBacklog())
+				send(ACQUISITION_PROFILE, profiler.snapshot())
+		except (EOFError, OSError):
+			manager.cancel()
+			return
+
+# Reports are rendered by the GUI process (see ReportRenderer), from the capture file where there is one
+def getReportJob(session, job):
+	if not job["formats"] or session.getState() not in (SESSION_COMPLETED, SESSION_ABORTED) or not session.getSummary():
+		return None
+	return session.getReportJob(job["destination"], job["formats"])
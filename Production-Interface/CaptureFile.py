@@ -0,0 +1,85 @@
+########################################
+# ***** IMPORTS *****
+import os
+import struct
+
+import numpy
+
+from Config import *
+########################################
+
+# Append-only binary capture of the raw samples of one test.
+# Layout: a header followed by one little-endian int32 record per sample (time in milliseconds, then one value per
+# channel, whatever the channel's type on the wire). The header is the fixed fields below, then (from version 2) the
+# channel schema (see ChannelSchema) as a uint16 length and UTF-8 text, padded to a multiple of CAPTURE_HEADER_SIZE
+# bytes; version 1 files have a header of CAPTURE_HEADER_SIZE bytes, and the channels of STATUS_DEFAULT_SCHEMA.
+# Records are only ever appended and are flushed to the OS in chunks, so a crash loses at most the unflushed chunk, and
+# the file can be read with `CaptureFile.load` (a `numpy.memmap`) while the test is still running. A partially written
+# trailing record is ignored when loading.
+class CaptureFile:
+	__header = struct.Struct("<8sHHiq32s32s")	# Magic, version, channel count, interval (ms), start time (ms), model, serial
+	__schemaLength = struct.Struct("<H")
+
+	def __init__(self, path, schema, model, serial, interval, startTime):
+		self.__path = path
+		self.__fieldCount = len(schema) + 1
+		self.__file = open(path, "wb")
+		encoded = schema.encode().encode("utf-8")
+		header = CaptureFile.__header.pack(CAPTURE_MAGIC, CAPTURE_VERSION, len(schema), interval, int(startTime * 1000), \
+											CaptureFile.__truncate(model), CaptureFile.__truncate(serial)) + \
+					CaptureFile.__schemaLength.pack(len(encoded)) + encoded
+		self.__file.write(header.ljust(-(-len(header) // CAPTURE_HEADER_SIZE) * CAPTURE_HEADER_SIZE, b"\x00"))
+		self.__file.flush()
+
+	# UTF-8 text cut to whole characters that fit a 32-byte header field
+	@staticmethod
+	def __truncate(text):
+		return text.encode("utf-8")[:32].decode("utf-8", "ignore").encode("utf-8")
+
+	def getPath(self):
+		return self.__path
+
+	# `timestamps` and each entry of `columns` are equal-length arrays (e.g. views from a SampleStore)
+	def append(self, timestamps, columns):
+		records = numpy.empty((len(timestamps), self.__fieldCount), dtype="<i4")
+		records[:, 0] = timestamps
+		for index, column in enumerate(columns):
+			records[:, index + 1] = column
+		self.__file.write(records.tobytes())
+		self.__file.flush()
+
+	def close(self):
+		if not self.__file.closed:
+			self.__file.flush()
+			os.fsync(self.__file.fileno())
+			self.__file.close()
+
+	# Returns (header, records), where `records` is a read-only memmap of shape (samples, 1 + channels), and the header's
+	# "schema" is the encoded ChannelSchema of the channels
+	@staticmethod
+	def load(path):
+		with open(path, "rb") as file:
+			magic, version, channelCount, interval, startTime, model, serial = \
+				CaptureFile.__header.unpack(file.read(CaptureFile.__header.size))
+			if magic != CAPTURE_MAGIC:
+				raise ValueError(f"Not a capture file: {path}")
+			schema, offset = STATUS_DEFAULT_SCHEMA, CAPTURE_HEADER_SIZE
+			if version >= 2:
+				length, = CaptureFile.__schemaLength.unpack(file.read(CaptureFile.__schemaLength.size))
+				schema = file.read(length).decode("utf-8")
+				offset = -(-file.tell() // CAPTURE_HEADER_SIZE) * CAPTURE_HEADER_SIZE
+		header = {
+			"version": version,
+			"channels": channelCount,
+			"schema": schema,
+			"interval": interval,
+			"startTime": startTime / 1000,
+			"model": model.rstrip(b"\x00").decode("utf-8"),
+			"serial": serial.rstrip(b"\x00").decode("utf-8")
+		}
+		recordSize = (channelCount + 1) * 4
+		count = (os.path.getsize(path) - offset) // recordSize
+		if count == 0:
+			return header, numpy.empty((0, channelCount + 1), dtype="<i4")
+		records = numpy.memmap(path, dtype="<i4", mode="r", offset=offset, shape=(count, channelCount + 1))
+		return header, records
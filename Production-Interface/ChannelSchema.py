@@ -0,0 +1,79 @@
+########################################
+# ***** IMPORTS *****
+import re
+
+from Config import *
+########################################
+
+# The channels of the samples a device sends, as announced in the CHANNELS= field of its ID response, e.g.
+#   ID;MODEL=Dev;Serial=42;FORMATS=TEXT,BINARY;CHANNELS=MV:i32:mV:Voltage,MA:i32:mA:Current;
+# Each channel is NAME:TYPE:UNIT[:LABEL], where the type (one of STATUS_CHANNEL_TYPES) is the size and signedness of
+# the channel's field in binary STATUS records, and the label (shown in the live view and reports) defaults to the
+# name. Text STATUS samples carry the channels as NAME=value fields after TIME=, in the same order. Values are always
+# integers, and are stored as int32 whatever their type on the wire.
+# Devices that don't announce their channels are taken to send STATUS_DEFAULT_SCHEMA.
+class ChannelSchema:
+	__name = re.compile(r"[A-Za-z][A-Za-z0-9_]*$")
+	__reservedNames = ("TIME", "SEQ")
+
+	# `channels` is a list of (name, type, unit, label) tuples
+	def __init__(self, channels):
+		self.__channels = [tuple(channel) for channel in channels]
+
+	# Raises ValueError if `text` isn't a valid schema
+	@staticmethod
+	def parse(text):
+		channels = []
+		for entry in text.split(","):
+			fields = entry.split(":")
+			if len(fields) not in (3, 4):
+				raise ValueError(f"Channel must be given as NAME:TYPE:UNIT[:LABEL], not '{entry}'")
+			name, channelType, unit = fields[:3]
+			label = fields[3] if len(fields) == 4 and fields[3] else name
+			if not ChannelSchema.__name.match(name) or name in ChannelSchema.__reservedNames:
+				raise ValueError(f"Invalid channel name: '{name}'")
+			if channelType not in STATUS_CHANNEL_TYPES:
+				raise ValueError(f"Channel type must be one of {', '.join(STATUS_CHANNEL_TYPES)}: '{entry}'")
+			if any(name == channel[0] for channel in channels):
+				raise ValueError(f"Channel '{name}' is given more than once")
+			channels.append((name, channelType, unit, label))
+		if len(channels) > STATUS_MAX_CHANNELS:
+			raise ValueError(f"At most {STATUS_MAX_CHANNELS} channels are supported (not {len(channels)})")
+		return ChannelSchema(channels)
+
+	@staticmethod
+	def default():
+		return ChannelSchema.parse(STATUS_DEFAULT_SCHEMA)
+
+	def encode(self):
+		return ",".join(":".join(channel) for channel in self.__channels)
+
+	def __len__(self):
+		return len(self.__channels)
+
+	def __eq__(self, other):
+		return isinstance(other, ChannelSchema) and self.__channels == other.__channels
+
+	def getNames(self):
+		return [channel[0] for channel in self.__channels]
+
+	def getTypes(self):
+		return [channel[1] for channel in self.__channels]
+
+	def getUnits(self):
+		return [channel[2] for channel in self.__channels]
+
+	def getLabels(self):
+		return [channel[3] for channel in self.__channels]
+
+	# "Label (unit)" per channel
+	def getTitles(self):
+		return [f"{label} ({unit})" if unit else label for name, channelType, unit, label in self.__channels]
+
+	# struct format of a binary STATUS record (TIME, then each channel)
+	def getRecordFormat(self):
+		return "<i" + "".join(STATUS_CHANNEL_TYPES[channelType] for channelType in self.getTypes())
+
+	# The same channels with every type as i32 (the layout of samples once stored, e.g. in a capture file)
+	def widened(self):
+		return ChannelSchema([(name, "i32", unit, label) for name, channelType, unit, label in self.__channels])
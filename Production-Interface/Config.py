@@ -4,22 +4,141 @@ OUTPUT_FORMATS			= ["PDF", "PNG", "SVG"]
 PDF						= "PDF"
 PNG						= "PNG"
 SVG						= "SVG"
+ALL_FORMATS				= "All"			# Writes every format in OUTPUT_FORMATS in one pass
+
+REPORT_WORKERS			= 2				# Report rendering processes
+REPORT_MAX_POINTS		= 4000			# Points plotted per series (larger series are min/max decimated)
+REPORT_DPI				= 300
+REPORT_FIGURE_SIZE		= (8.00, 4.00)	# Inches
+REPORT_COLOURS			= ['b', 'r', 'g', 'm', 'c', 'y', 'k']	# Used in turn for each channel
 
 BUFFER_SIZE				= 1024
+INTERFACE_ADDRESS		= "0.0.0.0"	# Local address the interface socket is bound to (all network interfaces)
+SOCKET_RECEIVE_BUFFER	= 4194304	# Bytes of kernel receive buffer requested for the interface socket (0 = system default)
+SOCKET_DRAIN_DATAGRAMS	= 256		# Most datagrams read from the socket per wakeup (into one preallocated buffer)
 MIN_PORT				= 1024
 MAX_PORT				= 65535
 
 MIN_INTERVAL			= 10		# Milliseconds
 MAX_INTERVAL			= 10000		# Milliseconds
-LIVE_DISPLAY_FREQENCY	= 100		# Milliseconds
+LIVE_DISPLAY_INTERVAL	= 33		# Milliseconds (~30 fps)
+LIVE_DISPLAY_HEADROOM	= 1.5		# Axis limit expansion applied when the live data leaves the current view
+SESSION_GRID_INTERVAL	= 250		# Milliseconds (device status grid refresh)
+LIVE_DISPLAY_POINTS		= 2000		# Maximum points per live series (larger spans are shown as min/max buckets)
+LIVE_DISPLAY_MIN_SPAN	= 1000		# Milliseconds (shortest span of the live display scale; the longest is the whole test)
+LIVE_DISPLAY_STEPS		= 100		# Positions of the (logarithmic) live display scale slider
+PYRAMID_BASE			= 16		# Samples per bucket in the finest level of the live display index
+PYRAMID_FACTOR			= 4			# Buckets merged into one by each coarser level of the live display index
+PYRAMID_CHUNK			= 256		# Samples added to the live display index at a time (newer samples are shown raw)
+
+SAMPLE_STORE_CAPACITY	= 4096		# Samples (initial allocation; grows as required)
+SAMPLE_RING_SIZE		= 8388608	# Bytes of shared memory per device for its most recent samples (~70 s of 2 channels at 5 kHz)
+
+# Messages between the GUI and the acquisition process (see AcquisitionProcess)
+ACQUISITION_LOG			= "Log"			# Progress message (text)
+ACQUISITION_STATUS		= "Status"		# State of every session (see `RemoteSession.describe`)
+ACQUISITION_FINISHED	= "Finished"	# Final state and results of every session, and the loss report
+ACQUISITION_PROFILE		= "Profile"		# Stage timings of the acquisition process (see StageProfiler)
+ACQUISITION_ERROR		= "Error"		# The test couldn't be run (text)
+ACQUISITION_CANCEL		= "Cancel"		# Sent by the GUI to cancel the test
+ACQUISITION_TIMEOUT		= 5				# Seconds allowed for the acquisition process to exit after a cancellation
+
+CAPTURE_ENABLED			= True
+CAPTURE_DIRECTORY		= "Production Test Captures"
+CAPTURE_CHUNK_SIZE		= 1024		# Samples written to the capture file at a time
+CAPTURE_KEEP_SAMPLES	= 16384		# Samples kept in memory once written to the capture file (for the live view)
+CAPTURE_MAGIC			= b"PDTCAP01"
+CAPTURE_VERSION			= 2			# Version 2 adds the channel schema (version 1 files have STATUS_DEFAULT_SCHEMA)
+CAPTURE_HEADER_SIZE		= 128		# Bytes
+DATAGRAM_LOG_ENABLED	= False		# Also record every datagram received (for replays that include timing and framing)
+DATAGRAM_LOG_MAGIC		= b"PDTDGL01"
+REPLAY_ADDRESS			= "0.0.0.0"	# Address given to replayed devices (ports from MIN_PORT up)
+REPLAY_SPEEDS			= {"Max": 0, "1x": 1, "10x": 10, "100x": 100}	# Multiples of real time (0 = as fast as possible)
+
+RESULTS_ENABLED			= True
+RESULTS_DATABASE		= "Production Test Results.sqlite3"
+RESULTS_PAGE_SIZE		= 500		# Runs listed at a time by the history browser
+OUTCOME_PASS			= "PASS"
+OUTCOME_FAIL			= "FAIL"		# Completed (or aborted) with lost samples or a limit failure
+OUTCOME_CANCELLED		= "CANCELLED"
+OUTCOME_ERROR			= "ERROR"		# Ended without completing (e.g. the device didn't respond)
+RESULTS_OUTCOMES		= [OUTCOME_PASS, OUTCOME_FAIL, OUTCOME_CANCELLED, OUTCOME_ERROR]
+HISTORY_COLUMNS			= ["Run", "Started", "Model", "Serial", "Outcome", "Samples", "Loss", "Capture"]
+HISTORY_PERIODS			= {"Last 24 Hours": 1, "Last 7 Days": 7, "Last 30 Days": 30, "All Time": None}	# Days
+HISTORY_ALL_OUTCOMES	= "All"
+
+LINK_HISTOGRAM_MIN		= 0.01		# Milliseconds (lower edge of the first latency/jitter histogram bin)
+LINK_HISTOGRAM_MAX		= 10000		# Milliseconds (upper edge of the last latency/jitter histogram bin)
+LINK_HISTOGRAM_BINS		= 60		# Log-spaced bins (10 per decade)
+LINK_LOSS_LIMIT			= 0.0		# Percentage of samples that may be lost before a test is reported as invalid
 
+RATE_ADAPTIVE			= True		# Let devices that support it slow a test down while the interface is behind
+RATE_FEEDBACK_INTERVAL	= 250		# Milliseconds between the lag reports sent to each device (TEST;CMD=LAG)
+RATE_MAX_SLOWDOWN		= 8			# Longest interval a device may slow down to, as a multiple of the requested one
+
+PROFILE_ENABLED			= True		# Time each acquisition stage (see StageProfiler) for the performance panel
+PROFILE_TRACE			= False		# Also write a Chrome trace of each test to CAPTURE_DIRECTORY (needs PROFILE_ENABLED)
+PROFILE_TRACE_EVENTS	= 200000	# Stage timings kept per process for a trace (later ones are only counted)
+PROFILE_COLUMNS			= ["Stage", "Calls/s", "Items/s", "Mean (us)", "p99 (us)", "Max (us)", "Time"]
+
+STATS_PERCENTILES		= [50, 95, 99]	# Percentiles reported for each channel
+STATS_SKETCH_ACCURACY	= 0.01			# Relative error of the streaming percentile estimates
+STATS_WINDOW			= 1000			# Milliseconds (span of the rolling-window statistics)
+# Pass/fail rules checked on every sample (see LimitChecker), e.g.
+#	{"channel": "MV", "type": "bounds", "min": 0, "max": 1000}
+#	{"channel": "MV", "type": "rate", "max": 50000}						# Units per second
+#	{"channel": "MA", "type": "outside", "min": 100, "max": 900, "time": 50}	# Milliseconds out of range allowed
+LIMIT_RULES				= []
+LIMIT_EARLY_ABORT		= False			# Stop a test at its first limit failure (instead of running it to the end)
+
+MSG_DELIMITER			= ";"
 MSG_TYPE_DISCOVERY		= "ID"
 MSG_TYPE_STATUS			= "STATUS"
 MSG_TYPE_TEST			= "TEST"
 MSG_RESULT_STARTED		= "STARTED"
 MSG_RESULT_STOPPED		= "STOPPED"
 MSG_RESULT_ERROR		= "ERROR"
+MSG_RESULT_RATE			= "RATE"		# The device changed its rate or batching (adaptive tests)
 MSG_FULL_STARTED		= "TEST;RESULT=STARTED"
 MSG_FULL_STOPPED		= "TEST;RESULT=STOPPED"
 MSG_FULL_STOP			= "TEST;CMD=STOP;"
+
+SESSION_IDLE			= "Idle"
+SESSION_CONTACTING		= "Contacting"
+SESSION_RUNNING			= "Running"
+SESSION_COMPLETED		= "Completed"
+SESSION_CANCELLED		= "Cancelled"
+SESSION_ABORTED			= "Aborted"		# Stopped early by a limit failure (see LIMIT_EARLY_ABORT)
+SESSION_TIMED_OUT		= "Timed Out"	# The device didn't respond, or didn't finish the test, in time
+SESSION_CONTACT_TIMEOUT	= 5				# Seconds allowed for a device to answer and start its test
+SESSION_TEST_TIMEOUT	= 5				# Seconds allowed beyond the test duration for a device to finish its test
+DEVICE_GRID_COLUMNS		= ["Device", "Address", "Status", "Samples", "Loss", "Limits", "Summary"]
+
+MSG_FORMAT_TEXT			= "TEXT"
+MSG_FORMAT_BINARY		= "BINARY"
+MSG_MODE_RAW			= "RAW"
+MSG_MODE_AGGREGATE		= "AGGREGATE"		# Windowed aggregation (only used if advertised by the device)
+MSG_MODE_ADAPTIVE		= "ADAPTIVE"		# Rate adapted to the interface's lag reports (only used if advertised)
+STATUS_FORMAT			= MSG_FORMAT_BINARY	# Preferred STATUS framing (only used if advertised by the device)
+STATUS_BINARY_MAGIC		= b"\xb5"			# First byte of binary STATUS datagrams without a sequence number
+STATUS_BATCH_SIZE		= 64				# Maximum samples per STATUS datagram (capped by BUFFER_SIZE on the device)
+STATUS_BATCH_WINDOW		= 20				# Milliseconds (maximum span of samples held back in one batch)
+STATUS_SEQUENCED_MAGIC	= b"\xb6"			# First byte of binary STATUS datagrams with a sequence number (SEQ=1)
+STATUS_SEQUENCE_PREFIX	= "STATUS;SEQ="		# Start of text STATUS datagrams with a sequence number (SEQ=1)
+STATUS_AGGREGATE_MAGIC	= b"\xb7"			# First byte of aggregate STATUS datagrams (always sequenced)
+STATUS_AGGREGATE_WINDOW	= 0					# Milliseconds of samples sent as one aggregate record (0 = every sample)
+STATUS_AGGREGATE_TAIL	= 0					# Raw samples from the end of each window sent with its aggregate record
+# Channels of devices that don't announce their own in the ID response (see ChannelSchema)
+STATUS_DEFAULT_SCHEMA	= "MV:i32:mV:Voltage,MA:i32:mA:Current"
+# Channel types of a schema, as the struct format of their binary STATUS fields (little-endian)
+STATUS_CHANNEL_TYPES	= {"i8": "b", "u8": "B", "i16": "h", "u16": "H", "i32": "i"}
+STATUS_MAX_CHANNELS		= 32				# Channels per sample (so that a sample always fits in one datagram)
+
+STANDIN_SIGNAL_LIMIT	= 1000				# Generated values are 0 - 999 (as SIGNAL_LIMIT on the device)
+BENCHMARK_INTERVALS		= [1000, 250, 100]	# Microseconds per sample
+BENCHMARK_BURSTS		= [1, 16]			# Samples generated back-to-back per tick
+BENCHMARK_DURATIONS		= [2, 5]			# Seconds
+BENCHMARK_OUTPUT		= "loopback_benchmark.json"
+BENCHMARK_TIMEOUT		= 5					# Seconds allowed beyond the test duration before a run is cancelled
+BENCHMARK_TOLERANCE		= 0.10				# Relative drop in sustained rate (vs a baseline) reported as a regression
 ########################################
\ No newline at end of file
@@ -23,12 +23,122 @@ from time import sleep
 from threading import Thread
 
 from Config import *
+from StageProfiler import StageProfiler
 ########################################
 
+# Live view engine: the line artists are created once and only have their data replaced on each refresh.
+# Refreshes are driven by a QTimer on the GUI thread, which pulls the latest display window from a source callable
+# (e.g. `TestExecutionWorker.getDisplayWindow`), so matplotlib is never touched by the acquisition thread.
+# Frames are blitted over a cached background, and a full redraw only happens when the data leaves the axis limits.
+# The source returns at most LIVE_DISPLAY_POINTS points per series whatever the time span shown (see DisplayPyramid).
+# There is one line per channel of the device shown, so the lines are recreated whenever its channels (as returned by
+# a second callable, e.g. `TestExecutionWorker.getChannelSchema`) change.
+# With PROFILE_ENABLED, fetching the display window and redrawing are timed (as the "window" and "redraw" stages) by
+# a StageProfiler created for each live view (see `getProfiler`).
 class DataCanvas(FigureCanvas):
 	def __init__(self, parent=None, width=6, height=6, dpi=100):
 		figure = Figure(figsize=(width, height), dpi=dpi)
 		self.axes = figure.add_subplot(111)
-		self.axes.set_xlabel("Time (milliseconds)")
-		self.axes.set_ylabel("Level (mA/mV)")
-		super(DataCanvas, self).__init__(figure)
\ No newline at end of file
+		self.axes.set_xlabel("Time (seconds)")
+		super(DataCanvas, self).__init__(figure)
+		self.__lines = []
+		self.__schema = None	# Channels the lines were created for
+		self.__background = None
+		self.__source = None
+		self.__schemaSource = None
+		self.__profiler = None
+		self.__timer = QTimer(self)
+		self.__timer.setInterval(LIVE_DISPLAY_INTERVAL)
+		self.__timer.timeout.connect(self.__refresh)
+		self.mpl_connect("draw_event", self.__onDraw)
+
+	# Full redraws (including resizes) invalidate the cached background, so it is recaptured here
+	def __onDraw(self, event):
+		self.__background = self.copy_from_bbox(self.axes.bbox)
+		for line in self.__lines:
+			self.axes.draw_artist(line)
+
+	def __createLines(self, schema):
+		for line in self.__lines:
+			line.remove()
+		self.__lines = [self.axes.plot([], [], REPORT_COLOURS[index % len(REPORT_COLOURS)], label=title, \
+										animated=True)[0] for index, title in enumerate(schema.getTitles())]
+		self.axes.set_ylabel(f"Level ({'/'.join(dict.fromkeys(unit for unit in schema.getUnits() if unit))})")
+		self.axes.legend(loc="upper right")
+		self.__schema = schema
+		self.__background = None
+
+	def __resetLines(self):
+		for line in self.__lines:
+			line.set_data([], [])
+		self.axes.set_xlim(0, 1)
+		self.axes.set_ylim(0, 1)
+
+	# Also true when the data only covers a small part of the x axis (e.g. after the live display scale is reduced)
+	def __limitsExceeded(self, timestamps, channels):
+		xMin, xMax = self.axes.get_xlim()
+		yMin, yMax = self.axes.get_ylim()
+		if timestamps[0] < xMin or timestamps[-1] > xMax:
+			return True
+		span = max(timestamps[-1] - timestamps[0], LIVE_DISPLAY_INTERVAL / 1000)	# As in `__rescale`
+		if span * LIVE_DISPLAY_HEADROOM ** 2 < xMax - xMin:
+			return True
+		for data in channels:
+			if data.min() < yMin or data.max() > yMax:
+				return True
+		return False
+
+	def __rescale(self, timestamps, channels):
+		span = max(timestamps[-1] - timestamps[0], LIVE_DISPLAY_INTERVAL / 1000)
+		self.axes.set_xlim(timestamps[0], timestamps[0] + span * LIVE_DISPLAY_HEADROOM)
+		yMin = min(0, min(data.min() for data in channels))
+		yMax = max(data.max() for data in channels) * LIVE_DISPLAY_HEADROOM
+		self.axes.set_ylim(yMin, max(yMax, yMin + 1))
+
+	def __refresh(self):
+		if self.__source is None:
+			return
+		profiler = self.__profiler
+		start = profiler.now() if profiler is not None else 0
+		timestamps, channels = self.__source()
+		if profiler is not None:
+			start = profiler.record("window", start, len(timestamps), "live view")
+		schema = self.__schemaSource()
+		if len(timestamps) == 0 or len(channels) != len(schema):	# The channels are still being announced
+			return
+		if schema != self.__schema:
+			self.__createLines(schema)
+		timestamps = timestamps / 1000	# Convert milliseconds to seconds
+		for line, data in zip(self.__lines, channels):
+			line.set_data(timestamps, data)
+		if self.__background is None or self.__limitsExceeded(timestamps, channels):
+			self.__rescale(timestamps, channels)
+			self.draw()
+		else:
+			self.restore_region(self.__background)
+			for line in self.__lines:
+				self.axes.draw_artist(line)
+			self.blit(self.axes.bbox)
+		if profiler is not None:
+			profiler.record("redraw", start, len(timestamps), "live view")
+
+	# The StageProfiler of the current (or last) live view, or None if profiling is disabled
+	def getProfiler(self):
+		return self.__profiler
+
+	# `source` returns the display window and `schemaSource` the ChannelSchema of the device shown
+	def startLiveView(self, source, schemaSource):
+		self.__source = source
+		self.__schemaSource = schemaSource
+		self.__profiler = StageProfiler(PROFILE_TRACE) if PROFILE_ENABLED else None
+		self.__resetLines()
+		self.draw()
+		self.__timer.start()
+
+	def stopLiveView(self):
+		self.__timer.stop()
+		self.__source = None
+		self.__schemaSource = None
+		self.__profiler = None
+		self.__resetLines()
+		self.draw()
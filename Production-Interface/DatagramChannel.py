@@ -0,0 +1,152 @@
+########################################
+# ***** IMPORTS *****
+import os
+import selectors
+import socket
+import struct
+import sys
+
+from Config import *
+########################################
+
+# Event-driven UDP endpoint used by the acquisition loop.
+# `receive` blocks (without any polling timeout) until either datagrams are queued on the socket or `wake` is called
+# from another thread, then drains the queued datagrams in one pass. Genuine socket errors are raised to the caller
+# rather than being discarded, and the only exception treated as normal is the one marking an empty receive queue.
+# To absorb bursts while the caller is busy (parsing, or the GUI redrawing), the kernel receive buffer is enlarged to
+# SOCKET_RECEIVE_BUFFER, and each pass drains up to SOCKET_DRAIN_DATAGRAMS datagrams straight into one preallocated
+# buffer with `recvmsg_into`, so draining allocates nothing per datagram. The datagrams returned are memoryviews into
+# that buffer, and are only valid until the next call to `receive`.
+# Where the platform supports SO_RXQ_OVFL (Linux), the kernel's count of datagrams dropped because the receive buffer
+# was full is read from each datagram's ancillary data, so losses in the interface's own host can be told apart from
+# losses on the network (see `getStats`). The count only arrives with the next datagram queued after a drop, so
+# `getStats` also reads the socket's current count from /proc/net/udp where it can. Datagrams longer than BUFFER_SIZE
+# are truncated, and are counted too.
+class DatagramChannel:
+	__overflowOption = getattr(socket, "SO_RXQ_OVFL", 40 if sys.platform.startswith("linux") else None)
+	__overflowCount = struct.Struct("I")	# Native uint32
+
+	def __init__(self, address):
+		self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.__receiveBuffer = self.__sizeReceiveBuffer(SOCKET_RECEIVE_BUFFER)
+		self.__socket.bind(address)
+		self.__socket.setblocking(False)
+		self.__overflowReported = False
+		if DatagramChannel.__overflowOption is not None and hasattr(self.__socket, "recvmsg_into"):
+			try:
+				self.__socket.setsockopt(socket.SOL_SOCKET, DatagramChannel.__overflowOption, 1)
+				self.__overflowReported = True
+			except OSError:
+				pass
+		self.__ancillarySize = socket.CMSG_SPACE(DatagramChannel.__overflowCount.size) if self.__overflowReported else 0
+		self.__receiveMessages = hasattr(self.__socket, "recvmsg_into")	# Not available on Windows
+		self.__buffer = bytearray(SOCKET_DRAIN_DATAGRAMS * BUFFER_SIZE)
+		self.__views = [memoryview(self.__buffer)[index * BUFFER_SIZE:(index + 1) * BUFFER_SIZE] \
+						for index in range(SOCKET_DRAIN_DATAGRAMS)]
+		self.__received = 0			# Datagrams
+		self.__kernelDrops = 0		# Datagrams dropped by the kernel (cumulative, as reported by SO_RXQ_OVFL)
+		self.__truncated = 0		# Datagrams longer than BUFFER_SIZE
+		self.__largestDrain = 0		# Most datagrams drained in one pass
+		self.__wakeReader, self.__wakeWriter = socket.socketpair()	# Self-pipe used to interrupt `select`
+		self.__wakeReader.setblocking(False)
+		self.__wakeWriter.setblocking(False)
+		self.__selector = selectors.DefaultSelector()
+		self.__selector.register(self.__socket, selectors.EVENT_READ)
+		self.__selector.register(self.__wakeReader, selectors.EVENT_READ)
+
+	# SO_RCVBUFFORCE can exceed the system limit (net.core.rmem_max) but needs privileges, so SO_RCVBUF (which is
+	# silently capped at the limit) is the fallback. Returns the size the kernel actually allocated.
+	def __sizeReceiveBuffer(self, size):
+		if size > 0:
+			try:
+				self.__socket.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_RCVBUFFORCE", 33), size)
+			except OSError:
+				self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+		return self.__socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+	def sendTo(self, data, address):
+		return self.__socket.sendto(data, address)
+
+	# Thread-safe; causes a pending (or the next) `receive` call to return promptly
+	def wake(self):
+		try:
+			self.__wakeWriter.send(b"\x00")
+		except OSError:
+			pass	# A wake-up is already pending, or the channel has already been closed
+
+	# Returns a list of (data, address) tuples, which is empty if the call was interrupted by `wake`, or if nothing
+	# arrived within `timeout` seconds (if given)
+	def receive(self, timeout=None):
+		datagrams = []
+		for key, events in self.__selector.select(timeout):
+			if key.fileobj is self.__wakeReader:
+				self.__drainWakeups()
+			else:
+				self.__drainSocket(datagrams)
+		return datagrams
+
+	def __drainWakeups(self):
+		try:
+			while self.__wakeReader.recv(BUFFER_SIZE):
+				pass
+		except BlockingIOError:
+			pass
+
+	# Stops after SOCKET_DRAIN_DATAGRAMS datagrams (any more are still queued, so the next `select` returns at once)
+	def __drainSocket(self, datagrams):
+		for view in self.__views:
+			try:
+				if self.__receiveMessages:
+					length, ancillary, flags, address = self.__socket.recvmsg_into([view], self.__ancillarySize)
+				else:
+					(length, address), ancillary, flags = self.__socket.recvfrom_into(view), [], 0
+			except BlockingIOError:
+				break
+			for level, kind, data in ancillary:
+				if level == socket.SOL_SOCKET and kind == DatagramChannel.__overflowOption:
+					self.__kernelDrops = max(self.__kernelDrops, DatagramChannel.__overflowCount.unpack_from(data)[0])
+			if flags & socket.MSG_TRUNC:
+				self.__truncated += 1
+			datagrams.append((view[:length], address))
+		self.__received += len(datagrams)
+		self.__largestDrain = max(self.__largestDrain, len(datagrams))
+
+	# Returns the socket's line of /proc/net/udp (Linux) split into fields, or None if it can't be read
+	def __readSocketEntry(self):
+		try:
+			inode = str(os.fstat(self.__socket.fileno()).st_ino)
+			with open("/proc/net/udp") as file:
+				for line in file.readlines()[1:]:
+					fields = line.split()
+					if len(fields) > 12 and fields[9] == inode:
+						return fields
+		except (OSError, ValueError):
+			pass
+		return None
+
+	# Bytes waiting in the socket's receive queue (from /proc/net/udp), or None where the platform doesn't report it.
+	# Thread-safe (e.g. for a StageProfiler gauge).
+	def getBacklog(self):
+		fields = self.__readSocketEntry()
+		return int(fields[4].split(":")[1], 16) if fields is not None else None
+
+	# Receive counters since the channel was opened (call before `close`); kernelDrops is None where the platform
+	# doesn't report drops
+	def getStats(self):
+		fields = self.__readSocketEntry()
+		kernelDrops = int(fields[12]) if fields is not None else None
+		if kernelDrops is not None or self.__overflowReported:
+			kernelDrops = max(kernelDrops or 0, self.__kernelDrops)
+		return {
+			"received": self.__received,
+			"kernelDrops": kernelDrops,
+			"truncated": self.__truncated,
+			"largestDrain": self.__largestDrain,
+			"receiveBuffer": self.__receiveBuffer	# Bytes (as reported by the kernel, which may double the request)
+		}
+
+	def close(self):
+		self.__selector.close()
+		self.__socket.close()
+		self.__wakeReader.close()
+		self.__wakeWriter.close()
@@ -0,0 +1,65 @@
+########################################
+# ***** IMPORTS *****
+import json
+import struct
+
+from Config import *
+########################################
+
+# Append-only recording of every datagram a session receives from its device (ID, TEST and STATUS, exactly as
+# received), with its arrival time, so a test can be replayed through the same processing path later (see
+# ReplayManager), e.g. to reproduce an issue seen in the field.
+# Layout: DATAGRAM_LOG_MAGIC, a little-endian uint32 length and that many bytes of JSON metadata (the session's
+# address, duration, interval and start time), then per datagram its arrival time (float64 seconds from the start of
+# the session), a uint32 length and the datagram itself. A partially written trailing datagram is ignored when loading.
+class DatagramLog:
+	__length = struct.Struct("<I")
+	__record = struct.Struct("<dI")	# Arrival time (s), length
+
+	def __init__(self, path, metadata):
+		self.__path = path
+		self.__file = open(path, "wb")
+		encoded = json.dumps(metadata).encode("utf-8")
+		self.__file.write(DATAGRAM_LOG_MAGIC + DatagramLog.__length.pack(len(encoded)) + encoded)
+
+	def getPath(self):
+		return self.__path
+
+	# Buffered, so this is cheap enough to call for every datagram
+	def append(self, arrival, data):
+		self.__file.write(DatagramLog.__record.pack(arrival, len(data)) + data)
+
+	def close(self):
+		if not self.__file.closed:
+			self.__file.close()
+
+	# Returns the metadata only, without reading the datagrams
+	@staticmethod
+	def loadMetadata(path):
+		with open(path, "rb") as file:
+			if file.read(len(DATAGRAM_LOG_MAGIC)) != DATAGRAM_LOG_MAGIC:
+				raise ValueError(f"Not a datagram log: {path}")
+			length = DatagramLog.__length.unpack(file.read(DatagramLog.__length.size))[0]
+			return json.loads(file.read(length))
+
+	# Returns (metadata, [(arrival, data)])
+	@staticmethod
+	def load(path):
+		with open(path, "rb") as file:
+			contents = file.read()
+		if not contents.startswith(DATAGRAM_LOG_MAGIC):
+			raise ValueError(f"Not a datagram log: {path}")
+		offset = len(DATAGRAM_LOG_MAGIC)
+		length = DatagramLog.__length.unpack_from(contents, offset)[0]
+		offset += DatagramLog.__length.size
+		metadata = json.loads(contents[offset:offset + length])
+		offset += length
+		datagrams = []
+		while offset + DatagramLog.__record.size <= len(contents):
+			arrival, length = DatagramLog.__record.unpack_from(contents, offset)
+			offset += DatagramLog.__record.size
+			if offset + length > len(contents):
+				break
+			datagrams.append((arrival, contents[offset:offset + length]))
+			offset += length
+		return metadata, datagrams
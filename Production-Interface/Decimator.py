@@ -0,0 +1,25 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+########################################
+
+# Shape-preserving reduction of large series for plotting.
+# The series is split into equal buckets and only the minimum and maximum of each bucket are kept (in their original
+# order), so spikes survive however far the series is reduced, unlike naive every-Nth-sample subsampling.
+class Decimator:
+	# Returns (x, y) with at most about 2 * `buckets` points; short series are returned unchanged
+	@staticmethod
+	def minMax(x, y, buckets):
+		count = len(y)
+		if count <= 2 * buckets:
+			return x, y
+		size = count // buckets
+		full = size * buckets
+		blocks = numpy.asarray(y[:full]).reshape(buckets, size)
+		offsets = numpy.arange(buckets) * size
+		indices = [blocks.argmin(axis=1) + offsets, blocks.argmax(axis=1) + offsets]
+		if full < count:	# Remainder that doesn't fill a whole bucket
+			remainder = numpy.asarray(y[full:])
+			indices.append(numpy.array([full + remainder.argmin(), full + remainder.argmax()]))
+		indices = numpy.unique(numpy.concatenate(indices))	# Sorted, so the points stay in time order
+		return numpy.asarray(x)[indices], numpy.asarray(y)[indices]
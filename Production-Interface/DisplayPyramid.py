@@ -0,0 +1,118 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+
+from Config import *
+########################################
+
+# Multi-resolution min/max index of a test's samples, maintained incrementally as they arrive, so the live view can
+# show any time span (from the last second to the whole test) with a bounded number of points and constant cost per
+# redraw. Like `Decimator.minMax`, each bucket keeps the minimum and maximum of every channel, so spikes are never hidden.
+# Level 0 buckets hold PYRAMID_BASE samples and each further level merges PYRAMID_FACTOR buckets of the level below;
+# levels are added as the test grows. Rows that don't yet fill a bucket of the next level are kept as "pending".
+# Every row is [start time, end time] followed by the minimum of each channel and then the maximum of each channel
+# (int32), and a raw sample is simply a row whose minimum and maximum are both the sample. Each bucket is drawn as its
+# minimum at its start time and its maximum at its end time; at about one bucket per pixel, the order doesn't show.
+# Rows are appended on the acquisition thread and read on the GUI thread, so each level is stored as an (array, count)
+# tuple that's only ever replaced as a whole (see SampleStore).
+class DisplayPyramid:
+	def __init__(self, channelCount):
+		self.__channelCount = channelCount
+		self.__width = 2 + 2 * self.__channelCount
+		self.__levels = []						# (rows, count) per level
+		self.__pending = [self.__emptyRows()]	# Rows that don't yet fill a bucket, per level (raw samples for level 0)
+
+	def getChannelCount(self):
+		return self.__channelCount
+
+	def __emptyRows(self, count=0):
+		return numpy.empty((count, self.__width), dtype=numpy.int32)
+
+	# `timestamps` and each of `channels` are equal-length arrays of new samples
+	def extend(self, timestamps, channels):
+		if len(timestamps) == 0:
+			return
+		maxima = 2 + self.__channelCount
+		rows = self.__emptyRows(len(timestamps))
+		rows[:, 0] = timestamps
+		rows[:, 1] = timestamps
+		rows[:, 2:maxima] = numpy.column_stack(channels)
+		rows[:, maxima:] = rows[:, 2:maxima]
+		level = 0
+		while len(rows):
+			rows = numpy.concatenate((self.__pending[level], rows))
+			size = PYRAMID_BASE if level == 0 else PYRAMID_FACTOR
+			full = len(rows) // size * size
+			self.__pending[level] = rows[full:]
+			if full == 0:
+				break
+			rows = self.__merge(rows[:full], size)
+			if level == len(self.__levels):
+				self.__levels.append((self.__emptyRows(SAMPLE_STORE_CAPACITY // PYRAMID_BASE), 0))
+				self.__pending.append(self.__emptyRows())
+			self.__append(level, rows)
+			level += 1
+
+	# Merges every `size` consecutive rows into one
+	def __merge(self, rows, size):
+		maxima = 2 + self.__channelCount
+		blocks = rows.reshape(-1, size, self.__width)
+		merged = self.__emptyRows(len(blocks))
+		merged[:, 0] = blocks[:, 0, 0]
+		merged[:, 1] = blocks[:, -1, 1]
+		blocks[:, :, 2:maxima].min(axis=1, out=merged[:, 2:maxima])
+		blocks[:, :, maxima:].max(axis=1, out=merged[:, maxima:])
+		return merged
+
+	def __append(self, level, rows):
+		array, count = self.__levels[level]
+		end = count + len(rows)
+		if end > len(array):
+			grown = self.__emptyRows(max(2 * len(array), end))
+			grown[:count] = array[:count]
+			array = grown
+		array[count:end] = rows
+		self.__levels[level] = (array, end)
+
+	# Returns (timestamps, [channel data]) covering the samples from `start` (ms) onwards, from the finest level that
+	# needs at most `points` points (two per bucket)
+	def window(self, start, points):
+		levels = list(self.__levels)
+		pending = list(self.__pending)
+		if not levels:
+			return self.__points(pending[0])	# Too few samples to fill a bucket
+		for level, (array, count) in enumerate(levels):
+			first = max(int(numpy.searchsorted(array[:count, 0], start, side="right")) - 1, 0)	# Bucket holding `start`
+			if 2 * (count - first + 1) <= points or level == len(levels) - 1:
+				first = max(first, count - points // 2 + 1)
+				# The newest samples are in the partially filled buckets of this level and those below it
+				partial = [self.__merge(rows, len(rows)) for rows in reversed(pending[:level + 1]) if len(rows)]
+				return self.__points(numpy.concatenate([array[first:count]] + partial))
+
+	# Returns (timestamps, [channel data]) for the last `span` ms of a test for the live view, given its newest raw
+	# samples (`timestamps` and `channels`, at most `points` of them, e.g. from `SampleStore.tail`), its sample count and
+	# how many of its samples have been added to the pyramid: the raw samples if they cover the span, otherwise min/max
+	# buckets followed by the raw samples that haven't been added yet. The cost doesn't depend on the span.
+	def liveWindow(self, timestamps, channels, total, indexed, span, points):
+		if len(timestamps) == 0:
+			return timestamps, channels
+		start = timestamps[-1] - span
+		if timestamps[0] <= start or len(timestamps) == total:
+			first = int(numpy.searchsorted(timestamps, start))
+			return timestamps[first:], [data[first:] for data in channels]
+		raw = min(max(total - indexed, 0), len(timestamps))
+		indexedTimestamps, indexedChannels = self.window(start, points - raw)
+		return numpy.concatenate((indexedTimestamps, timestamps[len(timestamps) - raw:])), \
+				[numpy.concatenate((indexed, data[len(data) - raw:])) for indexed, data in zip(indexedChannels, channels)]
+
+	def __points(self, rows):
+		timestamps = numpy.empty(2 * len(rows), dtype=numpy.int32)
+		timestamps[0::2] = rows[:, 0]
+		timestamps[1::2] = rows[:, 1]
+		channels = []
+		for index in range(self.__channelCount):
+			data = numpy.empty(2 * len(rows), dtype=numpy.int32)
+			data[0::2] = rows[:, 2 + index]
+			data[1::2] = rows[:, 2 + self.__channelCount + index]
+			channels.append(data)
+		return timestamps, channels
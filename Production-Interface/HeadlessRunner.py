@@ -0,0 +1,183 @@
+########################################
+# ***** IMPORTS *****
+import argparse
+import json
+import signal
+import sys
+
+from Config import *
+from ReplayManager import ReplayManager
+from ReportRenderer import ReportRenderer
+from ResultsDatabase import ResultsDatabase
+from SessionManager import SessionManager
+from StageProfiler import StageProfiler
+from TestSession import TestSession
+########################################
+
+# Qt-free command-line test runner for automated stations.
+# Runs a test on one or more devices at once (using the same SessionManager/TestSession engine as the GUI) and writes
+# the results as JSON. This module must not import PyQt5 or matplotlib, directly or through the engine modules.
+#
+# Usage (from the Production-Interface directory):
+#   python3 -m HeadlessRunner --port 9090 --duration 10 --interval 10 --device 192.168.1.2:8080 [--device ...]
+#   python3 -m HeadlessRunner --port 9090 --duration 10 --interval 10 --targets devices.txt --output results.json
+#   python3 -m HeadlessRunner ... --report ./Reports --formats PDF,PNG
+#   python3 -m HeadlessRunner ... --database "Station 1.sqlite3"
+#   python3 -m HeadlessRunner ... --trace trace.json
+#   python3 -m HeadlessRunner ... --aggregate 100
+#   python3 -m HeadlessRunner --replay "Production Test Captures/Dev_42_2026_01_01_12_00_00.cap" [--speed 10]
+# A targets file lists one device per line as IP:PORT (blank lines and lines starting with '#' are ignored).
+# The exit code is 0 if every device completed its test without losing samples (see LINK_LOSS_LIMIT) or failing a limit
+# rule (see LIMIT_RULES), and 1 otherwise. A device that doesn't respond within SESSION_CONTACT_TIMEOUT seconds, or
+# doesn't finish its test within SESSION_TEST_TIMEOUT seconds of its duration, is timed out (with an ERROR outcome).
+# With --replay, recorded tests (capture files or datagram logs) are replayed through the same processing instead of
+# testing devices (see ReplayManager), as fast as possible unless --speed is given, and aren't recorded in the
+# results database.
+# With PROFILE_ENABLED, the results include the time spent in each stage of acquisition (see StageProfiler), and
+# --trace writes every stage timing as a Chrome trace, so a slow station can be diagnosed without a profiler.
+# With --aggregate, devices that support it send a summary of each window of that many ms of samples instead of every
+# sample (see TestSession), so very fast tests can run for hours at a fraction of the network and CPU cost.
+# With RATE_ADAPTIVE, devices that support it slow down while the runner falls behind (every change is listed in the
+# results), unless --fixed-rate is given.
+
+def parseTarget(target):
+	IPDevice, separator, portDevice = target.strip().rpartition(":")
+	if not separator:
+		raise argparse.ArgumentTypeError(f"Device must be given as IP:PORT, not '{target}'")
+	portDevice = int(portDevice)
+	if portDevice < MIN_PORT or portDevice > MAX_PORT:
+		raise argparse.ArgumentTypeError(f"Device port must be {MIN_PORT} - {MAX_PORT}: '{target}'")
+	return IPDevice, portDevice
+
+def readTargets(path):
+	with open(path) as file:
+		return [parseTarget(line) for line in file if line.strip() and not line.strip().startswith("#")]
+
+def parseArguments(arguments):
+	parser = argparse.ArgumentParser(prog="HeadlessRunner", description="Run production device tests without the GUI")
+	parser.add_argument("--device", action="append", type=parseTarget, default=[], help="Device to test, as IP:PORT")
+	parser.add_argument("--targets", help="File listing devices to test (one IP:PORT per line)")
+	parser.add_argument("--port", type=int, help=f"Interface port number ({MIN_PORT} - {MAX_PORT})")
+	parser.add_argument("--duration", type=int, help="Test duration (seconds)")
+	parser.add_argument("--interval", type=int, help=f"Test interval ({MIN_INTERVAL} - {MAX_INTERVAL} ms)")
+	parser.add_argument("--replay", action="append", default=[], help="Recorded test to replay instead (.cap or .dgl)")
+	parser.add_argument("--speed", type=float, default=0, help="Replay speed as a multiple of real time (0 = as fast as possible)")
+	parser.add_argument("--output", help="JSON results file (default: standard output)")
+	parser.add_argument("--report", help="Directory to write a report for each completed test to")
+	parser.add_argument("--formats", default=PNG, help=f"Comma-separated report formats ({', '.join(OUTPUT_FORMATS)})")
+	parser.add_argument("--database", default=RESULTS_DATABASE if RESULTS_ENABLED else "", \
+						help="SQLite database to record the results in ('' to not record them)")
+	parser.add_argument("--trace", help="Chrome trace file to write the stage timings to")
+	parser.add_argument("--aggregate", type=int, default=STATUS_AGGREGATE_WINDOW, \
+						help="Window (ms) of samples each device sends as one summary record (0 = every sample)")
+	parser.add_argument("--fixed-rate", action="store_true", help="Don't let devices slow down when behind")
+	parser.add_argument("--quiet", action="store_true", help="Don't print progress messages")
+	options = parser.parse_args(arguments)
+	options.formats = [outputFormat.strip().upper() for outputFormat in options.formats.split(",")]
+	if any(outputFormat not in OUTPUT_FORMATS for outputFormat in options.formats):
+		parser.error(f"Report formats must be from: {', '.join(OUTPUT_FORMATS)}")
+	if options.replay:
+		if options.device or options.targets:
+			parser.error("Devices can't be tested while replaying recordings")
+		if options.speed < 0:
+			parser.error("Replay speed must be 0 or more")
+		return options
+	if options.port is None or options.duration is None or options.interval is None:
+		parser.error("--port, --duration and --interval are required (unless replaying recordings)")
+	if options.targets:
+		options.device += readTargets(options.targets)
+	if not options.device:
+		parser.error("At least one device is required (--device or --targets)")
+	if options.port < MIN_PORT or options.port > MAX_PORT:
+		parser.error(f"Interface port must be {MIN_PORT} - {MAX_PORT}")
+	if options.interval < MIN_INTERVAL or options.interval > MAX_INTERVAL:
+		parser.error(f"Interval must be {MIN_INTERVAL} - {MAX_INTERVAL} ms")
+	if options.duration < 1:
+		parser.error("Duration must be at least 1 second")
+	if options.aggregate < 0:
+		parser.error("Aggregation window must be 0 or more ms")
+	if any(portDevice == options.port for IPDevice, portDevice in options.device):
+		parser.error("Interface port must be different from device port")
+	return options
+
+def sessionLog(options, target):
+	return (lambda text: None) if options.quiet else (lambda text: print(f"[{target}] {text}", file=sys.stderr))
+
+def createManager(options, profiler=None):
+	if options.replay:
+		manager = ReplayManager(options.speed)
+		for index, path in enumerate(options.replay):
+			metadata, datagrams = ReplayManager.loadRecording(path)
+			IPDevice, portDevice = ReplayManager.replayAddress(index)
+			manager.addSession(TestSession(IPDevice, portDevice, metadata["duration"], metadata["interval"], \
+											sessionLog(options, path), logDatagrams=False, profiler=profiler, \
+											capture=False), datagrams)
+		return manager
+	manager = SessionManager(options.port, profiler)
+	for IPDevice, portDevice in options.device:
+		manager.addSession(TestSession(IPDevice, portDevice, options.duration * 1000, options.interval, \
+										sessionLog(options, f"{IPDevice}:{portDevice}"), profiler=profiler, \
+										aggregateWindow=options.aggregate, \
+										adaptive=RATE_ADAPTIVE and not options.fixed_rate))
+	return manager
+
+def runTests(options):
+	profiler = StageProfiler(trace=bool(options.trace)) if PROFILE_ENABLED else None
+	manager = createManager(options, profiler)
+	signal.signal(signal.SIGINT, lambda signum, frame: manager.cancel())	# Stops the devices before exiting
+	error = ""
+	try:
+		manager.run()
+	except OSError as exception:
+		error = str(exception)
+	if not options.quiet:
+		print(manager.getLossReport(), file=sys.stderr)
+	results = {
+		"interfacePort": options.port,
+		"error": error,
+		"socket": manager.getChannelStats(),
+		"results": [session.getResults() for session in manager.getSessions()],
+		"profile": profiler.snapshot() if profiler is not None else None	# Rates are averages over the whole run
+	}
+	if options.trace and profiler is not None:
+		StageProfiler.writeTrace(options.trace, [("HeadlessRunner", profiler.getEvents())])
+	if options.report:
+		renderReports(options, manager.getSessions(), results["results"])
+	if options.database and not options.replay:	# Replays aren't new runs
+		recordResults(options.database, results["results"])
+	passed = not error and all(session.getState() == SESSION_COMPLETED and session.getOutcome() == OUTCOME_PASS \
+								for session in manager.getSessions())
+	return results, passed
+
+# Each device's results record the id of its run in the results database
+def recordResults(path, results):
+	database = ResultsDatabase(path)
+	try:
+		for result in results:
+			result["run"] = database.record(result)
+	finally:
+		database.close()
+
+# Reports for all devices are rendered in parallel, and each device's results list the files written for it
+def renderReports(options, sessions, results):
+	renderer = ReportRenderer()
+	futures = [renderer.submit(session.getReportJob(options.report, options.formats)) if session.getSummary() else None \
+				for session in sessions]
+	for future, result in zip(futures, results):
+		result["reports"] = future.result() if future is not None else []
+	renderer.shutdown()
+
+def main(arguments):
+	options = parseArguments(arguments)
+	results, passed = runTests(options)
+	if options.output:
+		with open(options.output, "w") as file:
+			json.dump(results, file, indent=2)
+	else:
+		json.dump(results, sys.stdout, indent=2)
+		print()
+	return 0 if passed else 1
+
+# ***** EXECUTION *****
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
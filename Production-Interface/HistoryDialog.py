@@ -0,0 +1,127 @@
+########################################
+# ***** IMPORTS *****
+import json
+import sqlite3
+from datetime import datetime
+from time import time
+
+from PyQt5.QtCore import *
+from PyQt5.QtWidgets import *
+
+from Config import *
+from ResultsDatabase import ResultsDatabase
+########################################
+
+# Browser for the test history in the results database (see ResultsDatabase): runs can be filtered by serial number,
+# model, outcome and period, the failure rate of each model over the period is shown above the runs, and selecting a
+# run shows its channel statistics and full results. Only the newest RESULTS_PAGE_SIZE matching runs are listed.
+class HistoryDialog(QDialog):
+	def __init__(self, *args, **kwargs):
+		super(HistoryDialog, self).__init__(*args, **kwargs)
+		self.setWindowTitle("Test History")
+		self.setMinimumSize(1000, 600)
+		self.__layout = QGridLayout()
+		self.setLayout(self.__layout)
+
+		# DATA
+		self.__database = None
+		self.__runs = []
+
+		# COMPONENTS
+		self.__labelSerial = QLabel(text="Serial Number:")
+		self.__labelModel = QLabel(text="Model:")
+		self.__labelOutcome = QLabel(text="Outcome:")
+		self.__labelPeriod = QLabel(text="Period:")
+		self.__lineSerial = QLineEdit()
+		self.__lineModel = QLineEdit()
+		self.__boxOutcome = QComboBox()
+		self.__boxOutcome.addItems([HISTORY_ALL_OUTCOMES] + RESULTS_OUTCOMES)
+		self.__boxPeriod = QComboBox()
+		self.__boxPeriod.addItems(list(HISTORY_PERIODS))
+		self.__buttonSearch = QPushButton(text="Search")
+		self.__labelMatches = QLabel()
+		self.__labelFailureRates = QLabel()
+		self.__labelFailureRates.setWordWrap(True)
+		self.__tableRuns = QTableWidget(0, len(HISTORY_COLUMNS))
+		self.__tableRuns.setHorizontalHeaderLabels(HISTORY_COLUMNS)
+		self.__tableRuns.horizontalHeader().setStretchLastSection(True)
+		self.__tableRuns.setSelectionBehavior(QAbstractItemView.SelectRows)
+		self.__tableRuns.setSelectionMode(QAbstractItemView.SingleSelection)
+		self.__tableRuns.setEditTriggers(QAbstractItemView.NoEditTriggers)
+		self.__textDetails = QTextEdit()
+		self.__textDetails.setReadOnly(True)
+		self.__textDetails.setStyleSheet("background-color: rgb(224,224,224);")
+
+		# LAYOUT
+		self.__layout.addWidget(self.__labelSerial,			0, 0, 1, 1, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__lineSerial,			0, 1, 1, 1)
+		self.__layout.addWidget(self.__labelModel,			0, 2, 1, 1, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__lineModel,			0, 3, 1, 1)
+		self.__layout.addWidget(self.__labelOutcome,		1, 0, 1, 1, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__boxOutcome,			1, 1, 1, 1)
+		self.__layout.addWidget(self.__labelPeriod,			1, 2, 1, 1, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__boxPeriod,			1, 3, 1, 1)
+		self.__layout.addWidget(self.__buttonSearch,		0, 4, 2, 1)
+		self.__layout.addWidget(self.__labelFailureRates,	2, 0, 1, 5)
+		self.__layout.addWidget(self.__labelMatches,		3, 0, 1, 5)
+		self.__layout.addWidget(self.__tableRuns,			4, 0, 1, 5)
+		self.__layout.addWidget(self.__textDetails,			5, 0, 1, 5)
+
+		# ACTIONS
+		self.__buttonSearch.clicked.connect(self.__search)
+		self.__lineSerial.returnPressed.connect(self.__search)
+		self.__lineModel.returnPressed.connect(self.__search)
+		self.__tableRuns.itemSelectionChanged.connect(self.__tableRunsSelectionChanged)
+
+	# Opens the database each time the dialog is shown, as the history changes as tests are run
+	def showEvent(self, event):
+		super().showEvent(event)
+		try:
+			if self.__database is None:
+				self.__database = ResultsDatabase()
+			self.__search()
+		except sqlite3.Error as error:
+			self.__labelMatches.setText(f"ERROR: The results database could not be read: {error}")
+
+	# Called however the dialog is closed
+	def done(self, result):
+		if self.__database is not None:
+			self.__database.close()
+			self.__database = None
+		super().done(result)
+
+	def __search(self):
+		if self.__database is None:
+			return
+		days = HISTORY_PERIODS[self.__boxPeriod.currentText()]
+		since = time() - days * 86400 if days is not None else None
+		serial = self.__lineSerial.text().strip() or None
+		model = self.__lineModel.text().strip() or None
+		outcome = self.__boxOutcome.currentText() if self.__boxOutcome.currentText() in RESULTS_OUTCOMES else None
+		self.__runs = self.__database.findRuns(serial, model, outcome, since)
+		matches = self.__database.countRuns(serial, model, outcome, since)
+		self.__labelMatches.setText(f"{matches} matching runs" + \
+									(f" (showing the newest {len(self.__runs)})" if matches > len(self.__runs) else ""))
+		rates = self.__database.failureRates(since)
+		self.__labelFailureRates.setText("Failure Rate: " + (" | ".join(f"{model or '(unknown)'}: {rate:.1%} " + \
+										f"({failures} of {runs})" for model, runs, failures, rate in rates) or "no runs"))
+		self.__tableRuns.clearSelection()
+		self.__tableRuns.setRowCount(len(self.__runs))
+		for row, run in enumerate(self.__runs):
+			lossPercent = run["lossPercent"]
+			values = [str(run["id"]), datetime.fromtimestamp(run["startTime"]).strftime("%Y-%m-%d %H:%M:%S"), \
+						run["model"], run["serial"], run["outcome"], str(run["samples"]), \
+						"-" if lossPercent is None else f"{lossPercent:.2f}%", run["capture"]]
+			for column, value in enumerate(values):
+				self.__tableRuns.setItem(row, column, QTableWidgetItem(value))
+		self.__textDetails.clear()
+
+	def __tableRunsSelectionChanged(self):
+		row = self.__tableRuns.currentRow()
+		if self.__database is None or row < 0 or row >= len(self.__runs):
+			return
+		run = self.__runs[row]["id"]
+		lines = [f"{channel}: {minimum}-{maximum} (Average={round(mean, 3)}, SD={stdDev:.3f})" for \
+					channel, minimum, maximum, mean, stdDev in self.__database.getChannelStats(run)]
+		lines.append(json.dumps(self.__database.getResults(run), indent=2))
+		self.__textDetails.setPlainText("\n".join(lines))
@@ -0,0 +1,115 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+
+from Config import *
+########################################
+
+# Pass/fail limit rules, evaluated on each datagram's samples as they arrive, so a failure is flagged at the sample
+# where it happens (and the test can be aborted early; see LIMIT_EARLY_ABORT). Rules are configured per channel in
+# LIMIT_RULES as dictionaries with a "channel" (by name; see ChannelSchema) and a "type":
+#   bounds	Fails as soon as a sample is below "min" or above "max" (either may be left out)
+#   rate	Fails as soon as a channel changes faster than "max" units per second between consecutive samples
+#			(TIME only has millisecond resolution, so samples less than 1 ms apart are treated as 1 ms apart)
+#   outside	Fails once the channel has spent more than "time" ms (in total) below "min" or above "max", with each
+#			out-of-range sample counted as one sample interval
+# Each rule fails at most once (at its first failure), but all violating samples are counted.
+class LimitChecker:
+	def __init__(self, interval, channels, rules=LIMIT_RULES):
+		self.__interval = interval	# Milliseconds
+		self.__rules = []
+		for rule in rules:
+			if rule.get("channel") not in channels:
+				raise ValueError(f"Limit rule channel must be one of {', '.join(channels)}: {rule}")
+			if rule.get("type") not in ("bounds", "rate", "outside"):
+				raise ValueError(f"Limit rule type must be bounds, rate or outside: {rule}")
+			self.__rules.append({
+				"rule": dict(rule),
+				"index": list(channels).index(rule["channel"]),
+				"violations": 0,	# Samples
+				"outside": 0,		# Milliseconds out of range ("outside" rules)
+				"last": None,		# (timestamp, value) of the previous sample ("rate" rules)
+				"failure": None		# {"time", "value", "message"} of the first failure
+			})
+
+	def hasRules(self):
+		return len(self.__rules) > 0
+
+	# Whether every rule has passed so far (None if there are no rules)
+	def isPassed(self):
+		if not self.__rules:
+			return None
+		return all(state["failure"] is None for state in self.__rules)
+
+	# `timestamps` and each of `channels` are equal-length arrays of new samples.
+	# Returns the failures (as in `getReport`) of rules that failed for the first time in these samples.
+	def check(self, timestamps, channels):
+		if len(timestamps) == 0:
+			return []
+		failures = []
+		for state in self.__rules:
+			rule = state["rule"]
+			times, values = timestamps, channels[state["index"]]
+			if rule["type"] == "bounds":
+				violating = self.__outOfRange(rule, values)
+				failing = violating
+			elif rule["type"] == "rate":
+				previous = state["last"]
+				state["last"] = (int(times[-1]), int(values[-1]))
+				if previous is None:	# The first sample of the test has no rate
+					previous = (int(times[0]), int(values[0]))
+					times, values = times[1:], values[1:]
+				rates = numpy.abs(numpy.diff(values.astype(numpy.int64), prepend=previous[1])) * 1000 / \
+						numpy.maximum(numpy.diff(times.astype(numpy.int64), prepend=previous[0]), 1)	# Units per second
+				violating = rates > rule["max"]
+				failing = violating
+			else:
+				violating = self.__outOfRange(rule, values)
+				outside = state["outside"] + numpy.cumsum(violating) * self.__interval
+				state["outside"] = int(outside[-1])
+				failing = outside > rule["time"]
+			state["violations"] += int(numpy.count_nonzero(violating))
+			if state["failure"] is None and failing.any():
+				first = int(numpy.argmax(failing))
+				state["failure"] = {
+					"time": int(times[first]),
+					"value": int(values[first]),
+					"message": f"{self.describe(rule)} failed at {int(times[first])} ms (value {int(values[first])})"
+				}
+				failures.append(state["failure"])
+		return failures
+
+	def __outOfRange(self, rule, values):
+		violating = numpy.zeros(len(values), dtype=bool)
+		if rule.get("min") is not None:
+			violating |= values < rule["min"]
+		if rule.get("max") is not None:
+			violating |= values > rule["max"]
+		return violating
+
+	@staticmethod
+	def describe(rule):
+		if rule["type"] == "rate":
+			return f"{rule['channel']} rate <= {rule['max']}/s"
+		bounds = f"{rule['channel']} {rule.get('min', '-inf')}..{rule.get('max', 'inf')}"
+		return bounds if rule["type"] == "bounds" else f"{bounds} (outside <= {rule['time']} ms)"
+
+	def getReport(self):
+		return {
+			"passed": self.isPassed(),
+			"rules": [{
+				"rule": state["rule"],
+				"violations": state["violations"],
+				"failure": state["failure"]
+			} for state in self.__rules]
+		}
+
+	# Human-readable summary for the test log
+	def getReportLines(self):
+		if not self.__rules:
+			return ["Limits: none configured"]
+		lines = [f"Limits: {'PASS' if self.isPassed() else 'FAIL'}"]
+		for state in self.__rules:
+			result = state["failure"]["message"] if state["failure"] is not None else f"{self.describe(state['rule'])} passed"
+			lines.append(f"{result} ({state['violations']} violating samples)")
+		return lines
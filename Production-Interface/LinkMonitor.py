@@ -0,0 +1,167 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+
+from Config import *
+########################################
+
+# Link-quality telemetry for the STATUS stream of one test.
+# Each STATUS datagram carries the sequence number of its first sample (see SEQ= in the START command), so missing,
+# duplicated and reordered samples can be detected: gaps are kept as [start, end) ranges of sequence numbers and are
+# filled in again if the missing samples arrive late. Sequence numbers are uint32 on the wire, so each is taken as the
+# one (modulo 2^32) nearest the next sequence number expected, and counting carries on past 2^32 samples.
+# Latency (arrival time minus the sample's TIME, measured from the arrival of STARTED) and jitter (change in that
+# latency between consecutive datagrams) are counted into fixed log-spaced histograms, so memory use doesn't grow with
+# the test duration. Percentiles are reported as the upper edge of the histogram bin they fall in.
+# Devices that don't send sequence numbers still get latency and jitter, but loss is reported as unknown.
+class LinkMonitor:
+	__sequenceRange = 2 ** 32
+
+	def __init__(self, interval):
+		self.__interval = interval	# Milliseconds
+		self.__edges = numpy.geomspace(LINK_HISTOGRAM_MIN, LINK_HISTOGRAM_MAX, LINK_HISTOGRAM_BINS + 1)	# Milliseconds
+		self.__latencyCounts = numpy.zeros(LINK_HISTOGRAM_BINS, dtype=numpy.int64)
+		self.__jitterCounts = numpy.zeros(LINK_HISTOGRAM_BINS, dtype=numpy.int64)
+		self.__started = None		# Arrival time of STARTED (seconds, on the caller's clock)
+		self.__lastTransit = None	# Seconds
+		self.__sequenced = False
+		self.__expected = 0			# Next sequence number expected
+		self.__received = 0			# Samples (excluding duplicates)
+		self.__gaps = []			# [start, end) ranges of missing sequence numbers, in order
+		self.__reordered = 0		# Datagrams that arrived after a later one
+		self.__duplicates = 0		# Samples
+		self.__datagrams = 0
+
+	def start(self, arrival):
+		self.__started = arrival
+
+	# `sequence` is the sequence number of the first of the datagram's `count` samples (None if not sequenced),
+	# `timestamp` is the TIME (ms) of its last sample, and `arrival` is when it was received (seconds)
+	def observe(self, sequence, count, timestamp, arrival):
+		self.__datagrams += 1
+		if self.__started is not None:
+			transit = arrival - self.__started - timestamp / 1000
+			self.__count(self.__latencyCounts, transit * 1000)
+			if self.__lastTransit is not None:
+				self.__count(self.__jitterCounts, abs(transit - self.__lastTransit) * 1000)
+			self.__lastTransit = transit
+		if sequence is None:
+			self.__received += count
+			return
+		self.__sequenced = True
+		sequence = self.__unwrap(sequence)
+		end = sequence + count
+		if sequence >= self.__expected:
+			if sequence > self.__expected:
+				self.__gaps.append([self.__expected, sequence])
+			self.__expected = end
+			self.__received += count
+		else:
+			filled = self.__fill(sequence, min(end, self.__expected))
+			self.__received += filled + max(end - self.__expected, 0)
+			self.__duplicates += min(end, self.__expected) - sequence - filled
+			if filled:
+				self.__reordered += 1
+			self.__expected = max(self.__expected, end)
+
+	# Called with the number of samples the device reports having sent (if it does), so that samples lost at the
+	# end of the test are also counted
+	def finish(self, sent=None):
+		if sent is None or not self.__sequenced:
+			return
+		sent = self.__unwrap(sent)
+		if sent > self.__expected:
+			self.__gaps.append([self.__expected, sent])
+			self.__expected = sent
+
+	def __unwrap(self, sequence):
+		half = LinkMonitor.__sequenceRange // 2
+		return self.__expected + (sequence - self.__expected + half) % LinkMonitor.__sequenceRange - half
+
+	# Removes [start, end) from the gaps, returning the number of missing samples that were filled
+	def __fill(self, start, end):
+		filled = 0
+		gaps = []
+		for gapStart, gapEnd in self.__gaps:
+			overlapStart, overlapEnd = max(gapStart, start), min(gapEnd, end)
+			if overlapStart >= overlapEnd:
+				gaps.append([gapStart, gapEnd])
+				continue
+			filled += overlapEnd - overlapStart
+			if gapStart < overlapStart:
+				gaps.append([gapStart, overlapStart])
+			if overlapEnd < gapEnd:
+				gaps.append([overlapEnd, gapEnd])
+		self.__gaps = gaps
+		return filled
+
+	def __count(self, counts, value):
+		index = numpy.searchsorted(self.__edges, value, side="right") - 1
+		counts[min(max(index, 0), LINK_HISTOGRAM_BINS - 1)] += 1	# Out-of-range values go in the end bins
+
+	def __percentile(self, counts, fraction):
+		total = counts.sum()
+		if total == 0:
+			return 0.0
+		index = int(numpy.searchsorted(numpy.cumsum(counts), fraction * total))
+		return float(self.__edges[index + 1])
+
+	# Latency (ms) of the most recent datagram, or None before the first one
+	def getLatency(self):
+		return self.__lastTransit * 1000 if self.__lastTransit is not None else None
+
+	def isSequenced(self):
+		return self.__sequenced
+
+	def getLost(self):
+		return sum(end - start for start, end in self.__gaps)
+
+	# Percentage of samples lost, or None if the device doesn't send sequence numbers
+	def getLossPercent(self):
+		if not self.__sequenced:
+			return None
+		return 100 * self.getLost() / self.__expected if self.__expected else 0.0
+
+	# Whether the test data is complete enough to be trusted (None if unknown)
+	def isValid(self):
+		lossPercent = self.getLossPercent()
+		return None if lossPercent is None else lossPercent <= LINK_LOSS_LIMIT
+
+	def getReport(self):
+		longestGap = max((end - start for start, end in self.__gaps), default=0)
+		return {
+			"sequenced": self.__sequenced,
+			"valid": self.isValid(),
+			"datagrams": self.__datagrams,
+			"expected": self.__expected if self.__sequenced else None,
+			"received": self.__received,
+			"lost": self.getLost() if self.__sequenced else None,
+			"lossPercent": self.getLossPercent(),
+			"gaps": len(self.__gaps),
+			"longestGap": longestGap,							# Samples
+			"longestGapTime": longestGap * self.__interval,		# Milliseconds
+			"reordered": self.__reordered,
+			"duplicates": self.__duplicates,
+			"latency": {"p50": self.__percentile(self.__latencyCounts, 0.5), "p99": self.__percentile(self.__latencyCounts, 0.99)},
+			"jitter": {"p50": self.__percentile(self.__jitterCounts, 0.5), "p99": self.__percentile(self.__jitterCounts, 0.99)},
+			"histograms": {
+				"edges": self.__edges.tolist(),	# Milliseconds
+				"latency": self.__latencyCounts.tolist(),
+				"jitter": self.__jitterCounts.tolist()
+			}
+		}
+
+	# Human-readable summary for the test log
+	def getReportLines(self):
+		report = self.getReport()
+		if report["sequenced"]:
+			lines = [f"Samples Lost: {report['lost']} of {report['expected']} ({report['lossPercent']:.3f}%)",
+						f"Longest Gap: {report['longestGap']} samples ({report['longestGapTime']} ms) | " + \
+						f"Reordered: {report['reordered']} | Duplicates: {report['duplicates']}"]
+		else:
+			lines = ["Samples Lost: unknown (device doesn't send sequence numbers)"]
+		lines.append(f"Latency (ms): p50<={report['latency']['p50']:.3g} p99<={report['latency']['p99']:.3g} | " + \
+						f"Jitter (ms): p50<={report['jitter']['p50']:.3g} p99<={report['jitter']['p99']:.3g}")
+		if report["valid"] is False:
+			lines.append(f"WARNING: More than {LINK_LOSS_LIMIT}% of samples were lost - the test data is incomplete")
+		return lines
@@ -0,0 +1,195 @@
+########################################
+# ***** IMPORTS *****
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy
+
+from Config import *
+from SessionManager import SessionManager
+from TestSession import TestSession
+
+try:
+	import resource	# Unix only
+except ImportError:
+	resource = None
+########################################
+
+# End-to-end throughput benchmark of the interface over loopback.
+# Each run starts a StandInDevice in a separate process and tests it with the same SessionManager/TestSession engine
+# as the GUI and HeadlessRunner, sweeping sample intervals, burst sizes and test durations. Each run reports:
+#   sustainedRate	Samples received per second, from STARTED to the last sample
+#   dropRate		Fraction of the samples sent by the stand-in (SENT= in its STOPPED message) that were not received
+#   latency			Percentiles (ms) of arrival time minus the sample's TIME, measured from STARTED. TIME only has
+#					millisecond resolution, so this mostly shows batching delay and queueing under load (and bursts are
+#					generated ahead of their TIME, so can show negative latencies).
+#   cpu/memory		Interface process only (the stand-in runs in its own process)
+# Results are written as JSON; with --baseline, runs slower than the baseline by more than BENCHMARK_TOLERANCE are
+# reported as regressions and the exit code is 1.
+#
+# Usage (from the Production-Interface directory):
+#   python3 LoopbackBenchmark.py [--intervals 1000,250] [--bursts 1,16] [--durations 2] [--output results.json]
+#   python3 LoopbackBenchmark.py --baseline previous.json
+
+def freePort():
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+		probe.bind(("127.0.0.1", 0))
+		return probe.getsockname()[1]
+
+def startStandIn(port, interval, burst):
+	path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "StandInDevice.py")
+	process = subprocess.Popen([sys.executable, path, "--port", str(port), "--interval-us", str(interval), \
+								"--burst", str(burst)], stdout=subprocess.PIPE, text=True)
+	process.stdout.readline()	# "READY ..." once the socket is bound
+	return process
+
+def memoryUsage():
+	try:
+		with open("/proc/self/statm") as file:
+			return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024	# Resident set (KiB)
+	except (OSError, ValueError, AttributeError):
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0
+
+def cpuTime():
+	if resource is None:
+		return time.process_time()
+	usage = resource.getrusage(resource.RUSAGE_SELF)
+	return usage.ru_utime + usage.ru_stime
+
+# Wraps the session's datagram handler to timestamp every sample on arrival, without changing the engine itself
+def instrument(session, measurements):
+	process = session.processDatagram
+	def processDatagram(data):
+		arrival = time.perf_counter()
+		before = session.getSampleCount()
+		process(data)
+		added = session.getSampleCount() - before
+		if measurements["started"] is None and session.getState() == SESSION_RUNNING:
+			measurements["started"] = arrival
+		if added:
+			store = session.getStore()
+			timestamps = store.timestamps(len(store) - added)
+			measurements["latencies"].append(arrival - measurements["started"] - timestamps / 1000)
+			measurements["lastArrival"] = arrival
+		elif bytes(data).startswith(bytes(MSG_FULL_STOPPED, "utf-8")):	# `data` may be a memoryview
+			for field in str(data, "utf-8").split(MSG_DELIMITER):
+				if field.startswith("SENT="):
+					measurements["sent"] = int(field[5:])
+	session.processDatagram = processDatagram
+
+def runBenchmark(interval, burst, duration):
+	devicePort, interfacePort = freePort(), freePort()
+	standIn = startStandIn(devicePort, interval, burst)
+	session = TestSession("127.0.0.1", devicePort, duration * 1000, max(interval // 1000, 1), log=lambda text: None)
+	measurements = {"started": None, "lastArrival": None, "latencies": [], "sent": 0}
+	instrument(session, measurements)
+	manager = SessionManager(interfacePort)
+	manager.addSession(session)
+	watchdog = threading.Timer(duration + BENCHMARK_TIMEOUT, manager.cancel)
+	watchdog.start()
+	memoryBefore = memoryUsage()
+	cpuBefore, wallBefore = cpuTime(), time.perf_counter()
+	try:
+		manager.run()
+	finally:
+		cpuUsed, wallUsed = cpuTime() - cpuBefore, time.perf_counter() - wallBefore
+		watchdog.cancel()
+		standIn.terminate()
+		standIn.wait()
+	received = session.getSampleCount()
+	span = (measurements["lastArrival"] or 0) - (measurements["started"] or 0)
+	latencies = numpy.concatenate(measurements["latencies"]) * 1000 if measurements["latencies"] else numpy.zeros(1)
+	return {
+		"interval": interval,
+		"burst": burst,
+		"duration": duration,
+		"state": session.getState(),
+		"offeredRate": 1e6 / interval,
+		"sent": measurements["sent"],
+		"received": received,
+		"sustainedRate": received / span if span > 0 else 0.0,
+		"dropRate": 1 - received / measurements["sent"] if measurements["sent"] else 0.0,
+		"latency": {f"p{percentile}": float(value) for percentile, value in \
+						zip((50, 90, 99), numpy.percentile(latencies, (50, 90, 99)))} | {"max": float(latencies.max())},
+		"cpuPercent": 100 * cpuUsed / wallUsed,
+		"memoryKiB": memoryUsage(),
+		"memoryGrowthKiB": memoryUsage() - memoryBefore
+	}
+
+def parseList(text):
+	return [int(value) for value in text.split(",")]
+
+def parseArguments(arguments):
+	parser = argparse.ArgumentParser(prog="LoopbackBenchmark", description="Measure interface throughput over loopback")
+	parser.add_argument("--intervals", type=parseList, default=BENCHMARK_INTERVALS, help="Sample intervals (microseconds)")
+	parser.add_argument("--bursts", type=parseList, default=BENCHMARK_BURSTS, help="Samples per burst")
+	parser.add_argument("--durations", type=parseList, default=BENCHMARK_DURATIONS, help="Test durations (seconds)")
+	parser.add_argument("--output", default=BENCHMARK_OUTPUT, help="JSON results file")
+	parser.add_argument("--baseline", help="JSON results of a previous benchmark to compare against")
+	return parser.parse_args(arguments)
+
+# Returns a description of every run that's slower (or drops more) than the matching run in the baseline
+def findRegressions(runs, baseline):
+	key = lambda run: (run["interval"], run["burst"], run["duration"])
+	previous = {key(run): run for run in baseline["runs"]}
+	regressions = []
+	for run in runs:
+		old = previous.get(key(run))
+		if old is None:
+			continue
+		if run["sustainedRate"] < old["sustainedRate"] * (1 - BENCHMARK_TOLERANCE):
+			regressions.append(f"{key(run)}: sustained rate {old['sustainedRate']:.0f} -> {run['sustainedRate']:.0f} samples/s")
+		if run["dropRate"] > old["dropRate"] + BENCHMARK_TOLERANCE:
+			regressions.append(f"{key(run)}: drop rate {old['dropRate']:.1%} -> {run['dropRate']:.1%}")
+	return regressions
+
+def main(arguments):
+	options = parseArguments(arguments)
+	workingDirectory = os.getcwd()
+	os.chdir(tempfile.mkdtemp())	# Capture files are written relative to the working directory
+	runs = []
+	try:
+		for duration in options.durations:
+			for interval in options.intervals:
+				for burst in options.bursts:
+					run = runBenchmark(interval, burst, duration)
+					runs.append(run)
+					print(f"interval={interval:>6}us burst={burst:>3} duration={duration:>3}s: " + \
+							f"{run['sustainedRate']:>9.0f} samples/s, drop {run['dropRate']:>6.1%}, " + \
+							f"latency p50/p99 {run['latency']['p50']:.2f}/{run['latency']['p99']:.2f} ms, " + \
+							f"CPU {run['cpuPercent']:.0f}%, RSS {run['memoryKiB'] // 1024} MiB")
+	finally:
+		temporaryDirectory = os.getcwd()
+		os.chdir(workingDirectory)
+		shutil.rmtree(temporaryDirectory, ignore_errors=True)
+	results = {
+		"timestamp": time.time(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"statusFormat": STATUS_FORMAT,
+		"batchSize": STATUS_BATCH_SIZE,
+		"batchWindow": STATUS_BATCH_WINDOW,
+		"runs": runs
+	}
+	with open(options.output, "w") as file:
+		json.dump(results, file, indent=2)
+	if options.baseline:
+		with open(options.baseline) as file:
+			regressions = findRegressions(runs, json.load(file))
+		for regression in regressions:
+			print(f"REGRESSION {regression}")
+		return 1 if regressions else 0
+	return 0
+
+# ***** EXECUTION *****
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
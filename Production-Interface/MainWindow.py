@@ -15,6 +15,7 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+import os
 import socket
 from datetime import datetime
 from sys import argv
@@ -24,6 +25,7 @@ from threading import Thread
 
 from Config import *
 from DataCanvas import DataCanvas
+from HistoryDialog import HistoryDialog
 from TestExecutionWorker import TestExecutionWorker
 ########################################
 
@@ -39,13 +41,21 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__widget.setMinimumSize(1300, 600)
 		
 		# DATA
-		self.__timestamps = []
-		self.__mvData = []
-		self.__maData = []
+		self.__devices = []	# (IP address, port number) per device under test
+		# Whether the device grid is showing something other than `__devices`: replayed recordings, or a device tested
+		# without being added
+		self.__gridDetached = False
 		
 		# COMPONENTS
 		self.__buttonStartTest = QPushButton(text="Start")
 		self.__buttonCancelTest = QPushButton(text="Cancel")
+		self.__buttonAddDevice = QPushButton(text="Add Device")
+		self.__buttonRemoveDevice = QPushButton(text="Remove Device")
+		self.__buttonHistory = QPushButton(text="Test History")
+		self.__buttonReplay = QPushButton(text="Replay...")
+		self.__boxReplaySpeed = QComboBox()
+		self.__boxReplaySpeed.addItems(list(REPLAY_SPEEDS))
+		self.__boxReplaySpeed.setToolTip("Replay speed (multiple of real time)")
 		self.__checkGenerateFile = QCheckBox("Generate File")
 		self.__labelIPDevice = QLabel(text="IP Address (Device):")
 		self.__labelPortDevice = QLabel(text="Port Number (Device):")
@@ -53,7 +63,7 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__labelDuration = QLabel(text="Test Duration (secs):")
 		self.__labelInterval = QLabel(text="Test Interval (millisecs):")
 		self.__labelFormat = QLabel(text="Output File Format:")
-		self.__labelDisplayCount = QLabel(text="Live Display Scale:")
+		self.__labelDisplayScale = QLabel(text="Live Display Scale:")
 		self.__lineIPDevice = QLineEdit()
 		self.__lineIPDevice.setValidator(QRegExpValidator(self.__IPDeviceRegex))
 		self.__linePortDevice = QLineEdit()
@@ -68,15 +78,15 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__lineInterval.setValidator(QIntValidator(bottom=MIN_INTERVAL, top=MAX_INTERVAL))
 		self.__lineInterval.setPlaceholderText(f"{MIN_INTERVAL} - {MAX_INTERVAL}")
 		self.__boxFormat = QComboBox()
-		self.__boxFormat.addItems(OUTPUT_FORMATS)
-		self.__sliderDisplayCount = QSlider(Qt.Horizontal)
-		self.__sliderDisplayCount.setTickPosition(QSlider.TicksBothSides)
-		self.__sliderDisplayCount.setTickInterval(10)
-		self.__sliderDisplayCount.setSingleStep(10)
-		self.__sliderDisplayCount.setRange(10, 100)
-		self.__sliderDisplayCount.setValue(50)
-		self.__labelDisplayCountMin = QLabel(text="Small")
-		self.__labelDisplayCountMax = QLabel(text="Large")
+		self.__boxFormat.addItems(OUTPUT_FORMATS + [ALL_FORMATS])
+		self.__sliderDisplayScale = QSlider(Qt.Horizontal)
+		self.__sliderDisplayScale.setTickPosition(QSlider.TicksBothSides)
+		self.__sliderDisplayScale.setTickInterval(LIVE_DISPLAY_STEPS // 10)
+		self.__sliderDisplayScale.setSingleStep(1)
+		self.__sliderDisplayScale.setRange(0, LIVE_DISPLAY_STEPS)	# Logarithmic (see `TestExecutionWorker.getDisplaySpan`)
+		self.__sliderDisplayScale.setValue(LIVE_DISPLAY_STEPS // 2)
+		self.__labelDisplayScaleMin = QLabel(text="Last Second")
+		self.__labelDisplayScaleMax = QLabel(text="Whole Test")
 		self.__buttonOutputLocation = QPushButton(text="Output Location:")
 		self.__lineOutputLocation = QLineEdit()
 		self.__lineOutputLocation.setReadOnly(True)
@@ -85,36 +95,68 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__textOutput.setReadOnly(True)
 		self.__textOutput.setStyleSheet("background-color: rgb(224,224,224);")
 		self.__canvas = DataCanvas(self)
+		self.__tableDevices = QTableWidget(0, len(DEVICE_GRID_COLUMNS))
+		self.__tableDevices.setHorizontalHeaderLabels(DEVICE_GRID_COLUMNS)
+		self.__tableDevices.horizontalHeader().setStretchLastSection(True)
+		self.__tableDevices.setSelectionBehavior(QAbstractItemView.SelectRows)
+		self.__tableDevices.setSelectionMode(QAbstractItemView.SingleSelection)
+		self.__tableDevices.setEditTriggers(QAbstractItemView.NoEditTriggers)
+		self.__labelPerformance = QLabel(text="Performance:")
+		self.__tablePerformance = QTableWidget(0, len(PROFILE_COLUMNS))
+		self.__tablePerformance.setHorizontalHeaderLabels(PROFILE_COLUMNS)
+		self.__tablePerformance.horizontalHeader().setStretchLastSection(True)
+		self.__tablePerformance.verticalHeader().setVisible(False)
+		self.__tablePerformance.setEditTriggers(QAbstractItemView.NoEditTriggers)
+		self.__tablePerformance.setMaximumHeight(180)
+		self.__labelPerformance.setVisible(PROFILE_ENABLED)
+		self.__tablePerformance.setVisible(PROFILE_ENABLED)
+		self.__gridTimer = QTimer(self)
+		self.__gridTimer.setInterval(SESSION_GRID_INTERVAL)
+		self.__historyDialog = HistoryDialog(self.__widget)
 		
 		# LAYOUT
 		self.__layout.addWidget(self.__buttonStartTest,	 		0, 0, 1, 1)
 		self.__layout.addWidget(self.__buttonCancelTest, 		1, 0, 1, 1)
+		self.__layout.addWidget(self.__buttonAddDevice, 		2, 0, 1, 1)
+		self.__layout.addWidget(self.__buttonRemoveDevice, 		3, 0, 1, 1)
+		self.__layout.addWidget(self.__buttonReplay,	 		4, 0, 1, 1)
+		self.__layout.addWidget(self.__boxReplaySpeed,	 		5, 0, 1, 1)
 		self.__layout.addWidget(self.__labelIPDevice,			0, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__labelPortDevice, 		1, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__labelPortInterface, 		2, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__labelDuration,	 		3, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__labelInterval,	 		4, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__labelFormat,	 			5, 1, 1, 2, alignment=Qt.AlignRight)
-		self.__layout.addWidget(self.__labelDisplayCount,	 	6, 1, 1, 2, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__labelDisplayScale,	 	6, 1, 1, 2, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__lineIPDevice, 			0, 3, 1, 2)
 		self.__layout.addWidget(self.__linePortDevice,		 	1, 3, 1, 2)
 		self.__layout.addWidget(self.__linePortInterface,		2, 3, 1, 2)
 		self.__layout.addWidget(self.__lineDuration,	 		3, 3, 1, 2)
 		self.__layout.addWidget(self.__lineInterval,	 		4, 3, 1, 2)
 		self.__layout.addWidget(self.__boxFormat,	 			5, 3, 1, 2)
-		self.__layout.addWidget(self.__sliderDisplayCount,	 	6, 3, 1, 2)
-		self.__layout.addWidget(self.__labelDisplayCountMin,	7, 3, 1, 1, alignment=Qt.AlignLeft)
-		self.__layout.addWidget(self.__labelDisplayCountMax,	7, 4, 1, 1, alignment=Qt.AlignRight)
+		self.__layout.addWidget(self.__sliderDisplayScale,	 	6, 3, 1, 2)
+		self.__layout.addWidget(self.__labelDisplayScaleMin,	7, 3, 1, 1, alignment=Qt.AlignLeft)
+		self.__layout.addWidget(self.__labelDisplayScaleMax,	7, 4, 1, 1, alignment=Qt.AlignRight)
 		self.__layout.addWidget(self.__checkGenerateFile,		8, 0, 1, 1)
+		self.__layout.addWidget(self.__buttonHistory,			8, 4, 1, 1)
 		self.__layout.addWidget(self.__buttonOutputLocation,	9, 0, 1, 1)
 		self.__layout.addWidget(self.__lineOutputLocation,		9, 1, 1, 4)
 		self.__layout.addWidget(self.__labelInfo, 	 			10, 0, 1, 2)
 		self.__layout.addWidget(self.__textOutput,		 		11, 0, 1, 5)
 		self.__layout.addWidget(self.__canvas,					0, 5, 12, 1)
+		self.__layout.addWidget(self.__tableDevices,			12, 0, 1, 6)
+		self.__layout.addWidget(self.__labelPerformance,		13, 0, 1, 6)
+		self.__layout.addWidget(self.__tablePerformance,		14, 0, 1, 6)
 		
 		# ACTIONS
 		self.__buttonStartTest.clicked.connect(self.__buttonStartTestClick)
 		self.__buttonCancelTest.clicked.connect(self.__buttonCancelTestClick)
+		self.__buttonAddDevice.clicked.connect(self.__buttonAddDeviceClick)
+		self.__buttonRemoveDevice.clicked.connect(self.__buttonRemoveDeviceClick)
+		self.__buttonHistory.clicked.connect(self.__buttonHistoryClick)
+		self.__buttonReplay.clicked.connect(self.__buttonReplayClick)
+		self.__tableDevices.itemSelectionChanged.connect(self.__tableDevicesSelectionChanged)
+		self.__gridTimer.timeout.connect(self.__refreshDeviceGrid)
 		self.__checkGenerateFile.toggled.connect(self.__checkGenerateFileToggle)
 		self.__lineIPDevice.textChanged.connect(self.__lineIPDeviceChanged)
 		self.__linePortDevice.textChanged.connect(self.__linePortDeviceChanged)
@@ -122,7 +164,7 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__lineDuration.textChanged.connect(self.__lineDurationChanged)
 		self.__lineInterval.textChanged.connect(self.__lineIntervalChanged)
 		self.__boxFormat.currentIndexChanged.connect(self.__boxFormatChanged)
-		self.__sliderDisplayCount.valueChanged.connect(self.__sliderDisplayCountChanged)
+		self.__sliderDisplayScale.valueChanged.connect(self.__sliderDisplayScaleChanged)
 		self.__lineOutputLocation.textChanged.connect(self.__lineOutputLocationChanged)
 		self.__buttonOutputLocation.clicked.connect(self.__buttonOutputLocationClick)
 		
@@ -138,18 +180,26 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__worker.finished.connect(self.__thread.quit)
 		self.__worker.progress.connect(self.__printOut)
 		self.__thread.finished.connect(self.__endTest)
+		self.__worker.setLiveViewProfiler(self.__canvas.getProfiler)
 
 	# Used to provide additional validation of integer fields, as QIntValidator doesn't limit upper values correctly
 	def __manualFieldValidation(self):
-		return int(self.__linePortDevice.text()) >= MIN_PORT and int(self.__linePortDevice.text()) <= MAX_PORT and \
-			int(self.__linePortInterface.text()) >= MIN_PORT and int(self.__linePortInterface.text()) <= MAX_PORT and \
+		return int(self.__linePortInterface.text()) >= MIN_PORT and int(self.__linePortInterface.text()) <= MAX_PORT and \
 			int(self.__lineInterval.text()) >= MIN_INTERVAL and int(self.__lineInterval.text()) <= MAX_INTERVAL and \
 			int(self.__lineDuration.text()) >= 1
 
+	def __deviceFieldValidation(self):
+		return self.__IPDeviceRegex.exactMatch(self.__lineIPDevice.text()) and self.__linePortDevice.text() != "" and \
+			int(self.__linePortDevice.text()) >= MIN_PORT and int(self.__linePortDevice.text()) <= MAX_PORT
+
 	def __guiRefresh(self):
 		if self.__guiTestRunning:
 			self.__buttonStartTest.setDisabled(True)
 			self.__buttonCancelTest.setDisabled(False)
+			self.__buttonAddDevice.setDisabled(True)
+			self.__buttonRemoveDevice.setDisabled(True)
+			self.__buttonReplay.setDisabled(True)
+			self.__boxReplaySpeed.setDisabled(True)
 			self.__checkGenerateFile.setDisabled(True)
 			self.__lineIPDevice.setDisabled(True)
 			self.__linePortDevice.setDisabled(True)
@@ -157,11 +207,14 @@ class MainWindow(QtWidgets.QMainWindow):
 			self.__lineDuration.setDisabled(True)
 			self.__lineInterval.setDisabled(True)
 			self.__boxFormat.setDisabled(True)
-			self.__sliderDisplayCount.setDisabled(True)
 			self.__buttonOutputLocation.setDisabled(True)
 			self.__lineOutputLocation.setDisabled(True)
 		else:
 			self.__buttonCancelTest.setDisabled(True)
+			self.__buttonAddDevice.setDisabled(not self.__deviceFieldValidation())
+			self.__buttonRemoveDevice.setDisabled(len(self.__tableDevices.selectedItems()) == 0 or self.__gridDetached)
+			self.__buttonReplay.setDisabled(False)
+			self.__boxReplaySpeed.setDisabled(False)
 			self.__checkGenerateFile.setDisabled(False)
 			self.__lineIPDevice.setDisabled(False)
 			self.__linePortDevice.setDisabled(False)
@@ -169,8 +222,7 @@ class MainWindow(QtWidgets.QMainWindow):
 			self.__lineDuration.setDisabled(False)
 			self.__lineInterval.setDisabled(False)
 			self.__boxFormat.setDisabled(False)
-			self.__sliderDisplayCount.setDisabled(False)
-			if self.__IPDeviceRegex.exactMatch(self.__lineIPDevice.text()) and self.__linePortDevice.text() != "" and \
+			if (len(self.__devices) > 0 or self.__deviceFieldValidation()) and \
 					self.__linePortInterface.text() != "" and self.__lineDuration.text() != "" and \
 					self.__lineInterval.text() != "" and self.__manualFieldValidation() == True and \
 					(not self.__checkGenerateFile.isChecked() or \
@@ -195,27 +247,151 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.__guiTestRunning = True
 		self.__textOutput.clear()
 		self.__guiRefresh()
+		self.__canvas.startLiveView(self.__selectedDeviceWindow, self.__selectedDeviceSchema)
 
 	def __endTest(self):
+		self.__gridTimer.stop()
+		self.__refreshDeviceGrid()
+		self.__canvas.stopLiveView()
 		self.__guiTestRunning = False
 		self.__guiRefresh()
+
+	def __addDevice(self, IPDevice, portDevice):
+		if self.__gridDetached:	# Replaced by the devices to test
+			self.__tableDevices.setRowCount(0)
+			self.__gridDetached = False
+		if (IPDevice, portDevice) in self.__devices:
+			self.__printOut(f"ERROR: Device {IPDevice}:{portDevice} has already been added")
+			return
+		self.__devices.append((IPDevice, portDevice))
+		self.__insertDeviceRow(IPDevice, portDevice)
+
+	def __insertDeviceRow(self, IPDevice, portDevice):
+		row = self.__tableDevices.rowCount()
+		self.__tableDevices.insertRow(row)
+		for column in range(len(DEVICE_GRID_COLUMNS)):
+			self.__tableDevices.setItem(row, column, QTableWidgetItem(""))
+		self.__tableDevices.item(row, 0).setText(f"{IPDevice}:{portDevice}")
+		self.__tableDevices.item(row, 1).setText(f"{IPDevice}:{portDevice}")
+		self.__tableDevices.item(row, 2).setText(SESSION_IDLE)
+
+	# Pulls the state of each session from the worker (see `TestExecutionWorker.getSessions`)
+	def __refreshDeviceGrid(self):
+		for row, session in enumerate(self.__worker.getSessions()):
+			if row >= self.__tableDevices.rowCount():
+				break
+			summary = " | ".join(f"{label}: {minimum}-{maximum} (Average={round(average, 3)})" for label, \
+									(minimum, maximum, average) in zip(session.getSchema().getLabels(), session.getSummary()))
+			self.__tableDevices.item(row, 0).setText(session.getDeviceName())
+			self.__tableDevices.item(row, 2).setText(session.getState())
+			self.__tableDevices.item(row, 3).setText(str(session.getSampleCount()))
+			lossPercent = session.getLossPercent()
+			self.__tableDevices.item(row, 4).setText("-" if lossPercent is None else f"{lossPercent:.2f}%")
+			limitsPassed = session.getLimitsPassed()
+			self.__tableDevices.item(row, 5).setText("-" if limitsPassed is None else ("PASS" if limitsPassed else "FAIL"))
+			self.__tableDevices.item(row, 6).setText(summary)
+		self.__refreshPerformance()
+
+	# Stage timings of the acquisition process (see `TestExecutionWorker.getProfile`) and of the live view, as of the
+	# last grid refresh
+	def __refreshPerformance(self):
+		if not PROFILE_ENABLED:
+			return
+		profile = self.__worker.getProfile()
+		liveView = self.__canvas.getProfiler()
+		stages = list(profile["stages"].items()) if profile is not None else []
+		if liveView is not None:
+			stages += list(liveView.snapshot()["stages"].items())
+		self.__tablePerformance.setRowCount(len(stages))
+		for row, (stage, stats) in enumerate(stages):
+			cells = [stage, f"{stats['callRate']:.0f}", f"{stats['itemRate']:.0f}", f"{stats['meanUs']:.1f}", \
+						f"<={stats['p99Us']:.0f}", f"{stats['maxUs']:.0f}", f"{stats['timeShare'] * 100:.1f}%"]
+			for column, text in enumerate(cells):
+				self.__tablePerformance.setItem(row, column, QTableWidgetItem(text))
+		decoded = profile["stages"].get("decode") if profile is not None else None
+		backlog = profile["gauges"].get("backlog") if profile is not None else None
+		rate = f"{decoded['itemRate']:.0f}" if decoded is not None else "-"
+		queued = f"{backlog['latest']} bytes (max {backlog['largest']})" if backlog is not None else "-"
+		self.__labelPerformance.setText(f"Performance: {rate} samples/s | Socket Backlog: {queued}")
+
+	# The live view shows the device selected in the grid (or the first device if none is selected)
+	def __selectedDeviceWindow(self):
+		return self.__worker.getDisplayWindow(max(self.__tableDevices.currentRow(), 0))
+
+	def __selectedDeviceSchema(self):
+		return self.__worker.getChannelSchema(max(self.__tableDevices.currentRow(), 0))
 		
+	# With no devices added, the device in the fields is tested on its own, without being added to `__devices`
 	def __buttonStartTestClick(self):
-		if (self.__linePortDevice.text() == self.__linePortInterface.text()):
+		devices = self.__devices or [(self.__lineIPDevice.text(), int(self.__linePortDevice.text()))]
+		if any(str(portDevice) == self.__linePortInterface.text() for IPDevice, portDevice in devices):
 			self.__printOut("ERROR: Interface port must be different from device port")
 		else:
-			self.__worker.updateParameters(self.__lineIPDevice.text(), int(self.__linePortDevice.text()), 
-										int(self.__linePortInterface.text()), int(self.__lineDuration.text()), \
+			if devices is not self.__devices:
+				self.__tableDevices.setRowCount(0)
+				self.__insertDeviceRow(*devices[0])
+				self.__gridDetached = True
+			self.__worker.updateParameters(devices, int(self.__linePortInterface.text()), \
+										int(self.__lineDuration.text()), \
 										int(self.__lineInterval.text()), self.__boxFormat.currentText(), \
-										self.__sliderDisplayCount.value(), self.__checkGenerateFile.isChecked(), \
-										self.__lineOutputLocation.text(), self.__canvas, self.__timestamps, \
-										self.__mvData, self.__maData)
+										self.__sliderDisplayScale.value(), self.__checkGenerateFile.isChecked(), \
+										self.__lineOutputLocation.text())
 			self.__startTest()
+			self.__refreshDeviceGrid()
+			self.__gridTimer.start()
 			self.__thread.start()
  
 	def __buttonCancelTestClick(self):
 		self.__worker.interfaceCancel()
 
+	def __buttonAddDeviceClick(self):
+		self.__addDevice(self.__lineIPDevice.text(), int(self.__linePortDevice.text()))
+		self.__guiRefresh()
+
+	def __buttonRemoveDeviceClick(self):
+		row = self.__tableDevices.currentRow()
+		if row >= 0:
+			self.__tableDevices.removeRow(row)
+			del self.__devices[row]
+		self.__guiRefresh()
+
+	# Replays recordings (capture files or datagram logs) through the same processing as a live test; the device grid
+	# shows the recordings instead of the devices until a device is added again
+	def __buttonReplayClick(self):
+		paths, selectedFilter = QFileDialog.getOpenFileNames(self.__widget, "Replay Recorded Tests", CAPTURE_DIRECTORY, \
+																"Recordings (*.cap *.dgl)")
+		if not paths:
+			return
+		try:
+			self.__worker.updateReplayParameters(paths, REPLAY_SPEEDS[self.__boxReplaySpeed.currentText()], \
+												self.__boxFormat.currentText(), self.__sliderDisplayScale.value(), \
+												self.__checkGenerateFile.isChecked() and self.__lineOutputLocation.text() != "", \
+												self.__lineOutputLocation.text())
+		except (OSError, ValueError) as error:
+			self.__printOut(f"ERROR: Recording could not be replayed: {error}")
+			return
+		self.__devices = []
+		self.__tableDevices.setRowCount(0)
+		for path in paths:
+			row = self.__tableDevices.rowCount()
+			self.__tableDevices.insertRow(row)
+			for column in range(len(DEVICE_GRID_COLUMNS)):
+				self.__tableDevices.setItem(row, column, QTableWidgetItem(""))
+			self.__tableDevices.item(row, 1).setText(os.path.basename(path))
+		self.__gridDetached = True
+		self.__startTest()
+		self.__refreshDeviceGrid()
+		self.__gridTimer.start()
+		self.__thread.start()
+
+	# The history can be browsed while a test is running (runs are recorded when the test ends)
+	def __buttonHistoryClick(self):
+		self.__historyDialog.show()
+		self.__historyDialog.raise_()
+
+	def __tableDevicesSelectionChanged(self):
+		self.__guiRefresh()
+
 	def __checkGenerateFileToggle(self):
 		self.__guiRefresh()
 		
@@ -237,7 +413,9 @@ class MainWindow(QtWidgets.QMainWindow):
 	def __boxFormatChanged(self):
 		self.__guiRefresh()
 	
-	def __sliderDisplayCountChanged(self):
+	# The scale can be changed while a test is running
+	def __sliderDisplayScaleChanged(self):
+		self.__worker.setDisplayScale(self.__sliderDisplayScale.value())
 		self.__guiRefresh()
 	
 	def __buttonOutputLocationClick(self):
@@ -250,19 +428,28 @@ class MainWindow(QtWidgets.QMainWindow):
 	def getWidget(self):
 		return self.__widget
 
+	# Called as the application quits: cancels any test still running, then releases the worker's shared memory
+	def shutdown(self):
+		self.__worker.interfaceCancel()
+		self.__thread.wait((ACQUISITION_TIMEOUT + 1) * 1000)
+		self.__worker.shutdown()
+
 # ***** EXECUTION *****
-app = QtWidgets.QApplication(argv)
-try:
-	gui = MainWindow()
-	widget = gui.getWidget()
-	widget.show()
-except SystemExit as error:
-	gui.__printOut(f"Program terminated with exit code: {error}")
-except KeyboardInterrupt as error:
-	gui.__printOut(f"Program terminated by keyboard interrupt: {error}")
-except Exception as error:
-	gui.__printOut(str(error))
-except:
-	gui.__printOut("Error occurred during program execution")
-finally:
-	exit(app.exec())
\ No newline at end of file
+# Guarded because report rendering processes are spawned, and re-import this module as their main module
+if __name__ == "__main__":
+	app = QtWidgets.QApplication(argv)
+	try:
+		gui = MainWindow()
+		app.aboutToQuit.connect(gui.shutdown)
+		widget = gui.getWidget()
+		widget.show()
+	except SystemExit as error:
+		gui.__printOut(f"Program terminated with exit code: {error}")
+	except KeyboardInterrupt as error:
+		gui.__printOut(f"Program terminated by keyboard interrupt: {error}")
+	except Exception as error:
+		gui.__printOut(str(error))
+	except:
+		gui.__printOut("Error occurred during program execution")
+	finally:
+		exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,63 @@
+########################################
+# ***** IMPORTS *****
+import struct
+import timeit
+
+from Config import *
+from SampleStore import SampleStore
+from StandInDevice import StandInDevice
+from StatusCodec import StatusCodec
+########################################
+
+# Measures the per-sample cost of decoding STATUS datagrams into the sample store, comparing the original
+# split-based text parsing with the StatusCodec text and binary paths, for single-sample and batched datagrams, with
+# the channels of a StandInDevice (the default two, or more to see how the cost grows with the channel count).
+# Usage: python3 ParseBenchmark.py [samples] [channels]
+
+# One split per field, as the interface originally parsed each STATUS message
+def legacyDecode(data, store, fieldCount):
+	message = data.decode('utf-8')
+	store.append(*(int(message.split(";")[index].split("=")[1]) for index in range(1, fieldCount + 1)))
+
+def codecTextDecode(codec, data, store):
+	codec.decodeText(data.decode('utf-8'), store)
+
+def codecBinaryDecode(codec, data, store):
+	if codec.isBinary(data):
+		codec.decodeBinary(data, store)
+
+def benchmark(samples, batchSize=STATUS_BATCH_SIZE, channelCount=2):
+	schema = StandInDevice.schema(channelCount)
+	codec = StatusCodec(schema)
+	store = SampleStore(schema.getNames(), capacity=samples * 2)
+	values = [123450] + [512 + index for index in range(channelCount)]
+	textSample = bytes("".join(f"{name}={value};" for name, value in zip(["TIME"] + schema.getNames(), values)), "utf-8")
+	binarySample = struct.pack(schema.getRecordFormat(), *values)
+	textData = b"STATUS;" + textSample
+	binaryData = STATUS_BINARY_MAGIC + binarySample
+	textBatchData = b"STATUS;" + textSample * batchSize
+	binaryBatchData = STATUS_BINARY_MAGIC + binarySample * batchSize
+	cases = [	# (name, datagram decoder, samples per datagram)
+		("Text (legacy split)", lambda: legacyDecode(textData, store, channelCount + 1), 1),
+		("Text (StatusCodec)", lambda: codecTextDecode(codec, textData, store), 1),
+		("Binary (StatusCodec)", lambda: codecBinaryDecode(codec, binaryData, store), 1),
+		(f"Text batch of {batchSize}", lambda: codecTextDecode(codec, textBatchData, store), batchSize),
+		(f"Binary batch of {batchSize}", lambda: codecBinaryDecode(codec, binaryBatchData, store), batchSize)
+	]
+	results = {}
+	for name, case, perDatagram in cases:
+		datagrams = max(samples // perDatagram, 1)
+		seconds = min(timeit.repeat(case, setup=store.clear, number=datagrams, repeat=5))
+		results[name] = seconds / (datagrams * perDatagram) * 1e9
+	return results
+
+# ***** EXECUTION *****
+if __name__ == "__main__":
+	from sys import argv
+	samples = int(argv[1]) if len(argv) > 1 else 100000
+	channelCount = int(argv[2]) if len(argv) > 2 else 2
+	results = benchmark(samples, channelCount=channelCount)
+	baseline = results["Text (legacy split)"]
+	print(f"STATUS parse cost per sample ({samples} samples of {channelCount} channels, best of 5):")
+	for name, nanoseconds in results.items():
+		print(f"{name:<24}{nanoseconds:>10.1f} ns{baseline / nanoseconds:>8.2f}x")
@@ -0,0 +1,105 @@
+########################################
+# ***** IMPORTS *****
+from Config import *
+from ChannelSchema import ChannelSchema
+from DisplayPyramid import DisplayPyramid
+########################################
+
+# GUI-side stand-in for a TestSession running in the acquisition process (see AcquisitionProcess).
+# The session's state arrives as plain data over the process's pipe (see `describe`), while its samples are read
+# straight from the SampleRing the session writes to, so the live view never waits on the acquisition process. The
+# samples are added to a DisplayPyramid here, as the live view asks for them, so any span of the test can be shown.
+class RemoteSession:
+	def __init__(self, IPDevice, portDevice, ring):
+		self.__ring = ring
+		self.__pyramid = None	# Created once the ring has been laid out for the device's channels
+		self.__schema = None
+		self.__indexed = 0	# Index in the ring of the next sample to add to the pyramid
+		self.__status = {
+			"deviceName": f"{IPDevice}:{portDevice}",
+			"state": SESSION_IDLE,
+			"summary": [],
+			"lossPercent": None,
+			"limitsPassed": None,
+			"schema": STATUS_DEFAULT_SCHEMA
+		}
+		self.__results = None
+		self.__reportJob = None
+
+	# Plain-data state of a TestSession, sent by the acquisition process
+	@staticmethod
+	def describe(session):
+		return {
+			"deviceName": session.getDeviceName(),
+			"state": session.getState(),
+			"summary": session.getSummary(),
+			"lossPercent": session.getLink().getLossPercent(),
+			"limitsPassed": session.getLimits().isPassed(),
+			"schema": session.getSchema().encode()
+		}
+
+	# Called on the worker thread as state arrives; the status is replaced as a whole, so the GUI thread always sees
+	# a consistent one
+	def update(self, status, results=None, reportJob=None):
+		self.__status = status
+		if results is not None:
+			self.__results = results
+		if reportJob is not None:
+			self.__reportJob = reportJob
+
+	def getDeviceName(self):
+		return self.__status["deviceName"]
+
+	def getState(self):
+		return self.__status["state"]
+
+	def getSummary(self):
+		return self.__status["summary"]
+
+	# The channels announced by the device (the default ones until it has answered)
+	def getSchema(self):
+		if self.__schema is None or self.__schema[0] != self.__status["schema"]:
+			self.__schema = (self.__status["schema"], ChannelSchema.parse(self.__status["schema"]))
+		return self.__schema[1]
+
+	def getLossPercent(self):
+		return self.__status["lossPercent"]
+
+	def getLimitsPassed(self):
+		return self.__status["limitsPassed"]
+
+	# Read from the ring, so it's always up to date
+	def getSampleCount(self):
+		return self.__ring.getCount()
+
+	# Available once the test has finished (see `TestSession.getResults`)
+	def getResults(self):
+		return self.__results
+
+	# Available once the test has finished, if a report was requested and there are samples to report
+	def getReportJob(self):
+		return self.__reportJob
+
+	def isFinished(self):
+		return self.getState() in (SESSION_COMPLETED, SESSION_CANCELLED, SESSION_ABORTED, SESSION_TIMED_OUT)
+
+	# Called by the live view on the GUI thread (see `TestSession.getDisplayWindow`)
+	def getDisplayWindow(self, span, points=LIVE_DISPLAY_POINTS):
+		channelCount = self.__ring.getChannelCount()
+		if self.__pyramid is None or self.__pyramid.getChannelCount() != channelCount:
+			self.__pyramid = DisplayPyramid(channelCount)
+			self.__indexed = 0
+		self.__indexSamples()
+		timestamps, channels = self.__ring.tail(points)
+		return self.__pyramid.liveWindow(timestamps, channels, self.__ring.getCount(), self.__indexed, span, points)
+
+	# As in TestSession, samples are added in chunks of PYRAMID_CHUNK (and the rest once the test has finished).
+	# Samples overwritten before the live view asked for them (if it fell a ring's capacity behind) are
+	# left out of the pyramid.
+	def __indexSamples(self):
+		unindexed = self.__ring.getCount() - self.__indexed
+		if unindexed < (1 if self.isFinished() else PYRAMID_CHUNK):
+			return
+		first, timestamps, channels = self.__ring.since(self.__indexed)
+		self.__pyramid.extend(timestamps, channels)
+		self.__indexed = first + len(timestamps)
@@ -0,0 +1,120 @@
+########################################
+# ***** IMPORTS *****
+import heapq
+import struct
+import threading
+from time import perf_counter
+
+from CaptureFile import CaptureFile
+from ChannelSchema import ChannelSchema
+from Config import *
+from DatagramLog import DatagramLog
+########################################
+
+# Stand-in for SessionManager that feeds recorded tests through the same TestSession processing path (decoding,
+# link telemetry, statistics, limits, live display index, capture and summary) instead of a socket, so a test can be
+# reproduced deterministically and the processing profiled without a device, in much less than real time.
+# Recordings are either datagram logs (DatagramLog; replayed exactly as received, including arrival times) or capture
+# files (CaptureFile; the samples are re-framed as sequenced binary STATUS datagrams of STATUS_BATCH_SIZE samples, as
+# if received at their TIME). Each datagram is delivered at its arrival time divided by `speed`, or as fast as
+# possible if `speed` is 0. Messages the sessions send to the "device" are discarded.
+class ReplayManager:
+	def __init__(self, speed=0):
+		self.__speed = speed
+		self.__sessions = {}
+		self.__datagrams = {}	# Address -> [(arrival, data)]
+		self.__cancelled = threading.Event()
+
+	# Returns (metadata, [(arrival, data)]) for a datagram log or capture file, where the metadata has the address
+	# (blank for capture files), duration (ms), interval (ms) and start time of the recorded test.
+	# Replayed sessions are given addresses of their own (see `replayAddress`), so a recording can be replayed more
+	# than once at a time.
+	@staticmethod
+	def loadRecording(path):
+		if ReplayManager.__isDatagramLog(path):
+			return DatagramLog.load(path)
+		header, records = CaptureFile.load(path)
+		metadata = ReplayManager.__captureMetadata(header, records)
+		# Samples are stored as int32 whatever their type on the wire, so they're replayed as i32 channels
+		schema = ChannelSchema.parse(header["schema"]).widened().encode()
+		datagrams = [(0.0, bytes(f"ID;MODEL={header['model']};Serial={header['serial']};FORMATS={MSG_FORMAT_BINARY};" + \
+									f"CHANNELS={schema};", "utf-8")), (0.0, bytes(f"{MSG_FULL_STARTED};", "utf-8"))]
+		sequence = struct.Struct("<I")
+		for start in range(0, len(records), STATUS_BATCH_SIZE):
+			batch = records[start:start + STATUS_BATCH_SIZE]
+			datagrams.append((int(batch[-1, 0]) / 1000, STATUS_SEQUENCED_MAGIC + sequence.pack(start) + batch.tobytes()))
+		datagrams.append((metadata["duration"] / 1000, bytes(f"{MSG_FULL_STOPPED};SENT={len(records)};", "utf-8")))
+		return metadata, datagrams
+
+	# Returns the metadata of a recording (as `loadRecording`), without reading its datagrams
+	@staticmethod
+	def loadMetadata(path):
+		if ReplayManager.__isDatagramLog(path):
+			return DatagramLog.loadMetadata(path)
+		return ReplayManager.__captureMetadata(*CaptureFile.load(path))
+
+	@staticmethod
+	def __isDatagramLog(path):
+		with open(path, "rb") as file:
+			return file.read(len(DATAGRAM_LOG_MAGIC)) == DATAGRAM_LOG_MAGIC
+
+	@staticmethod
+	def __captureMetadata(header, records):
+		return {
+			"address": "",
+			"duration": int(records[-1, 0]) if len(records) else 0,
+			"interval": header["interval"],
+			"startTime": header["startTime"]
+		}
+
+	# (IP address, port) for the session replaying the `index`th recording
+	@staticmethod
+	def replayAddress(index):
+		return REPLAY_ADDRESS, MIN_PORT + index
+
+	def addSession(self, session, datagrams):
+		self.__sessions[session.getAddress()] = session
+		self.__datagrams[session.getAddress()] = datagrams
+
+	def getSessions(self):
+		return list(self.__sessions.values())
+
+	# Replays don't use a socket (see `SessionManager.getChannelStats`)
+	def getChannelStats(self):
+		return None
+
+	def getLossReport(self):
+		return "Socket: none (replay)"
+
+	def getBacklog(self):
+		return None
+
+	# Called from another thread (e.g. the GUI)
+	def cancel(self):
+		self.__cancelled.set()
+
+	# Blocks until every recording has been replayed or `cancel` is called. Sessions whose recording ends before the
+	# test finished (e.g. a log of a cancelled test) are cancelled.
+	def run(self):
+		try:
+			for session in self.__sessions.values():
+				session.start(lambda data, address: None)
+			# All recordings are replayed together, in order of arrival
+			streams = [[(arrival, index, data) for arrival, data in datagrams] \
+						for index, datagrams in enumerate(self.__datagrams.values())]
+			sessions = list(self.__sessions.values())
+			start = perf_counter()
+			for arrival, index, data in heapq.merge(*streams, key=lambda datagram: datagram[:2]):
+				if self.__speed > 0:
+					delay = start + arrival / self.__speed - perf_counter()
+					if delay > 0 and self.__cancelled.wait(delay):
+						break
+				if self.__cancelled.is_set():
+					break
+				sessions[index].processDatagram(data, arrival)
+			for session in self.__sessions.values():
+				if not session.isFinished():
+					session.cancel()
+		finally:
+			for session in self.__sessions.values():
+				session.close()
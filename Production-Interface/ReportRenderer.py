@@ -0,0 +1,73 @@
+########################################
+# ***** IMPORTS *****
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Config import *
+########################################
+
+# Renders test reports in a pool of worker processes, so that saving a report neither blocks the acquisition thread
+# nor holds the GIL while the next test is running.
+# Each job is a plain dictionary (see `TestSession.getReportJob`). Samples are read from the capture file in the
+# worker process where possible, rather than being pickled across. matplotlib is only imported by the worker
+# processes (through the object-oriented Figure API with the Agg canvas, never pyplot), so this module can be used
+# by the headless runner without pulling in matplotlib.
+class ReportRenderer:
+	def __init__(self, workers=REPORT_WORKERS):
+		self.__workers = workers
+		self.__pool = None
+
+	# Returns a Future whose result is the list of files written
+	def submit(self, job):
+		if self.__pool is None:	# Created on first use; "spawn" avoids forking a process that is running Qt
+			self.__pool = ProcessPoolExecutor(max_workers=self.__workers, mp_context=multiprocessing.get_context("spawn"))
+		return self.__pool.submit(renderReport, job)
+
+	def shutdown(self, wait=True):
+		if self.__pool is not None:
+			self.__pool.shutdown(wait=wait)
+			self.__pool = None
+
+def safePath(path):
+	return path.replace('\\', '_').replace('/', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_').replace('.', '_') # Remove problematic path characters
+
+# Runs in a worker process
+def renderReport(job):
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+	from matplotlib.figure import Figure
+
+	from CaptureFile import CaptureFile
+	from Decimator import Decimator
+
+	if job["capture"]:
+		header, records = CaptureFile.load(job["capture"])
+		timestamps, channels = records[:, 0], [records[:, index + 1] for index in range(header["channels"])]
+	else:
+		timestamps, channels = job["timestamps"], job["channels"]
+	figure = Figure(figsize=REPORT_FIGURE_SIZE, layout="tight")
+	FigureCanvasAgg(figure)
+	axes = figure.add_subplot(111)
+	axes.grid()
+	axes.margins(x=0, y=0)
+	figure.suptitle(job["title"], fontsize=12)
+	axes.set_title(job["subtitle"], fontsize=10)
+	axes.set_xlabel("Time (seconds)")
+	axes.set_ylabel(f"Level ({'/'.join(dict.fromkeys(unit for unit in job['units'] if unit))})")
+	yMin, yMax = 0, 0	# As in `DataCanvas.__rescale`, so signed channels aren't clipped
+	for index, (data, label) in enumerate(zip(channels, job["labels"])):
+		colour = REPORT_COLOURS[index % len(REPORT_COLOURS)]
+		x, y = Decimator.minMax(timestamps, data, REPORT_MAX_POINTS // 2)
+		axes.plot(x / 1000, y, colour, linewidth=1, label=label)	# Convert milliseconds to seconds
+		yMin = min(yMin, int(y.min()))
+		yMax = max(yMax, int(y.max()))
+	axes.legend()
+	axes.set_xlim(0, timestamps[-1] / 1000)
+	axes.set_ylim(yMin, max(yMax, yMin + 1))
+	figure.autofmt_xdate(rotation=45, ha='right')
+	written = []
+	for outputFormat in job["formats"]:
+		path = os.path.join(job["destination"], f"{safePath(job['title'])}.{outputFormat.lower()}")
+		figure.savefig(path, format=outputFormat.lower(), dpi=REPORT_DPI, bbox_inches='tight')
+		written.append(path)
+	return written
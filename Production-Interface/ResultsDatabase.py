@@ -0,0 +1,162 @@
+########################################
+# ***** IMPORTS *****
+import argparse
+import json
+import sqlite3
+import sys
+import time
+import zlib
+
+from Config import *
+########################################
+
+# Local history of every test run, in an embedded SQLite database (RESULTS_DATABASE).
+# Each run is one row of `runs` (device, test parameters, outcome, link loss and the path of its capture file, with
+# the full results as compressed JSON), and one row of `channelStats` per channel. `runs` is indexed on (serial, start
+# time), (model, start time) and start time, so per-device history and per-model statistics over a period only read
+# the matching rows, however many runs are stored (the start time index also covers the model and outcome, so failure
+# rates over a period are counted from the period's index entries alone). The database is opened in WAL mode, so the
+# history can be browsed while a test is recording its results.
+# A connection may only be used on the thread that opened it, so each thread opens its own ResultsDatabase.
+#
+# Usage (from the Production-Interface directory):
+#   python3 ResultsDatabase.py --serial 42
+#   python3 ResultsDatabase.py --model Dev --days 7
+#   python3 ResultsDatabase.py --failure-rates --days 7
+class ResultsDatabase:
+	__schema = """
+		CREATE TABLE IF NOT EXISTS runs (
+			id INTEGER PRIMARY KEY,
+			model TEXT NOT NULL,
+			serial TEXT NOT NULL,
+			address TEXT NOT NULL,
+			startTime REAL NOT NULL,	-- Seconds since the epoch
+			endTime REAL NOT NULL,		-- Seconds since the epoch
+			duration INTEGER NOT NULL,	-- Milliseconds
+			interval INTEGER NOT NULL,	-- Milliseconds
+			samples INTEGER NOT NULL,
+			state TEXT NOT NULL,
+			outcome TEXT NOT NULL,
+			lossPercent REAL,
+			capture TEXT NOT NULL,
+			results BLOB NOT NULL		-- zlib-compressed JSON (as `TestSession.getResults`, without the link histograms)
+		);
+		CREATE INDEX IF NOT EXISTS runsBySerial ON runs (serial, startTime);
+		CREATE INDEX IF NOT EXISTS runsByModel ON runs (model, startTime);
+		CREATE INDEX IF NOT EXISTS runsByStart ON runs (startTime, model, outcome);
+		CREATE TABLE IF NOT EXISTS channelStats (
+			run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+			channel TEXT NOT NULL,
+			minimum INTEGER NOT NULL,
+			maximum INTEGER NOT NULL,
+			mean REAL NOT NULL,
+			stdDev REAL NOT NULL,
+			PRIMARY KEY (run, channel)
+		) WITHOUT ROWID;
+	"""
+	__columns = ["id", "model", "serial", "address", "startTime", "endTime", "duration", "interval", "samples", \
+					"state", "outcome", "lossPercent", "capture"]
+
+	def __init__(self, path=RESULTS_DATABASE):
+		self.__path = path
+		self.__connection = sqlite3.connect(path)
+		self.__connection.execute("PRAGMA journal_mode=WAL")
+		self.__connection.execute("PRAGMA foreign_keys=ON")
+		with self.__connection:
+			self.__connection.executescript(ResultsDatabase.__schema)
+
+	def getPath(self):
+		return self.__path
+
+	def close(self):
+		self.__connection.close()
+
+	# `results` is as returned by `TestSession.getResults`; returns the id of the new run
+	def record(self, results):
+		stored = dict(results)
+		stored["link"] = {key: value for key, value in results["link"].items() if key != "histograms"}
+		with self.__connection:
+			columns = ResultsDatabase.__columns[1:] + ["results"]
+			cursor = self.__connection.execute( \
+				f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", \
+				(results["model"], results["serial"], results["address"], results["startTime"], results["endTime"], \
+					results["duration"], results["interval"], results["samples"], results["state"], results["outcome"], \
+					results["link"]["lossPercent"], results["capture"], zlib.compress(json.dumps(stored).encode("utf-8"))))
+			run = cursor.lastrowid
+			self.__connection.executemany("INSERT INTO channelStats VALUES (?, ?, ?, ?, ?, ?)", \
+				[(run, channel, stats["min"], stats["max"], stats["mean"], stats["stdDev"]) \
+					for channel, stats in results["statistics"].items() if stats["count"] > 0])
+		return run
+
+	# Newest runs first, filtered by any of serial, model, outcome and start time (`since`/`until`, seconds since the
+	# epoch); each run is a dictionary of the `runs` columns (without the full results)
+	def findRuns(self, serial=None, model=None, outcome=None, since=None, until=None, limit=RESULTS_PAGE_SIZE):
+		conditions, parameters = self.__conditions(serial, model, outcome, since, until)
+		cursor = self.__connection.execute(f"SELECT {', '.join(ResultsDatabase.__columns)} FROM runs {conditions} " + \
+											"ORDER BY startTime DESC LIMIT ?", parameters + [limit])
+		return [dict(zip(ResultsDatabase.__columns, row)) for row in cursor]
+
+	def countRuns(self, serial=None, model=None, outcome=None, since=None, until=None):
+		conditions, parameters = self.__conditions(serial, model, outcome, since, until)
+		return self.__connection.execute(f"SELECT COUNT(*) FROM runs {conditions}", parameters).fetchone()[0]
+
+	# Returns the full results of a run (as `TestSession.getResults`), or None if there is no such run
+	def getResults(self, run):
+		row = self.__connection.execute("SELECT results FROM runs WHERE id = ?", (run,)).fetchone()
+		return json.loads(zlib.decompress(row[0])) if row is not None else None
+
+	# Returns (channel, minimum, maximum, mean, standard deviation) per channel of a run
+	def getChannelStats(self, run):
+		return self.__connection.execute("SELECT channel, minimum, maximum, mean, stdDev FROM channelStats " + \
+											"WHERE run = ?", (run,)).fetchall()
+
+	# Returns (model, runs, failures, failure rate) per model, for the runs that started in the period.
+	# Cancelled runs and runs that ended in an error aren't counted.
+	def failureRates(self, since=None, until=None):
+		conditions, parameters = self.__conditions(None, None, None, since, until)
+		conditions += (" AND " if conditions else "WHERE ") + "outcome IN (?, ?)"
+		cursor = self.__connection.execute("SELECT model, COUNT(*), SUM(outcome = ?) FROM runs INDEXED BY runsByStart " + \
+											f"{conditions} GROUP BY model ORDER BY model", \
+											[OUTCOME_FAIL] + parameters + [OUTCOME_PASS, OUTCOME_FAIL])
+		return [(model, runs, failures, failures / runs) for model, runs, failures in cursor]
+
+	def __conditions(self, serial, model, outcome, since, until):
+		conditions, parameters = [], []
+		for condition, value in (("serial = ?", serial), ("model = ?", model), ("outcome = ?", outcome), \
+									("startTime >= ?", since), ("startTime < ?", until)):
+			if value is not None:
+				conditions.append(condition)
+				parameters.append(value)
+		return ("WHERE " + " AND ".join(conditions)) if conditions else "", parameters
+
+def parseArguments(arguments):
+	parser = argparse.ArgumentParser(prog="ResultsDatabase", description="Query the test results database")
+	parser.add_argument("--database", default=RESULTS_DATABASE, help="SQLite results database")
+	parser.add_argument("--serial", help="Only runs of this serial number")
+	parser.add_argument("--model", help="Only runs of this model")
+	parser.add_argument("--outcome", help=f"Only runs with this outcome ({', '.join(RESULTS_OUTCOMES)})")
+	parser.add_argument("--days", type=float, help="Only runs started in the last DAYS days")
+	parser.add_argument("--limit", type=int, default=RESULTS_PAGE_SIZE, help="Maximum number of runs to list")
+	parser.add_argument("--failure-rates", action="store_true", help="List the failure rate of each model instead")
+	return parser.parse_args(arguments)
+
+def main(arguments):
+	options = parseArguments(arguments)
+	since = time.time() - options.days * 86400 if options.days is not None else None
+	database = ResultsDatabase(options.database)
+	try:
+		if options.failure_rates:
+			for model, runs, failures, rate in database.failureRates(since):
+				print(f"{model}: {failures} of {runs} runs failed ({rate:.1%})")
+		else:
+			for run in database.findRuns(options.serial, options.model, options.outcome, since, limit=options.limit):
+				started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["startTime"]))
+				print(f"{run['id']:>8} {started} {run['model']} (#{run['serial']}) {run['outcome']} " + \
+						f"{run['samples']} samples {run['capture']}")
+	finally:
+		database.close()
+	return 0
+
+# ***** EXECUTION *****
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
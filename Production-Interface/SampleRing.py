@@ -0,0 +1,129 @@
+########################################
+# ***** IMPORTS *****
+from multiprocessing import shared_memory
+
+import numpy
+
+from Config import *
+########################################
+
+# Ring of the most recent samples of one test, in a fixed amount of shared memory, written by the acquisition process
+# and read by the GUI process (see AcquisitionProcess) without copying or locking.
+# Layout: an int64 header (the count of samples ever written, the channel count, the capacity and a generation), then
+# one int32 column for the timestamps and one per channel. The channel count is only known once the device has
+# announced its channels, so the writer lays out the columns then (see `configure`), fitting as many samples as the
+# memory allows. The generation is incremented before and after the header is rewritten (so it's odd meanwhile), and
+# readers check it before and after reading the header, so they never use half of an old layout and half of a new one
+# (a header being rewritten reads as an empty ring).
+# Every sample is written twice, `capacity` apart, so any run of up to `capacity` consecutive samples is one contiguous
+# slice, and the accessors can return views into the shared memory (like SampleStore). The samples are written before
+# the count is updated, so a reader never sees a sample that hasn't been written; a reader that falls more than
+# `capacity` samples behind the writer misses the samples that have been overwritten.
+# The process that creates a ring owns it (and `unlink`s it); other processes attach to it by name.
+class SampleRing:
+	__headerSize = 64	# Bytes (padded so the columns are aligned)
+
+	def __init__(self, size=SAMPLE_RING_SIZE, name=None):
+		if name is None:
+			self.__memory = shared_memory.SharedMemory(create=True, size=size)
+		else:
+			self.__memory = shared_memory.SharedMemory(name=name)
+		# Count, channels, capacity and generation
+		self.__header = numpy.ndarray((4,), dtype=numpy.int64, buffer=self.__memory.buf)
+		self.__layout = None	# (channels, capacity) of `__columns`
+		self.__columns = None
+		if name is None:
+			self.reset()
+
+	def getName(self):
+		return self.__memory.name
+
+	# Samples written since the ring was configured (including any that have since been overwritten)
+	def getCount(self):
+		return self.__readHeader()[0]
+
+	# 0 until the ring has been configured
+	def getChannelCount(self):
+		return self.__readHeader()[1]
+
+	def getCapacity(self):
+		return self.__readHeader()[2]
+
+	# Only while no process is writing to the ring (e.g. before each test)
+	def reset(self):
+		self.__writeHeader(0, 0)
+
+	# Writer: lays out the columns for `channelCount` channels, and empties the ring
+	def configure(self, channelCount):
+		self.__writeHeader(channelCount, (self.__memory.size - SampleRing.__headerSize) // ((channelCount + 1) * 2 * 4))
+
+	# The generation is written last, once the other fields are complete
+	def __writeHeader(self, channelCount, capacity):
+		self.__header[3] += 1
+		self.__header[:3] = (0, channelCount, capacity)
+		self.__header[3] += 1
+
+	# (count, channels, capacity), all from the same layout: all 0 while the writer is rewriting the header
+	def __readHeader(self):
+		generation = int(self.__header[3])
+		count, channelCount, capacity = (int(value) for value in self.__header[:3])
+		if generation % 2 or int(self.__header[3]) != generation:
+			return 0, 0, 0
+		return count, channelCount, capacity
+
+	# Views of the columns for a layout read from the header (readers pick up a new layout on their next access)
+	def __getColumns(self, layout):
+		if layout != self.__layout:
+			channelCount, capacity = layout
+			self.__columns = numpy.ndarray((channelCount + 1, 2 * capacity), dtype=numpy.int32, \
+											buffer=self.__memory.buf, offset=SampleRing.__headerSize)
+			self.__layout = layout
+		return self.__columns, self.__layout[1]
+
+	# Writer: `timestamps` and each of `channels` are equal-length arrays (e.g. views from a SampleStore)
+	def extend(self, timestamps, channels):
+		length = len(timestamps)
+		if length == 0:
+			return
+		count, channelCount, capacity = (int(value) for value in self.__header[:3])	# Only the writer changes them
+		columns, capacity = self.__getColumns((channelCount, capacity))
+		skipped = max(length - capacity, 0)	# Only the newest `capacity` samples can be kept
+		start = (count + skipped) % capacity
+		lower = min(length - skipped, capacity - start)	# Samples before the end of the first copy
+		for column, values in zip(columns, [timestamps] + list(channels)):
+			values = values[skipped:]
+			column[start:start + len(values)] = values
+			column[start + capacity:start + capacity + lower] = values[:lower]
+			column[:len(values) - lower] = values[lower:]
+		self.__header[0] = count + length
+
+	# Zero-copy views of (at most) the last `count` samples
+	def tail(self, count):
+		end, channelCount, capacity = self.__readHeader()
+		return self.__views(end, count, (channelCount, capacity))
+
+	# Returns (first, timestamps, [channel data]) for the samples from the `start`th on, where `first` is the index of
+	# the first sample returned (greater than `start` if the samples from `start` have been overwritten)
+	def since(self, start):
+		end, channelCount, capacity = self.__readHeader()
+		timestamps, channels = self.__views(end, end - start, (channelCount, capacity))
+		return end - len(timestamps), timestamps, channels
+
+	# Views of (at most) the last `count` of the first `end` samples, in the given (channels, capacity) layout
+	def __views(self, end, count, layout):
+		columns, capacity = self.__getColumns(layout)
+		if capacity == 0:
+			return numpy.empty(0, dtype=numpy.int32), []
+		length = max(min(count, end, capacity), 0)
+		stop = end % capacity + capacity
+		return columns[0][stop - length:stop], [column[stop - length:stop] for column in columns[1:]]
+
+	# Views returned by the accessors must not be used once the ring is closed
+	def close(self):
+		self.__header = None
+		self.__columns = None
+		self.__memory.close()
+
+	# Owner only; the ring stays usable by processes that have already attached to it until they close it
+	def unlink(self):
+		self.__memory.unlink()
@@ -0,0 +1,90 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+
+from Config import *
+########################################
+
+# Columnar storage for STATUS samples: one int32 array for the timestamps (milliseconds) and one per channel.
+# The arrays are preallocated and grow geometrically, so appending is amortised O(1), and all accessors return
+# views into the live arrays rather than copies.
+# The arrays are only ever replaced as a whole list (timestamps first, then one per channel), so a reader on another
+# thread always sees a consistent set of columns, even while they are being grown or trimmed.
+class SampleStore:
+	def __init__(self, channels, capacity=SAMPLE_STORE_CAPACITY):
+		self.__channels = list(channels)
+		self.__count = 0
+		self.__capacity = max(int(capacity), 1)
+		self.__columns = [numpy.empty(self.__capacity, dtype=numpy.int32) for column in range(len(self.__channels) + 1)]
+
+	def __len__(self):
+		return self.__count
+
+	def __grow(self, required):
+		capacity = self.__capacity
+		while capacity < required:
+			capacity *= 2
+		columns = []
+		for column in self.__columns:
+			grown = numpy.empty(capacity, dtype=numpy.int32)
+			grown[:self.__count] = column[:self.__count]
+			columns.append(grown)
+		self.__columns = columns
+		self.__capacity = capacity
+
+	def getChannels(self):
+		return list(self.__channels)
+
+	# Used to preallocate the arrays when the expected sample count is known in advance (e.g. duration / interval)
+	def reserve(self, count):
+		if count > self.__capacity:
+			self.__grow(count)
+
+	def clear(self):
+		self.__count = 0
+
+	# Discards all but the last `count` samples (e.g. once they have been written to a capture file).
+	# The kept samples are copied into new arrays, so views already handed out (e.g. to the live view) stay valid.
+	def trim(self, count):
+		start = max(0, self.__count - count)
+		self.__columns = [column[start:].copy() for column in self.__columns]
+		self.__capacity -= start
+		self.__count -= start
+
+	def append(self, timestamp, *values):
+		count = self.__count
+		if count == self.__capacity:
+			self.__grow(count + 1)
+		columns = self.__columns
+		columns[0][count] = timestamp
+		for column, value in zip(columns[1:], values):
+			column[count] = value
+		self.__count = count + 1
+
+	# Bulk append path: `timestamps` and each entry of `columns` are equal-length sequences or arrays
+	def extend(self, timestamps, *columns):
+		length = len(timestamps)
+		if length == 0:
+			return
+		start = self.__count
+		end = start + length
+		if end > self.__capacity:
+			self.__grow(end)
+		self.__columns[0][start:end] = timestamps
+		for column, values in zip(self.__columns[1:], columns):
+			column[start:end] = values
+		self.__count = end
+
+	def timestamps(self, start=0):
+		return self.__columns[0][start:self.__count]
+
+	def channel(self, index, start=0):
+		return self.__columns[index + 1][start:self.__count]
+
+	# Zero-copy views of (at most) the last `count` samples.
+	# The sample count is read once so that all views have the same length, even while another thread is appending.
+	def tail(self, count):
+		columns = self.__columns
+		end = self.__count
+		start = max(0, end - count)
+		return columns[0][start:end], [column[start:end] for column in columns[1:]]
@@ -0,0 +1,109 @@
+########################################
+# ***** IMPORTS *****
+from time import perf_counter
+
+from Config import *
+from DatagramChannel import DatagramChannel
+########################################
+
+# Runs any number of TestSessions concurrently on one thread and one UDP socket.
+# Every datagram is routed to the session registered for its source address (device IP and port), so the cost per
+# device is only the work done for its own datagrams, and no thread is needed per device.
+# With a `profiler` (a StageProfiler), each call to receive is timed as the "receive" stage (including the time spent
+# waiting for datagrams), with the datagrams drained as its items.
+# With RATE_ADAPTIVE, every session reports how far behind it is to its device every RATE_FEEDBACK_INTERVAL ms (see
+# `TestSession.sendFeedback`), along with the socket's backlog, which all the devices share.
+# A session whose device doesn't respond, or doesn't finish its test, by the session's deadline (see
+# `TestSession.getDeadline`) is timed out, so a silent device can't keep `run` from returning. Receiving times out at
+# the next deadline or feedback report, and otherwise blocks until datagrams arrive.
+class SessionManager:
+	def __init__(self, portInterface, profiler=None):
+		self.__portInterface = portInterface
+		self.__profiler = profiler
+		self.__sessions = {}
+		self.__channel = None
+		self.__channelStats = None
+		self.__cancelled = False
+
+	def addSession(self, session):
+		self.__sessions[session.getAddress()] = session
+
+	def getSessions(self):
+		return list(self.__sessions.values())
+
+	# Receive counters of the socket (see `DatagramChannel.getStats`), once `run` has returned
+	def getChannelStats(self):
+		return self.__channelStats
+
+	# Samples lost by all sessions, next to the datagrams the interface host's kernel dropped, which tells whether
+	# losses happened on the network or in this host (e.g. because the interface couldn't keep up)
+	def getLossReport(self):
+		stats = self.__channelStats or {}
+		lost = [session.getLink().getLost() for session in self.__sessions.values() if session.getLink().isSequenced()]
+		line = f"Socket: {stats.get('received', 0)} datagrams received | " + \
+				f"Samples Lost: {sum(lost) if lost else 'unknown'}"
+		if stats.get("kernelDrops") is not None:
+			line += f" | Dropped by this host (receive buffer full): {stats['kernelDrops']} datagrams"
+		if stats.get("truncated"):
+			line += f" | Truncated (longer than {BUFFER_SIZE} bytes): {stats['truncated']} datagrams"
+		return line
+
+	# Bytes waiting to be received (see `DatagramChannel.getBacklog`); None while not running, or if not reported.
+	# Called from another thread.
+	def getBacklog(self):
+		channel = self.__channel
+		return channel.getBacklog() if channel is not None else None
+
+	# Called from another thread (e.g. the GUI); the sessions are stopped by `run` once the channel wakes up
+	def cancel(self):
+		self.__cancelled = True
+		channel = self.__channel
+		if channel is not None:
+			channel.wake()
+
+	def __allFinished(self):
+		return all(session.isFinished() for session in self.__sessions.values())
+
+	# Blocks until every session has finished or `cancel` is called. Socket errors are raised to the caller.
+	def run(self):
+		self.__channel = DatagramChannel((INTERFACE_ADDRESS, self.__portInterface))
+		try:
+			for session in self.__sessions.values():
+				session.start(self.__channel.sendTo)
+			profiler = self.__profiler
+			feedbackDue = perf_counter() + RATE_FEEDBACK_INTERVAL / 1000
+			while not self.__cancelled and not self.__allFinished():
+				adaptive = [session for session in self.__sessions.values() if session.isAdaptive()]
+				due = [session.getDeadline() for session in self.__sessions.values() if session.getDeadline() is not None]
+				if adaptive:
+					due.append(feedbackDue)
+				timeout = max(min(due) - perf_counter(), 0) if due else None
+				if profiler is None:
+					datagrams = self.__channel.receive(timeout)
+				else:
+					start = profiler.now()
+					datagrams = self.__channel.receive(timeout)
+					profiler.record("receive", start, len(datagrams), "socket")
+				for data, address in datagrams:
+					session = self.__sessions.get(address)
+					if session is not None:	# Datagrams from unknown sources are ignored
+						session.processDatagram(data)
+				if adaptive and perf_counter() >= feedbackDue:
+					backlog = self.__channel.getBacklog()
+					for session in adaptive:
+						session.sendFeedback(backlog)
+					feedbackDue = perf_counter() + RATE_FEEDBACK_INTERVAL / 1000
+				now = perf_counter()
+				for session in self.__sessions.values():
+					deadline = session.getDeadline()
+					if deadline is not None and now >= deadline:
+						session.timeOut()
+			if self.__cancelled:
+				for session in self.__sessions.values():
+					session.cancel()
+		finally:
+			for session in self.__sessions.values():
+				session.close()	# Keeps everything received so far in the capture files, even after an error
+			self.__channelStats = self.__channel.getStats()
+			self.__channel.close()
+			self.__channel = None
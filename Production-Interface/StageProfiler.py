@@ -0,0 +1,129 @@
+########################################
+# ***** IMPORTS *****
+import json
+from time import perf_counter_ns
+
+from Config import *
+########################################
+
+# Lightweight timers for the stages of acquisition (see PROFILE_ENABLED), so a station that falls behind can tell
+# which stage is responsible without attaching a profiler. Callers hold None instead of a profiler when profiling is
+# disabled, so each hook costs one comparison then. Stages are timed on the monotonic `perf_counter_ns` clock:
+#   start = profiler.now()
+#   ...
+#   start = profiler.record("decode", start, samples, lane)	# Returns the end time, so stages can be chained
+# Each stage keeps its calls, items (e.g. samples), total and maximum time, and a histogram of its durations in
+# power-of-two nanosecond bins, so memory use doesn't grow with the test duration; percentiles are reported as the
+# upper edge of the bin they fall in. Gauges (e.g. the socket backlog) keep their latest and largest values.
+# With `trace`, the first PROFILE_TRACE_EVENTS timings are also kept as events, and can be written as a Chrome trace
+# (chrome://tracing or https://ui.perfetto.dev), with one lane per `lane` (e.g. per device).
+# Stages are recorded on one thread, and `snapshot` may be called from another.
+class StageProfiler:
+	__bins = 64	# Power-of-two nanosecond bins (enough for any duration)
+
+	def __init__(self, trace=False):
+		self.__stages = {}		# Stage -> [calls, items, total ns, maximum ns, histogram]
+		self.__gauges = {}		# Name -> [latest, largest]
+		self.__trace = trace
+		self.__events = []		# (stage, lane, start ns, duration ns, items)
+		self.__untraced = 0		# Events left out of the trace once it was full
+		self.__origin = perf_counter_ns()
+		self.__lastSnapshot = self.__origin
+		self.__previous = {}	# Stage -> (calls, items, total ns) at the previous snapshot
+
+	@staticmethod
+	def now():
+		return perf_counter_ns()
+
+	# Records a stage that started at `start` (from `now`) and has just ended; returns the end time
+	def record(self, stage, start, items=1, lane=""):
+		end = perf_counter_ns()
+		duration = end - start
+		stats = self.__stages.get(stage)
+		if stats is None:
+			stats = self.__stages[stage] = [0, 0, 0, 0, [0] * StageProfiler.__bins]
+		stats[0] += 1
+		stats[1] += items
+		stats[2] += duration
+		if duration > stats[3]:
+			stats[3] = duration
+		stats[4][min(duration.bit_length(), StageProfiler.__bins - 1)] += 1
+		if self.__trace:
+			if len(self.__events) < PROFILE_TRACE_EVENTS:
+				self.__events.append((stage, lane, start, duration, items))
+			else:
+				self.__untraced += 1
+		return end
+
+	# `value` of None (e.g. a backlog the platform doesn't report) is ignored
+	def gauge(self, name, value):
+		if value is None:
+			return
+		gauge = self.__gauges.get(name)
+		if gauge is None:
+			self.__gauges[name] = [value, value]
+		else:
+			gauge[0] = value
+			gauge[1] = max(gauge[1], value)
+
+	# Upper edge (ns) of the histogram bin of the given fraction of durations
+	def __percentile(self, counts, fraction):
+		target = fraction * sum(counts)
+		seen = 0
+		for index, count in enumerate(counts):
+			seen += count
+			if count and seen >= target:
+				return 2 ** index
+		return 0
+
+	# Plain-data totals per stage since the profiler was created, with rates (per second, and the fraction of the
+	# time spent in the stage) since the previous snapshot
+	def snapshot(self):
+		now = perf_counter_ns()
+		elapsed = max(now - self.__lastSnapshot, 1) / 1e9	# Seconds
+		self.__lastSnapshot = now
+		stages = {}
+		for stage, (calls, items, total, maximum, counts) in list(self.__stages.items()):
+			previousCalls, previousItems, previousTotal = self.__previous.get(stage, (0, 0, 0))
+			stages[stage] = {
+				"calls": calls,
+				"items": items,
+				"totalMs": total / 1e6,
+				"meanUs": total / calls / 1000 if calls else 0.0,
+				"p99Us": min(self.__percentile(list(counts), 0.99), maximum) / 1000,
+				"maxUs": maximum / 1000,
+				"callRate": (calls - previousCalls) / elapsed,
+				"itemRate": (items - previousItems) / elapsed,
+				"timeShare": (total - previousTotal) / 1e9 / elapsed
+			}
+			self.__previous[stage] = (calls, items, total)
+		return {
+			"elapsed": (now - self.__origin) / 1e9,	# Seconds
+			"stages": stages,
+			"gauges": {name: {"latest": latest, "largest": largest} \
+						for name, (latest, largest) in list(self.__gauges.items())},
+			"traced": len(self.__events),
+			"untraced": self.__untraced
+		}
+
+	# Trace events as (stage, lane, start ns, duration ns, items) tuples (see `writeTrace`)
+	def getEvents(self):
+		return list(self.__events)
+
+	# Writes the events of one or more processes, given as (process name, events) pairs, as a Chrome trace (JSON).
+	# Every process times its events on the same system-wide monotonic clock, so they line up.
+	@staticmethod
+	def writeTrace(path, processes):
+		trace = []
+		for pid, (process, events) in enumerate(processes, 1):
+			trace.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": process}})
+			lanes = {}
+			for stage, lane, start, duration, items in events:
+				if lane not in lanes:
+					lanes[lane] = len(lanes)
+					trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lanes[lane], \
+									"args": {"name": lane or process}})
+				trace.append({"name": stage, "ph": "X", "pid": pid, "tid": lanes[lane], "ts": start / 1000, \
+								"dur": duration / 1000, "args": {"items": items}})
+		with open(path, "w") as file:
+			json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,219 @@
+########################################
+# ***** IMPORTS *****
+import argparse
+import random
+import socket
+import struct
+import threading
+import time
+
+from ChannelSchema import ChannelSchema
+from Config import *
+########################################
+
+# Scriptable stand-in for the C++ device (Production-Device), speaking the same ID/TEST/STATUS protocol, including
+# the binary framing, batching and sequence numbering START parameters. Unlike `Program`, it is configured from the
+# command line rather than stdin, and can override the requested rate with a sub-millisecond interval and send samples
+# in bursts, so it can be used as a load source for benchmarks (see LoopbackBenchmark.py).
+# As on the device, the STOPPED message also carries SENT=<samples> (so a receiver can work out how many were lost)
+# and the requested and achieved rates.
+# It announces and sends `channelCount` channels (see `schema`), so wide devices can be simulated.
+# It supports the aggregation mode (AGGREGATE= and TAIL= in the START command) as the device does, sending each window
+# of samples as one aggregate record (see `StatusCodec.decodeAggregate`).
+#
+# Usage: python3 StandInDevice.py --port 9100 [--address 127.0.0.1] [--interval-us 250] [--burst 4] [--channels 8]
+class StandInDevice:
+	def __init__(self, address, model="StandIn", serial="1", intervalOverride=0, burst=1, channelCount=2):
+		self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.__socket.bind(address)
+		self.__model = model
+		self.__serial = serial
+		self.__intervalOverride = intervalOverride	# Microseconds (0 = use the RATE= requested by the interface)
+		self.__burst = max(burst, 1)				# Samples generated back-to-back per tick
+		self.__schema = StandInDevice.schema(channelCount)
+		# Generated values fit the channel's type on the wire
+		self.__limits = [min(STANDIN_SIGNAL_LIMIT, 2 ** (8 * struct.calcsize(code) - code.islower())) \
+							for code in self.__schema.getRecordFormat()[2:]]
+		self.__clients = {}							# Address -> cancellation event of the running test
+		self.__lock = threading.Lock()
+
+	# The channels of STATUS_DEFAULT_SCHEMA, followed by i16 channels CH3, CH4, ... up to `channelCount` channels
+	@staticmethod
+	def schema(channelCount=2):
+		channels = ChannelSchema.default().encode().split(",")[:channelCount]
+		channels += [f"CH{number}:i16:mV:Channel {number}" for number in range(len(channels) + 1, channelCount + 1)]
+		return ChannelSchema.parse(",".join(channels))
+
+	def getAddress(self):
+		return self.__socket.getsockname()
+
+	def __getMessageValue(self, message, key, default=""):
+		for field in message.split(MSG_DELIMITER)[1:]:
+			name, separator, value = field.partition("=")
+			if separator and name == key:
+				return value
+		return default
+
+	def serve(self):
+		while True:
+			try:
+				data, client = self.__socket.recvfrom(BUFFER_SIZE)
+			except OSError:
+				return	# Socket closed by `close`
+			message = data.decode('utf-8')
+			messageType = message.split(MSG_DELIMITER)[0]
+			if messageType == MSG_TYPE_DISCOVERY:
+				self.__send(f"ID;MODEL={self.__model};Serial={self.__serial};FORMATS={MSG_FORMAT_TEXT},{MSG_FORMAT_BINARY};" + \
+							f"MODES={MSG_MODE_RAW},{MSG_MODE_AGGREGATE};CHANNELS={self.__schema.encode()};", client)
+			elif messageType == MSG_TYPE_TEST and self.__getMessageValue(message, "CMD") == "START":
+				self.__start(message, client)
+			elif messageType == MSG_TYPE_TEST and self.__getMessageValue(message, "CMD") == "STOP":
+				with self.__lock:
+					cancelled = self.__clients.get(client)
+				if cancelled is not None:
+					cancelled.set()
+
+	def close(self):
+		with self.__lock:
+			for cancelled in self.__clients.values():
+				cancelled.set()
+		self.__socket.close()
+
+	def __send(self, message, client):
+		self.__socket.sendto(message if isinstance(message, bytes) else bytes(message, "utf-8"), client)
+
+	def __start(self, message, client):
+		with self.__lock:
+			if client in self.__clients and not self.__clients[client].is_set():
+				self.__send("TEST;RESULT=ERROR;MSG=Test was already started", client)
+				return
+			cancelled = threading.Event()
+			self.__clients[client] = cancelled
+		config = {
+			"duration": int(self.__getMessageValue(message, "DURATION")) * 1000,	# Microseconds
+			"interval": self.__intervalOverride or int(self.__getMessageValue(message, "RATEUS") or \
+														int(self.__getMessageValue(message, "RATE")) * 1000),
+			"binary": self.__getMessageValue(message, "FORMAT") == MSG_FORMAT_BINARY,
+			"batchSize": max(int(self.__getMessageValue(message, "BATCH", "1")), 1),
+			"batchWindow": int(self.__getMessageValue(message, "BATCHWINDOW", "0")) * 1000,	# Microseconds
+			"sequenced": self.__getMessageValue(message, "SEQ") == "1"
+		}
+		# Samples per window (0 = every sample is sent) and raw samples sent with each window, capped as on the device
+		aggregate = int(self.__getMessageValue(message, "AGGREGATE", "0"))	# Milliseconds
+		config["window"] = max(aggregate * 1000 // config["interval"], 1) if aggregate > 0 else 0
+		config["tail"] = min(int(self.__getMessageValue(message, "TAIL", "0")), config["window"], \
+								(BUFFER_SIZE - 5 - self.__windowSize(0)) // struct.calcsize(self.__schema.getRecordFormat()))
+		config["sequenced"] = config["sequenced"] or config["window"] > 0	# Aggregate datagrams are always sequenced
+		if config["window"]:
+			self.__send(f"TEST;RESULT=STARTED;WINDOW={config['window']};TAIL={config['tail']};", client)
+		else:
+			self.__send("TEST;RESULT=STARTED;", client)
+		threading.Thread(target=self.__stream, args=(config, client, cancelled), daemon=True).start()
+
+	# Paced against absolute deadlines, so the achieved rate doesn't drift with the cost of sending
+	def __stream(self, config, client, cancelled):
+		record = struct.Struct(self.__schema.getRecordFormat())
+		interval = config["interval"]
+		recordsPerBatch = config["batchSize"]
+		if config["batchWindow"] > 0:
+			recordsPerBatch = min(recordsPerBatch, max(config["batchWindow"] // interval, 1))
+		# Leaves room for the largest header (magic/prefix and sequence number)
+		textSize = len("TIME=;") + 10 + sum(len(f"{name}=;") + 11 for name in self.__schema.getNames())	# Per sample, at most
+		maxRecords = (BUFFER_SIZE - 5) // record.size if config["binary"] else \
+						(BUFFER_SIZE - len(STATUS_SEQUENCE_PREFIX) - 11) // textSize
+		recordsPerBatch = min(recordsPerBatch, maxRecords)
+		if config["window"]:	# Records are windows instead of samples
+			recordsPerBatch = min(config["batchSize"], (BUFFER_SIZE - 5) // self.__windowSize(config["tail"]))
+			if config["batchWindow"] > 0:
+				recordsPerBatch = min(recordsPerBatch, max(config["batchWindow"] // (interval * config["window"]), 1))
+		batch = []		# Samples, or encoded windows
+		batched = 0		# Samples in `batch`
+		window = []
+		sent = 0
+		lag = 0
+		start = last = time.perf_counter()
+		ticks = config["duration"] // (interval * self.__burst) + 1
+		for tick in range(ticks):
+			if cancelled.is_set():
+				break
+			last = time.perf_counter()
+			lag = max(lag, last - start - tick * interval * self.__burst / 1e6)
+			for sample in range(self.__burst):
+				elapsed = (tick * self.__burst + sample) * interval // 1000	# Milliseconds
+				generated = (elapsed, *(random.randrange(limit) for limit in self.__limits))
+				if config["window"]:
+					window.append(generated)
+					if len(window) < config["window"]:
+						continue
+					batch.append(self.__encodeWindow(window, config["tail"], record))
+					batched += len(window)
+					window = []
+				else:
+					batch.append(generated)
+					batched += 1
+				if len(batch) >= recordsPerBatch:
+					self.__sendBatch(batch, sent if config["sequenced"] else None, config, record, client)
+					sent += batched
+					batch = []
+					batched = 0
+			delay = start + (tick + 1) * interval * self.__burst / 1e6 - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+		if window:	# The samples left over (end of test or cancellation)
+			batch.append(self.__encodeWindow(window, config["tail"], record))
+			batched += len(window)
+		if batch:
+			self.__sendBatch(batch, sent if config["sequenced"] else None, config, record, client)
+			sent += batched
+		if not cancelled.is_set():
+			achieved = (sent - self.__burst) / (last - start) if last > start else 0.0	# The last tick's burst is sent at `last`
+			self.__send(f"TEST;RESULT=STOPPED;SENT={sent};REQUESTEDHZ={1e6 / interval:f};ACHIEVEDHZ={achieved:f};" + \
+						f"MAXLAGUS={int(lag * 1e6)};", client)
+		cancelled.set()
+
+	# Bytes of an aggregate record with a tail of `tail` samples
+	def __windowSize(self, tail):
+		return 12 + 12 * len(self.__schema) + tail * struct.calcsize(self.__schema.getRecordFormat())
+
+	# Aggregate record of the `samples` of a window, as on the device (its start and end time, count, minima, maxima,
+	# means, and the last `tail` samples, zero-filled)
+	def __encodeWindow(self, samples, tail, record):
+		channels = list(zip(*samples))[1:]
+		tailRecords = b"".join(record.pack(*sample) for sample in samples[-tail:]) if tail else b""
+		return struct.pack(f"<iiI{len(channels)}i{len(channels)}i{len(channels)}f", samples[0][0], samples[-1][0], \
+							len(samples), *map(min, channels), *map(max, channels), \
+							*(sum(values) / len(values) for values in channels)) + \
+				tailRecords.ljust(tail * record.size, b"\x00")
+
+	# `sequence` is the sequence number of the first sample in the batch (None if not requested)
+	def __sendBatch(self, batch, sequence, config, record, client):
+		if config["window"]:
+			self.__send(STATUS_AGGREGATE_MAGIC + struct.pack("<I", sequence) + b"".join(batch), client)
+		elif config["binary"]:
+			header = STATUS_BINARY_MAGIC if sequence is None else STATUS_SEQUENCED_MAGIC + struct.pack("<I", sequence)
+			self.__send(header + b"".join(record.pack(*sample) for sample in batch), client)
+		else:
+			header = "STATUS;" if sequence is None else f"{STATUS_SEQUENCE_PREFIX}{sequence};"
+			names = ["TIME"] + self.__schema.getNames()
+			self.__send(header + "".join("".join(f"{name}={value};" for name, value in zip(names, sample)) \
+											for sample in batch), client)
+
+# ***** EXECUTION *****
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(prog="StandInDevice", description="Stand-in production device for benchmarks")
+	parser.add_argument("--address", default="127.0.0.1")
+	parser.add_argument("--port", type=int, required=True)
+	parser.add_argument("--model", default="StandIn")
+	parser.add_argument("--serial", default="1")
+	parser.add_argument("--interval-us", type=int, default=0, help="Sample interval overriding the requested rate")
+	parser.add_argument("--burst", type=int, default=1, help="Samples generated back-to-back per tick")
+	parser.add_argument("--channels", type=int, default=2, choices=range(1, STATUS_MAX_CHANNELS + 1), metavar="N", \
+						help="Channels per sample")
+	options = parser.parse_args()
+	device = StandInDevice((options.address, options.port), options.model, options.serial, options.interval_us, \
+							options.burst, options.channels)
+	print(f"READY {options.address}:{device.getAddress()[1]}", flush=True)	# Lets a parent process wait for the socket
+	try:
+		device.serve()
+	except KeyboardInterrupt:
+		device.close()
@@ -0,0 +1,121 @@
+########################################
+# ***** IMPORTS *****
+import struct
+
+import numpy
+
+from Config import *
+########################################
+
+# Decodes STATUS datagrams into a SampleStore, for the channels of one device (see ChannelSchema).
+# Two framings are supported, each carrying one or more samples per datagram (see the BATCH= START parameter):
+#   TEXT:	"STATUS;" followed by "TIME=<ms>;<channel>=<value>;..." per sample (always available as a fallback)
+#   BINARY:	STATUS_BINARY_MAGIC followed by one little-endian record per sample: an int32 time, then one field per
+#			channel, of the channel's type
+# When the interface requests SEQ=1, each datagram also carries the sequence number of its first sample (samples are
+# numbered from 0 at the start of the test): text datagrams start with "STATUS;SEQ=<n>;", and binary datagrams start
+# with STATUS_SEQUENCED_MAGIC and a little-endian uint32 sequence number instead of STATUS_BINARY_MAGIC.
+# Both decode methods return (sequence, samples decoded), with a sequence of None for unsequenced datagrams.
+# In aggregation mode (see AGGREGATE= in the START command), the device summarises each window of consecutive samples
+# in one record instead, and each datagram starts with STATUS_AGGREGATE_MAGIC and the uint32 sequence number of the
+# first sample of its first window. A record is an int32 start time, int32 end time and uint32 sample count, then the
+# int32 minimum of each channel, the int32 maximum of each channel and the float32 mean of each channel, then the
+# binary records of the window's last samples (its tail, zero-filled if the window has fewer samples). The tail's
+# length is fixed for the test, and confirmed by the device when it starts (see `aggregate`).
+# The record layouts are compiled once per schema (a struct for single samples and a numpy record type for batches),
+# and text samples are split in one pass whatever the number of channels, so no per-field work is done in Python.
+# The binary framing is only used when the device advertises it in its ID response and the interface requests it
+# in the START command (see `TestSession.__processMessage`).
+class StatusCodec:
+	def __init__(self, schema):
+		self.__fieldCount = len(schema) + 1
+		self.__record = struct.Struct(schema.getRecordFormat())
+		# Records of int32 fields only are read as a plain 2D array, and others as structured records
+		self.__uniform = schema.getTypes() == ["i32"] * len(schema)
+		self.__fields = numpy.dtype([(name, "<" + STATUS_CHANNEL_TYPES[channelType]) for name, channelType \
+										in zip(["TIME"] + schema.getNames(), ["i32"] + schema.getTypes())])
+		self.__recordType = numpy.dtype("<i4") if self.__uniform else self.__fields
+		self.__sequence = struct.Struct("<I")
+		self.__channelCount = len(schema)
+		self.aggregate(0)
+
+	def getRecordSize(self):
+		return self.__record.size
+
+	def isBinary(self, data):
+		return data[:1] == STATUS_BINARY_MAGIC or data[:1] == STATUS_SEQUENCED_MAGIC
+
+	def isAggregate(self, data):
+		return data[:1] == STATUS_AGGREGATE_MAGIC
+
+	# Lays out aggregate records for windows sent with a tail of `tail` samples
+	def aggregate(self, tail):
+		fields = [("start", "<i4"), ("end", "<i4"), ("count", "<u4"), ("minima", "<i4", (self.__channelCount,)), \
+					("maxima", "<i4", (self.__channelCount,)), ("means", "<f4", (self.__channelCount,))]
+		if tail > 0:
+			fields.append(("tail", self.__fields, (tail,)))
+		self.__windowType = numpy.dtype(fields)
+		self.__tail = tail
+
+	# A whole batch is decoded with one `frombuffer` call and appended to the store with one bulk `extend`. A partial
+	# record at the end (e.g. of a datagram longer than BUFFER_SIZE, truncated by DatagramChannel) is ignored, and a
+	# datagram too short for its sequence number holds no samples.
+	def decodeBinary(self, data, store):
+		sequence = None
+		offset = len(STATUS_BINARY_MAGIC)
+		if data[:1] == STATUS_SEQUENCED_MAGIC:
+			if len(data) < offset + self.__sequence.size:
+				return None, 0
+			sequence = self.__sequence.unpack_from(data, offset)[0]
+			offset += self.__sequence.size
+		count = (len(data) - offset) // self.__record.size
+		if count == 1:
+			store.append(*self.__record.unpack_from(data, offset))
+			return sequence, 1
+		if self.__uniform:
+			records = numpy.frombuffer(data, dtype=self.__recordType, count=count * self.__fieldCount, \
+										offset=offset).reshape(-1, self.__fieldCount)
+			store.extend(*records.T)
+		else:
+			records = numpy.frombuffer(data, dtype=self.__recordType, count=count, offset=offset)
+			store.extend(*(records[field] for field in self.__recordType.names))
+		return sequence, count
+
+	# Single split per message: with "=" folded into the delimiter, the values sit at every second position
+	def decodeText(self, message, store):
+		sequence = None
+		values = message.replace("=", MSG_DELIMITER).split(MSG_DELIMITER)[2::2]
+		if message.startswith(STATUS_SEQUENCE_PREFIX):
+			sequence = int(values[0])
+			values = values[1:]
+		if len(values) == self.__fieldCount:
+			store.append(*map(int, values))
+			return sequence, 1
+		records = numpy.array(values, dtype=numpy.int32).reshape(-1, self.__fieldCount)
+		store.extend(*records.T)
+		return sequence, len(records)
+
+	# Each window is stored as the minimum of each channel at its start time, then its tail, then the maximum of each
+	# channel at its end time, so the store (and the live view) holds the same envelope a DisplayPyramid bucket of its
+	# samples would. Returns (sequence, samples summarised, windows, points stored), where `windows` is a record array
+	# with the fields of the layout above. As in `decodeBinary`, a partial record at the end is ignored.
+	def decodeAggregate(self, data, store):
+		offset = len(STATUS_AGGREGATE_MAGIC) + self.__sequence.size
+		if len(data) < offset:
+			return None, 0, numpy.empty(0, dtype=self.__windowType), 0
+		sequence = self.__sequence.unpack_from(data, len(STATUS_AGGREGATE_MAGIC))[0]
+		windows = numpy.frombuffer(data, dtype=self.__windowType, count=(len(data) - offset) // self.__windowType.itemsize, \
+									offset=offset)
+		counts = windows["count"]
+		present = numpy.ones((len(windows), self.__tail + 2), dtype=bool)	# Points of each window that hold a sample
+		present[:, 1:-1] = numpy.arange(self.__tail) < numpy.minimum(counts, self.__tail)[:, None]
+		columns = []
+		for index, field in enumerate(self.__fields.names):
+			points = numpy.empty(present.shape, dtype=numpy.int32)
+			points[:, 0] = windows["start"] if index == 0 else windows["minima"][:, index - 1]
+			points[:, -1] = windows["end"] if index == 0 else windows["maxima"][:, index - 1]
+			if self.__tail:
+				points[:, 1:-1] = windows["tail"][field]
+			columns.append(points[present])
+		store.extend(*columns)
+		return sequence, int(counts.sum()), windows, len(columns[0])
@@ -0,0 +1,143 @@
+########################################
+# ***** IMPORTS *****
+from collections import deque
+import math
+
+import numpy
+
+from Config import *
+########################################
+
+# Online statistics of every channel of a test, updated as each datagram's samples arrive, so the end-of-test
+# summary costs the same however long the test ran (no pass over the samples is needed).
+#   Running		count, minimum, maximum, mean and variance, with each batch merged into the totals by Welford's
+#				parallel (Chan et al.) update, which stays accurate for long tests with large values
+#   Percentiles	A relative-error sketch (as DDSketch): |value| is counted in log-spaced bins that grow by a factor of
+#				(1 + STATS_SKETCH_ACCURACY) / (1 - STATS_SKETCH_ACCURACY), so any percentile is within
+#				STATS_SKETCH_ACCURACY of the true value, in a fixed amount of memory. Each channel's row of bins runs
+#				from the most negative values, through a bin for zero (in the middle), to the most positive values.
+#   Window		Minimum, maximum and mean of the last STATS_WINDOW ms, kept as one partial sum per datagram
+# Tests in aggregation mode are summarised from the device's windows instead of samples (see `updateWindows`).
+class StreamingStats:
+	def __init__(self, channels):
+		self.__channels = list(channels)
+		channelCount = len(self.__channels)
+		self.__count = 0
+		self.__mean = numpy.zeros(channelCount)
+		self.__m2 = numpy.zeros(channelCount)		# Sum of squared differences from the mean
+		self.__minimum = numpy.full(channelCount, numpy.inf)
+		self.__maximum = numpy.full(channelCount, -numpy.inf)
+		self.__logGamma = math.log((1 + STATS_SKETCH_ACCURACY) / (1 - STATS_SKETCH_ACCURACY))
+		self.__bins = math.ceil(math.log(2 ** 31) / self.__logGamma) + 1	# Per sign (enough for any int32 magnitude)
+		self.__sketch = numpy.zeros((channelCount, 2 * self.__bins + 1), dtype=numpy.int64)
+		self.__window = deque()	# (end time, count, sums, minima, maxima) per update
+
+	# `timestamps` and each of `channels` are equal-length arrays of new samples
+	def update(self, timestamps, channels):
+		count = len(timestamps)
+		if count == 0:
+			return
+		data = numpy.array(channels, dtype=numpy.float64)	# One row per channel
+		mean = data.mean(axis=1)
+		self.__merge(count, mean, ((data - mean[:, None]) ** 2).sum(axis=1), data.min(axis=1), data.max(axis=1), \
+						int(timestamps[-1]), data.sum(axis=1))
+		self.__addToSketch(data)
+
+	# Windows of samples summarised by the device (see `StatusCodec.decodeAggregate`): `ends` and `counts` are arrays
+	# with one entry per window, and `minima`, `maxima` and `means` arrays with one row per window and one column per
+	# channel. The count, minimum, maximum and mean are exact, but as the samples themselves aren't known, the spread
+	# within each window is taken as zero: the standard deviation and percentiles are those of the window means
+	# (weighted by their sample counts).
+	def updateWindows(self, ends, counts, minima, maxima, means):
+		if len(counts) == 0:
+			return
+		weights = numpy.asarray(counts, dtype=numpy.float64)
+		count = int(weights.sum())
+		data = numpy.asarray(means, dtype=numpy.float64).T	# One row per channel
+		sums = (data * weights).sum(axis=1)
+		mean = sums / count
+		self.__merge(count, mean, (weights * (data - mean[:, None]) ** 2).sum(axis=1), numpy.min(minima, axis=0), \
+						numpy.max(maxima, axis=0), int(ends[-1]), sums)
+		self.__addToSketch(data, weights)
+
+	# Merges a batch of `count` samples (with the given mean, sum of squared differences from the mean, minimum,
+	# maximum and sum per channel, ending at time `end`) into the totals and the window
+	def __merge(self, count, mean, m2, minimum, maximum, end, sums):
+		total = self.__count + count
+		delta = mean - self.__mean
+		self.__mean += delta * count / total
+		self.__m2 += m2 + delta ** 2 * self.__count * count / total
+		self.__count = total
+		numpy.minimum(self.__minimum, minimum, out=self.__minimum)
+		numpy.maximum(self.__maximum, maximum, out=self.__maximum)
+		self.__window.append((end, count, sums, minimum, maximum))
+		while self.__window[0][0] < end - STATS_WINDOW:
+			self.__window.popleft()
+
+	# All channels are counted with one `bincount`, by offsetting each channel's bins to its own row; each value is
+	# counted `weights` times (once if not given)
+	def __addToSketch(self, data, weights=None):
+		width = self.__sketch.shape[1]
+		bins = numpy.ceil(numpy.log(numpy.maximum(numpy.abs(data), 1)) / self.__logGamma) + 1
+		bins = (self.__bins + numpy.sign(data) * bins).astype(numpy.int64)	# Zero maps to the middle bin
+		bins += numpy.arange(len(data))[:, None] * width
+		if weights is not None:
+			weights = numpy.tile(weights, len(data))
+		counts = numpy.bincount(bins.ravel(), weights=weights, minlength=self.__sketch.size)
+		self.__sketch += counts.astype(numpy.int64).reshape(self.__sketch.shape)
+
+	def getCount(self):
+		return self.__count
+
+	# (min, max, average) per channel, as in `TestSession.getSummary`
+	def getSummary(self):
+		if self.__count == 0:
+			return []
+		return [(int(minimum), int(maximum), float(mean)) for minimum, maximum, mean \
+				in zip(self.__minimum, self.__maximum, self.__mean)]
+
+	def getStandardDeviation(self, index):
+		return math.sqrt(self.__m2[index] / (self.__count - 1)) if self.__count > 1 else 0.0
+
+	# Estimate of the `percentile` (0 - 100) of a channel, within STATS_SKETCH_ACCURACY of the true value, and never
+	# outside the channel's observed range
+	def getPercentile(self, index, percentile):
+		if self.__count == 0:
+			return 0.0
+		rank = percentile / 100 * (self.__count - 1)
+		bin = int(numpy.searchsorted(numpy.cumsum(self.__sketch[index]), rank, side="right")) - self.__bins
+		estimate = 0.0
+		if bin != 0:
+			# Midpoint (in relative terms) of the bin, so the relative error is at most STATS_SKETCH_ACCURACY
+			gamma = math.exp(self.__logGamma)
+			estimate = math.copysign(2 * gamma ** (abs(bin) - 1) / (gamma + 1), bin)
+		return float(min(max(estimate, self.__minimum[index]), self.__maximum[index]))
+
+	# Minimum, maximum and mean per channel over (about) the last STATS_WINDOW ms
+	def getWindow(self):
+		window = list(self.__window)
+		if not window:
+			return []
+		count = sum(entry[1] for entry in window)
+		sums = numpy.sum([entry[2] for entry in window], axis=0)
+		minima = numpy.min([entry[3] for entry in window], axis=0)
+		maxima = numpy.max([entry[4] for entry in window], axis=0)
+		return [(int(minimum), int(maximum), float(total / count)) for minimum, maximum, total in zip(minima, maxima, sums)]
+
+	def getReport(self):
+		window = self.getWindow()
+		report = {}
+		for index, channel in enumerate(self.__channels):
+			if self.__count == 0:
+				report[channel] = {"count": 0}
+				continue
+			report[channel] = {
+				"count": self.__count,
+				"min": int(self.__minimum[index]),
+				"max": int(self.__maximum[index]),
+				"mean": float(self.__mean[index]),
+				"stdDev": self.getStandardDeviation(index),
+				"percentiles": {f"p{percentile}": self.getPercentile(index, percentile) for percentile in STATS_PERCENTILES},
+				"window": {"span": STATS_WINDOW, "min": window[index][0], "max": window[index][1], "mean": window[index][2]}
+			}
+		return report
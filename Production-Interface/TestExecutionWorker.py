@@ -15,16 +15,29 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
+import os
 import socket
+import sqlite3
 from datetime import datetime
 from sys import argv
 from sys import exit
 from time import sleep
 from threading import Thread
 
+from AcquisitionProcess import AcquisitionProcess
+from ChannelSchema import ChannelSchema
 from Config import *
+from RemoteSession import RemoteSession
+from ReplayManager import ReplayManager
+from ReportRenderer import ReportRenderer
+from ResultsDatabase import ResultsDatabase
+from SampleRing import SampleRing
+from SampleStore import SampleStore
+from StageProfiler import StageProfiler
 ########################################
 
+# Runs a test from a QThread of the GUI. The test itself runs in an AcquisitionProcess; the worker relays its progress
+# messages and session states to the GUI, and saves the reports and results once it has finished.
 class TestExecutionWorker(QObject):
 	progress = pyqtSignal(str)
 	cancelled = pyqtSignal()
@@ -32,221 +45,219 @@ class TestExecutionWorker(QObject):
 	
 	def __init__(self):
 		super().__init__()
-		self.__IPDevice = "0.0.0.0"
-		self.__portDevice = 0
+		self.__devices = []	# (IP address, port number) per device under test
 		self.__portInterface = 0
 		self.__duration = 0	# Milliseconds
 		self.__interval = 0	# Milliseconds
 		self.__outputFormat = ""
 		self.__generateFile = False
 		self.__destination = ""
-		self.__canvas = None
-		self.__timestamps = []
-		self.__mvData = []
-		self.__maData = []
-		self.__displayTimestamps = []
-		self.__displaymvData = []
-		self.__displaymaData = []
-		self.__displayFrequencyFilter = 0
-		self.__displayFrameCounter = 0
-		self.__mvMin = 0
-		self.__mvMax = 0
-		self.__mvAvg = 0
-		self.__maMin = 0
-		self.__maMax = 0
-		self.__maAvg = 0
-		self.__messages = []
-		self.__displayCount = 0
-		self.__deviceName = ""
-		self.__UDPSocket = None
-		self.__running = False
-		self.__receivingMessages = False
-		self.__endedByDevice = False
-		self.__endedByInterface = False
+		self.__displayScale = LIVE_DISPLAY_STEPS // 2
+		self.__sessions = []		# RemoteSession per device under test
+		self.__rings = []			# SampleRings, reused from test to test (see `shutdown`)
+		self.__job = None			# Test description for the acquisition process (see `__createJob`)
+		self.__acquisition = None
+		self.__replaying = False
+		self.__renderer = ReportRenderer()
+		self.__emptyStore = SampleStore([], capacity=1)	# Shown by the live view before any session exists
+		self.__profile = None				# Latest stage timings of the acquisition process (see StageProfiler)
+		self.__liveViewProfiler = None		# Returns the live view's StageProfiler (see `setLiveViewProfiler`)
 
-	def updateParameters(self, IPDevice, portDevice, portInterface, duration, interval, outputFormat, \
-							displayCount, generateFile, destination, canvas, timestamps, mvData, maData):
-		self.__IPDevice = IPDevice
-		self.__portDevice = portDevice
+	def updateParameters(self, devices, portInterface, duration, interval, outputFormat, \
+							displayScale, generateFile, destination):
+		self.__devices = list(devices)
 		self.__portInterface = portInterface
 		self.__duration = duration * 1000		# Convert seconds to milliseconds
 		self.__interval = interval			# Milliseconds
 		self.__outputFormat = outputFormat
-		self.__displayCount = displayCount
+		self.__displayScale = displayScale
 		self.__generateFile = generateFile
 		self.__destination = destination
-		self.__canvas = canvas
-		self.__timestamps = timestamps
-		self.__mvData = mvData
-		self.__maData = maData
-		self.__displayFrequencyFilter = max(LIVE_DISPLAY_FREQENCY / self.__interval, 1)
-	
-	def __safePath(self, path):
-		return path.replace('\\', '_').replace('/', '_').replace(':', '_').replace('*', '_').replace('?', '_').replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_').replace('.', '_') # Remove problematic path characters
+		self.__createSessions()
+		self.__job = self.__createJob(devices=self.__devices, portInterface=self.__portInterface, \
+										duration=self.__duration, interval=self.__interval, replay=[], speed=0)
+		self.__replaying = False
 
-	def __saveGraph(self):
-		dateString = datetime.today().strftime("%Y-%m-%d")
-		fileName = f"Production Test Data | {self.__deviceName} | {dateString}"
-		figure, axes = pyplot.subplots()
-		pyplot.rcParams["figure.figsize"] = [8.00, 4.00]
-		pyplot.rcParams["figure.autolayout"] = True
-		pyplot.grid()
-		pyplot.margins(x=0, y=0)
-		pyplot.suptitle(fileName, fontsize=12)
-		dataLine1 = f"Voltage Range: {self.__mvMin}-{self.__mvMax} (Average={round(self.__mvAvg, 3)})"
-		dataLine2 = f"Current Range: {self.__maMin}-{self.__maMax} (Average={round(self.__maAvg, 3)})"
-		pyplot.title(f"{dataLine1} .... {dataLine2}", fontsize=10)
-		pyplot.xlabel("Time (seconds)")
-		pyplot.ylabel("Level (mV/mA)")
-		pyplot.plot(self.__timestamps, self.__mvData, 'b.-', linewidth=1, markersize=1, label="Voltage")
-		pyplot.plot(self.__timestamps, self.__maData, 'r.-', linewidth=1, markersize=1, label="Current")
-		pyplot.legend()
-		pyplot.xlim(0, self.__timestamps[-1])
-		pyplot.ylim(0, max(max(self.__mvData), max(self.__maData)))
-		figure.canvas.draw()
-		xLabels = [label.get_text() for label in axes.get_xticklabels()]
-		axes.set_xticklabels(xLabels, rotation=45, horizontalalignment='right')
-		if self.__outputFormat == PDF:
-			PdfPages.savefig(f"{self.__destination}/{self.__safePath(fileName)}.pdf", bbox_inches='tight')
-		elif self.__outputFormat == PNG:
-			pyplot.savefig(f"{self.__destination}/{self.__safePath(fileName)}.png", dpi=300, bbox_inches='tight')
-		elif self.__outputFormat == SVG:
-			pyplot.savefig(f"{self.__destination}/{self.__safePath(fileName)}.svg", dpi=300, bbox_inches='tight')
-		else:
-			self.__printOut("Invalid output format selected")
+	# Replays recorded tests (see ReplayManager) through the same processing path as a live test, at `speed` times
+	# real time (0 = as fast as possible). Raises OSError/ValueError if a recording can't be read.
+	def updateReplayParameters(self, paths, speed, outputFormat, displayScale, generateFile, destination):
+		recordings = [ReplayManager.loadMetadata(path) for path in paths]	# The recordings are loaded for the replay
+		self.__devices = [ReplayManager.replayAddress(index) for index in range(len(paths))]
+		self.__duration = max(metadata["duration"] for metadata in recordings)
+		self.__interval = min(metadata["interval"] for metadata in recordings)
+		self.__outputFormat = outputFormat
+		self.__displayScale = displayScale
+		self.__generateFile = generateFile
+		self.__destination = destination
+		self.__createSessions()
+		self.__job = self.__createJob(replay=list(paths), speed=speed)
+		self.__replaying = True
+
+	# Rings are only ever added, as the live view may still be showing samples from the previous test
+	def __createSessions(self):
+		while len(self.__rings) < len(self.__devices):
+			self.__rings.append(SampleRing())
+		for ring in self.__rings:
+			ring.reset()
+		self.__sessions = [RemoteSession(IPDevice, portDevice, ring) for (IPDevice, portDevice), ring \
+							in zip(self.__devices, self.__rings)]
+		self.__acquisition = AcquisitionProcess()
+		self.__profile = None
+
+	# `parameters` are the devices or recordings to test (see `AcquisitionProcess.createSessions`)
+	def __createJob(self, **parameters):
+		job = {
+			"rings": [ring.getName() for ring in self.__rings[:len(self.__devices)]],
+			"destination": self.__destination,
+			"formats": [] if not self.__generateFile else \
+						(OUTPUT_FORMATS if self.__outputFormat == ALL_FORMATS else [self.__outputFormat]),
+			"profile": PROFILE_ENABLED,
+			"trace": PROFILE_ENABLED and PROFILE_TRACE
+		}
+		job.update(parameters)
+		return job
 	
 	def __printOut(self, text):
-		self.__progress.emit(str(text))
+		self.progress.emit(str(text))
+
+	# Session messages are prefixed with the device name when more than one device is being tested
+	def __sessionLog(self, index):
+		def log(text):
+			if len(self.__sessions) > 1:
+				text = f"[{self.__sessions[index].getDeviceName()}] {text}"
+			self.__printOut(text)
+		return log
 	
+	# Reports are rendered in other processes, so the next test can start while they're being written
+	def __saveReport(self, session, log):
+		future = self.__renderer.submit(session.getReportJob())
+		future.add_done_callback(lambda future: self.__reportSaved(future, log))
+
+	# Every run is recorded, including cancelled and failed ones (see ResultsDatabase)
+	def __recordResults(self):
+		try:
+			database = ResultsDatabase()
+			try:
+				for session in self.__sessions:
+					if session.getResults() is not None:
+						database.record(session.getResults())
+			finally:
+				database.close()
+		except sqlite3.Error as error:
+			self.__printOut(f"ERROR: Test results could not be recorded: {error}")
+
+	# Runs on a thread of the process pool; the progress signal is queued to the GUI thread
+	def __reportSaved(self, future, log):
+		try:
+			for path in future.result():
+				log(f"Report saved: {path}")
+		except Exception as error:
+			log(f"ERROR: Report could not be saved: {error}")
+
+	# Called from the GUI thread
 	def interfaceCancel(self):
-		self.__running = False
-		self.__endedByInterface = True
+		acquisition = self.__acquisition
+		if acquisition is not None:
+			acquisition.cancel()
 
-	def __deviceCancel(self):
-		self.__running = False
-		self.__endedByDevice = True
+	# Called from the GUI thread as the application quits, once no test is running
+	def shutdown(self):
+		for ring in self.__rings:
+			ring.unlink()
+		self.__rings = []
 
-	def __updateGraph(self):
-		self.__canvas.axes.cla()
-		minVal = max(0, len(self.__timestamps) - self.__displayCount)
-		self.__displayTimestamps = self.__timestamps[minVal:]
-		self.__displaymvData = self.__mvData[minVal:]
-		self.__displaymaData = self.__maData[minVal:]
-		self.__canvas.axes.plot(self.__displayTimestamps, self.__displaymvData, 'r', label="Voltage")
-		self.__canvas.axes.plot(self.__displayTimestamps, self.__displaymaData, 'b', label="Current")
-		self.__canvas.axes.set_xlabel("Time (seconds)")
-		self.__canvas.axes.set_ylabel("Level (mA/mV)")
-		self.__canvas.axes.legend(loc="upper right")
-		self.__canvas.draw()
-	
-	def __clearTestData(self):
-		self.__timestamps.clear()
-		self.__mvData.clear()
-		self.__maData.clear()
-		self.__canvas.axes.cla()
-	
-	def __sendMessage(self, message):
-		dataToSend = bytes(message, "utf-8")
-		sentBytes = self.__UDPSocket.sendto(dataToSend, (self.__IPDevice, self.__portDevice))
-	
-	def __processMessage(self, message):
-		messageType = message.split(";")[0]
-		if messageType == MSG_TYPE_DISCOVERY:
-			self.__printOut("Connection established!")
-			model = message.split(";")[1].split("=")[1]
-			serial = message.split(";")[2].split("=")[1]
-			self.__deviceName = f"{model} (#{serial})"
-			outputMsg = f"TEST;CMD=START;DURATION={self.__duration};RATE={self.__interval};"
-			self.__printOut("Starting test...")
-			self.__sendMessage(outputMsg)
-		elif messageType == MSG_TYPE_TEST:
-			result = message.split(";")[1].split("=")[1]
-			if (result == MSG_RESULT_STARTED):
-				self.__printOut("Receiving test data...")
-			elif (result == MSG_RESULT_STOPPED):
-				self.__printOut("Test finishing...")
-				self.__deviceCancel()
-				self.__mvMin = min(self.__mvData)
-				self.__mvMax = max(self.__mvData)
-				self.__mvAvg = sum(self.__mvData) / len(self.__mvData)
-				self.__maMin = min(self.__maData)
-				self.__maMax = max(self.__maData)
-				self.__maAvg = sum(self.__maData) / len(self.__maData)
-				self.__printOut("----------------------------------------")
-				self.__printOut("Data Summary:")
-				self.__printOut(f"Voltage Range (mV): {self.__mvMin}-{self.__mvMax} (Average={round(self.__mvAvg, 3)})")
-				self.__printOut(f"Current Range (mA): {self.__maMin}-{self.__maMax} (Average={round(self.__maAvg, 3)})")
-				self.__printOut("----------------------------------------")
-			elif (result == MSG_RESULT_ERROR):
-				errorMessage = message.split(";")[2].split("=")[1]
-				self.__printOut(f"ERROR: {errorMessage}")
-			else:
-				self.__printOut("ERROR: Test message received with unknown result")
-		elif messageType == MSG_TYPE_STATUS:
-			time = int(message.split(";")[1].split("=")[1])
-			mv = int(message.split(";")[2].split("=")[1])
-			ma = int(message.split(";")[3].split("=")[1])
-			self.__timestamps.append(time/1000)
-			self.__mvData.append(mv)
-			self.__maData.append(ma)
-			if self.__displayFrameCounter == 0:	# Limit PyQt redraw rate due to performance limitations (max=100ms)
-				self.__updateGraph()
-			self.__displayFrameCounter = (self.__displayFrameCounter + 1) % self.__displayFrequencyFilter
-		else:
-			self.__printOut("ERROR: Unknown message type received")
+	# Called from the GUI thread; `scale` is a position of the live display scale (0 - LIVE_DISPLAY_STEPS)
+	def setDisplayScale(self, scale):
+		self.__displayScale = scale
 
-	# Discard timeout errors generated while listening for messages, as the `UDPSocket.recv` function will
-	# continue to run inside the loop until either a message is received, or the test is terminted by the
-	# user pressing the 'Cancel' button.
-	# The timeouts are used to make the `UDPSocket.recv` function periodically break from its execution,
-	# which allows the `self.__running` variable to be checked in order to determine whether the 'Cancel' button
-	# has been pressed.
-	def __receiveMessages(self):
-		self.__receivingMessages = True
-		if self.__running:
-			while True:
-				data = None
-				try:
-					data = self.__UDPSocket.recv(BUFFER_SIZE)
-				except:
-					pass	# Disregard timeout error messages
-				if data or not self.__running: break
-			if data:
-				message = data.decode('utf-8')
-				self.__processMessage(message)
-		self.__receivingMessages = False
-	
-	def __getData(self):
-		self.__UDPSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-		self.__UDPSocket.bind((self.__IPDevice, self.__portInterface))
-		self.__UDPSocket.settimeout(1)
-		self.__printOut("Contacting device...")
-		self.__sendMessage(MSG_TYPE_DISCOVERY)
-		while True:
-			if not self.__receivingMessages:
-				self.__receiveMessages()
-			if not self.__running:
-				break
+	# The live display scale is logarithmic, from LIVE_DISPLAY_MIN_SPAN up to the whole test
+	def getDisplaySpan(self):
+		ratio = max(self.__duration / LIVE_DISPLAY_MIN_SPAN, 1)
+		return LIVE_DISPLAY_MIN_SPAN * ratio ** (self.__displayScale / LIVE_DISPLAY_STEPS)
+
+	# Called by the live view on the GUI thread (see `RemoteSession.getDisplayWindow`)
+	def getDisplayWindow(self, index=0):
+		sessions = self.__sessions
+		if index >= len(sessions):
+			return self.__emptyStore.tail(0)
+		return sessions[index].getDisplayWindow(self.getDisplaySpan())
+
+	# Called by the live view on the GUI thread
+	def getChannelSchema(self, index=0):
+		sessions = self.__sessions
+		if index >= len(sessions):
+			return ChannelSchema.default()
+		return sessions[index].getSchema()
+
+	# Called by the device status grid on the GUI thread
+	def getSessions(self):
+		return list(self.__sessions)
+
+	# Called by the performance panel on the GUI thread; the latest `StageProfiler.snapshot` of the acquisition
+	# process (None until the first one arrives, or if profiling is disabled)
+	def getProfile(self):
+		return self.__profile
+
+	# `profiler` returns the live view's StageProfiler (or None), whose timings are added to each test's trace
+	def setLiveViewProfiler(self, profiler):
+		self.__liveViewProfiler = profiler
+
+	# The acquisition process's timings, and the live view's, in one trace per test (see PROFILE_TRACE)
+	def __saveTrace(self, events):
+		liveView = self.__liveViewProfiler() if self.__liveViewProfiler is not None else None
+		processes = [("Acquisition", events)]
+		if liveView is not None:
+			processes.append(("Live View", liveView.getEvents()))
+		try:
+			os.makedirs(CAPTURE_DIRECTORY, exist_ok=True)
+			path = os.path.join(CAPTURE_DIRECTORY, f"Trace_{datetime.today().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+			StageProfiler.writeTrace(path, processes)
+			self.__printOut(f"Performance trace saved: {path}")
+		except OSError as error:
+			self.__printOut(f"ERROR: Performance trace could not be saved: {error}")
+
+	# `finished` is the payload of the ACQUISITION_FINISHED message
+	def __finish(self, finished):
+		self.__printOut(finished["lossReport"])
+		if finished["profile"] is not None:
+			self.__profile = finished["profile"]
+		if finished["trace"]:
+			self.__saveTrace(finished["trace"])
+		for index, (session, (status, results, reportJob)) in enumerate(zip(self.__sessions, finished["sessions"])):
+			session.update(status, results, reportJob)
+			log = self.__sessionLog(index)
+			if session.getState() in (SESSION_COMPLETED, SESSION_ABORTED):
+				if session.getState() == SESSION_ABORTED:
+					log("Test aborted early - the device failed its limit checks")
+				elif session.getLimitsPassed() is False:
+					log("Test completed - the device failed its limit checks")
+				else:
+					log("Test completed successfully!")
+				if session.getReportJob() is not None:
+					self.__saveReport(session, log)
+					log("Saving report in the background...")
+			elif session.getState() == SESSION_TIMED_OUT:
+				log("Test timed out - the device stopped responding")
+			elif session.getState() != SESSION_CANCELLED:
+				log("ERROR: Test ended for unknown reason")
+		if RESULTS_ENABLED and not self.__replaying:	# Replays aren't new runs
+			self.__recordResults()
 
 	def run(self):
 		try:
-			self.__running = True
-			self.__timestamps.clear()
-			self.__mvData.clear()
-			self.__maData.clear()
-			self.__canvas.axes.cla()
-			self.__canvas.draw()
-			self.__getData()
-			if self.__endedByDevice:
-				self.__printOut("Test completed successfully!")
-				if self.__generateFile == True:
-					self.__saveGraph()
-					self.__printOut("Check 'Production Test Data' files for saved output.")
-			elif self.__endedByInterface:
-				self.__sendMessage(MSG_FULL_STOP)
-				self.__printOut("Test cancelled")
-			else:
-				self.__printOut("ERROR: Test ended for unknown reason")
+			self.__acquisition.start(self.__job)
+			for message in self.__acquisition.messages():
+				if message[0] == ACQUISITION_LOG:
+					self.__printOut(message[1])
+				elif message[0] == ACQUISITION_STATUS:
+					for session, status in zip(self.__sessions, message[1]):
+						session.update(status)
+				elif message[0] == ACQUISITION_PROFILE:
+					self.__profile = message[1]
+				elif message[0] == ACQUISITION_FINISHED:
+					self.__finish(message[1])
+				else:
+					self.__printOut(message[1])
 		except SystemExit as error:
 			self.__printOut(f"Program terminated with exit code: {error}")
 		except KeyboardInterrupt as error:
@@ -256,8 +267,4 @@ class TestExecutionWorker(QObject):
 		except:
 			self.__printOut("Test execution terminated due to error")
 		finally:
-			self.__endedByDevice = False
-			self.__endedByInterface = False
-			self.__running = False
-			self.__clearTestData()
-			self.__finished.emit()
\ No newline at end of file
+			self.finished.emit()
\ No newline at end of file
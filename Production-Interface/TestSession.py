@@ -0,0 +1,508 @@
+########################################
+# ***** IMPORTS *****
+import os
+from datetime import datetime
+from time import perf_counter, time
+
+from CaptureFile import CaptureFile
+from ChannelSchema import ChannelSchema
+from Config import *
+from DatagramLog import DatagramLog
+from DisplayPyramid import DisplayPyramid
+from LimitChecker import LimitChecker
+from LinkMonitor import LinkMonitor
+from SampleStore import SampleStore
+from StatusCodec import StatusCodec
+from StreamingStats import StreamingStats
+########################################
+
+# Protocol state, samples and summary for the test of a single device.
+# Sessions don't own a socket: a SessionManager routes each received datagram to the session whose device address
+# it came from, and passes in the function used to send messages back to the device.
+# With an `aggregateWindow` (and a device that supports it), the device summarises each window of that many ms of
+# samples in one record (see `StatusCodec.decodeAggregate`) instead of sending every sample. The windows are stored as
+# their min/max envelope (plus any raw tail) in place of the samples, so the live view, capture file and report show
+# the envelope, the summary and statistics come from the windows (see `StreamingStats.updateWindows`), and limits are
+# checked on the envelope: bounds rules are exact, while rate and outside rules only see each window's extremes.
+# With `adaptive` (and a device that supports it), the device may slow the test down (to RATE_MAX_SLOWDOWN times the
+# interval) or batch its samples while the interface reports it's behind (see `sendFeedback`), rather than samples
+# being lost; every change the device makes is recorded in the results ("rateChanges"). Sample times always follow
+# the device's actual rate.
+class TestSession:
+	# With `logDatagrams`, every datagram received is also recorded in a DatagramLog, so the test can be replayed.
+	# With `capture`, the samples are written to a capture file as they arrive (not when replaying, as the recording
+	# already exists).
+	# With a `ring` (a SampleRing), every sample is also written to it, for a live view in another process to index
+	# and display (see RemoteSession), so the session doesn't index its samples for display itself.
+	# With a `profiler` (a StageProfiler), the time spent in each stage of processing is recorded, in the device's lane.
+	def __init__(self, IPDevice, portDevice, duration, interval, log=print, logDatagrams=DATAGRAM_LOG_ENABLED, ring=None, \
+					profiler=None, aggregateWindow=STATUS_AGGREGATE_WINDOW, adaptive=RATE_ADAPTIVE, capture=CAPTURE_ENABLED):
+		self.__address = (".".join(str(int(part)) for part in IPDevice.split(".")), portDevice)	# Matches `recvfrom`
+		self.__duration = duration	# Milliseconds
+		self.__interval = interval	# Milliseconds
+		self.__log = log
+		self.__send = None
+		self.__state = SESSION_IDLE
+		self.__deviceName = f"{self.__address[0]}:{self.__address[1]}"	# Replaced by the model/serial on discovery
+		self.__model = ""
+		self.__serial = ""
+		self.__startTime = 0	# Seconds since the epoch
+		self.__endTime = 0		# Seconds since the epoch
+		self.__ring = ring
+		self.__profiler = profiler
+		self.__lane = f"{self.__address[0]}:{self.__address[1]}"	# Of the profiler's trace
+		self.__indexed = 0		# Samples added to the pyramid
+		self.__aggregateWindow = aggregateWindow	# Milliseconds (0 = every sample is sent)
+		self.__aggregate = {}	# Samples per window and tail, as confirmed by the device (empty if it sends every sample)
+		self.__adaptive = adaptive
+		self.__rateChanges = []	# {"sequence", "time", "interval", "batch", "batchWindow"} per change made by the device
+		self.__link = LinkMonitor(self.__interval)
+		self.__captureEnabled = capture
+		self.__configureChannels(ChannelSchema.default())	# Until the device announces its channels
+		self.__capture = None
+		self.__logDatagrams = logDatagrams
+		self.__datagramLog = None
+		self.__started = 0		# `perf_counter` seconds at `start` (datagram log arrival times are relative to this)
+		self.__running = 0		# Arrival time of STARTED (on the same clock as every other arrival, also when replayed)
+		self.__uncaptured = 0	# Index in the store of the first sample not yet written to the capture file
+		self.__trimmed = 0		# Samples dropped from the store after being written to the capture file
+		self.__summary = []	# (min, max, average) per channel, available once the test has completed
+		self.__deviceRate = {}	# Pacing reported by the device when the test completes (if it reports it)
+
+	# Everything that depends on the device's channels is rebuilt for its schema, before any samples have arrived
+	def __configureChannels(self, schema):
+		self.__schema = schema
+		names = schema.getNames()
+		self.__store = SampleStore(names)
+		expectedSamples = self.__duration // self.__interval + 1
+		if self.__captureEnabled:	# Only the most recent samples are kept in memory (see `__streamCapture`)
+			expectedSamples = min(expectedSamples, 2 * CAPTURE_KEEP_SAMPLES + CAPTURE_CHUNK_SIZE)
+		self.__store.reserve(expectedSamples)
+		self.__pyramid = DisplayPyramid(len(schema)) if self.__ring is None else None
+		self.__codec = StatusCodec(schema)
+		self.__stats = StreamingStats(names)
+		self.__limits = LimitChecker(self.__interval, names, \
+										[rule for rule in LIMIT_RULES if rule.get("channel") in names])
+		if self.__ring is not None:
+			self.__ring.configure(len(schema))
+
+	def getAddress(self):
+		return self.__address
+
+	def getDeviceName(self):
+		return self.__deviceName
+
+	def getState(self):
+		return self.__state
+
+	# The channels announced by the device (the default ones until it has answered)
+	def getSchema(self):
+		return self.__schema
+
+	def getStore(self):
+		return self.__store
+
+	def getSummary(self):
+		return self.__summary
+
+	def getLink(self):
+		return self.__link
+
+	def getStats(self):
+		return self.__stats
+
+	def getLimits(self):
+		return self.__limits
+
+	# Overall result of the test (one of RESULTS_OUTCOMES)
+	def getOutcome(self):
+		if self.__state in (SESSION_COMPLETED, SESSION_ABORTED):
+			if self.__state == SESSION_ABORTED or self.__link.isValid() is False or self.__limits.isPassed() is False:
+				return OUTCOME_FAIL
+			return OUTCOME_PASS
+		return OUTCOME_CANCELLED if self.__state == SESSION_CANCELLED else OUTCOME_ERROR
+
+	def getSampleCount(self):
+		return self.__trimmed + len(self.__store)
+
+	# Called by the live view on the GUI thread. Returns (timestamps, [channel data]) for the last `span` ms of the
+	# test (see `DisplayPyramid.liveWindow`). Not available for sessions given a ring (see `__init__`).
+	def getDisplayWindow(self, span, points=LIVE_DISPLAY_POINTS):
+		timestamps, channels = self.__store.tail(points)
+		return self.__pyramid.liveWindow(timestamps, channels, self.getSampleCount(), self.__indexed, span, points)
+
+	# Machine-readable record of the test (e.g. for JSON output)
+	def getResults(self):
+		return {
+			"device": self.__deviceName,
+			"address": f"{self.__address[0]}:{self.__address[1]}",
+			"model": self.__model,
+			"serial": self.__serial,
+			"state": self.__state,
+			"outcome": self.getOutcome(),
+			"duration": self.__duration,
+			"interval": self.__interval,
+			"startTime": self.__startTime,
+			"endTime": self.__endTime,
+			"samples": self.__stats.getCount() if self.__aggregate else self.getSampleCount(),
+			"aggregate": dict(self.__aggregate, points=self.getSampleCount()) if self.__aggregate else None,
+			"schema": self.__schema.encode(),
+			"summary": {channel: {"min": minimum, "max": maximum, "average": average} for channel, (minimum, maximum, average) \
+							in zip(self.__store.getChannels(), self.__summary)},
+			"capture": self.getCapturePath(),
+			"datagramLog": self.getDatagramLogPath(),
+			"statistics": self.__stats.getReport(),
+			"limits": self.__limits.getReport(),
+			"link": self.__link.getReport(),
+			"deviceRate": self.__deviceRate,
+			"rateChanges": list(self.__rateChanges)
+		}
+
+	# Job description for `ReportRenderer.submit`; samples are only included if there's no capture file to read
+	def getReportJob(self, destination, formats):
+		dateString = datetime.fromtimestamp(self.__startTime).strftime("%Y-%m-%d %H:%M:%S")	# Unique per device
+		summaryLines = [f"{label} Range: {minimum}-{maximum} (Average={round(average, 3)})" for label, \
+							(minimum, maximum, average) in zip(self.__schema.getLabels(), self.__summary)]
+		if self.__limits.hasRules():
+			summaryLines.append(f"Limits: {'PASS' if self.__limits.isPassed() else 'FAIL'}")
+		job = {
+			"title": f"Production Test Data | {self.__deviceName} | {dateString}",
+			"subtitle": " .... ".join(summaryLines),
+			"labels": self.__schema.getLabels(),
+			"units": self.__schema.getUnits(),
+			"destination": destination,
+			"formats": list(formats),
+			"capture": self.getCapturePath()
+		}
+		if not job["capture"]:
+			job["timestamps"], job["channels"] = self.getSamples()
+		return job
+
+	def getCapturePath(self):
+		return self.__capture.getPath() if self.__capture is not None else ""
+
+	# Returns (timestamps, [channel data]) for the whole test: from the capture file if one is being written (as the
+	# store only holds the most recent samples), otherwise from the store
+	def getSamples(self):
+		if self.__capture is None:
+			return self.__store.timestamps(), [self.__store.channel(index) for index in range(len(self.__store.getChannels()))]
+		header, records = CaptureFile.load(self.__capture.getPath())
+		return records[:, 0], [records[:, index + 1] for index in range(header["channels"])]
+
+	def isFinished(self):
+		return self.__state in (SESSION_COMPLETED, SESSION_CANCELLED, SESSION_ABORTED, SESSION_TIMED_OUT)
+
+	# `perf_counter` seconds by which the device must have started its test (SESSION_CONTACT_TIMEOUT) or, once it has,
+	# finished it (SESSION_TEST_TIMEOUT beyond its duration); None unless the test is in progress
+	def getDeadline(self):
+		if self.__state == SESSION_CONTACTING:
+			return self.__started + SESSION_CONTACT_TIMEOUT
+		if self.__state == SESSION_RUNNING:
+			return self.__running + self.__duration / 1000 + SESSION_TEST_TIMEOUT
+		return None
+
+	# Whether the test is running with a device that adapts its rate (see `sendFeedback`)
+	def isAdaptive(self):
+		return self.__state == SESSION_RUNNING and self.__adaptive
+
+	def __sendMessage(self, message):
+		self.__send(bytes(message, "utf-8"), self.__address)
+
+	# `send` is called as send(data, address)
+	def start(self, send):
+		self.__send = send
+		self.__state = SESSION_CONTACTING
+		self.__startTime = time()
+		self.__started = perf_counter()
+		if self.__logDatagrams:
+			self.__openDatagramLog()
+		self.__log("Contacting device...")
+		self.__sendMessage(MSG_TYPE_DISCOVERY)
+
+	def cancel(self):
+		if self.__state not in (SESSION_IDLE, SESSION_COMPLETED, SESSION_CANCELLED, SESSION_ABORTED, SESSION_TIMED_OUT):
+			self.__sendMessage(MSG_FULL_STOP)
+			self.__state = SESSION_CANCELLED
+			self.__endTime = time()
+			self.__log("Test cancelled")
+		self.close()
+
+	# Gives up on a device that missed its deadline (see `getDeadline`): the device is told to stop, in case it's still
+	# running, and the test ends in error
+	def timeOut(self):
+		reason = "didn't respond" if self.__state == SESSION_CONTACTING else "didn't finish the test in time"
+		self.__sendMessage(MSG_FULL_STOP)
+		self.__state = SESSION_TIMED_OUT
+		self.__endTime = time()
+		self.__log(f"ERROR: Device {reason} - test timed out")
+		self.close()
+
+	# Writes any remaining samples and closes the capture file and datagram log; safe to call more than once
+	def close(self):
+		self.__indexSamples(final=True)
+		if self.__capture is not None:
+			self.__streamCapture(final=True)
+			self.__capture.close()
+		if self.__datagramLog is not None:
+			self.__datagramLog.close()
+
+	def getDatagramLogPath(self):
+		return self.__datagramLog.getPath() if self.__datagramLog is not None else ""
+
+	# Opened before the device is contacted (unlike the capture file), so the ID response is recorded too
+	def __openDatagramLog(self):
+		os.makedirs(CAPTURE_DIRECTORY, exist_ok=True)
+		dateString = datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
+		fileName = "".join(character if character.isalnum() else "_" for character in f"{self.__deviceName}_{dateString}")
+		self.__datagramLog = DatagramLog(os.path.join(CAPTURE_DIRECTORY, f"{fileName}.dgl"), {
+			"address": self.__deviceName,
+			"duration": self.__duration,
+			"interval": self.__interval,
+			"startTime": self.__startTime
+		})
+
+	def __openCapture(self, model, serial):
+		os.makedirs(CAPTURE_DIRECTORY, exist_ok=True)
+		dateString = datetime.today().strftime("%Y-%m-%d_%H-%M-%S")
+		fileName = "".join(character if character.isalnum() else "_" for character in f"{model}_{serial}_{dateString}")
+		self.__capture = CaptureFile(os.path.join(CAPTURE_DIRECTORY, f"{fileName}.cap"), self.__schema, model, serial, \
+										self.__interval, time())
+		self.__uncaptured = 0
+
+	# Samples are added to the live display pyramid in chunks of PYRAMID_CHUNK, which costs far less per sample than
+	# adding each datagram's samples as they arrive
+	def __indexSamples(self, final=False):
+		unindexed = self.getSampleCount() - self.__indexed
+		if self.__pyramid is None or unindexed < (1 if final else PYRAMID_CHUNK):
+			return
+		start = self.__profiler.now() if self.__profiler is not None else 0
+		self.__pyramid.extend(*self.__store.tail(unindexed))
+		self.__indexed += unindexed
+		if self.__profiler is not None:
+			self.__profiler.record("index", start, unindexed, self.__lane)
+
+	# Samples are written in chunks of CAPTURE_CHUNK_SIZE; once written, all but the most recent
+	# CAPTURE_KEEP_SAMPLES are dropped from memory, so memory use doesn't grow with the test duration
+	def __streamCapture(self, final=False):
+		count = len(self.__store)
+		if self.__capture is None or count - self.__uncaptured < (1 if final else CAPTURE_CHUNK_SIZE):
+			return
+		start = self.__profiler.now() if self.__profiler is not None else 0
+		captured = count - self.__uncaptured
+		timestamps = self.__store.timestamps(self.__uncaptured)
+		self.__capture.append(timestamps, [self.__store.channel(index, self.__uncaptured) \
+											for index in range(len(self.__store.getChannels()))])
+		self.__uncaptured = count
+		if count > 2 * CAPTURE_KEEP_SAMPLES:
+			self.__store.trim(CAPTURE_KEEP_SAMPLES)
+			self.__uncaptured = len(self.__store)
+			self.__trimmed += count - self.__uncaptured
+		if self.__profiler is not None:
+			self.__profiler.record("capture", start, captured, self.__lane)
+
+	# Returns the value of a `KEY=value` field, or `default` if the field is not present in the message
+	def __getMessageValue(self, message, key, default=""):
+		for field in message.split(MSG_DELIMITER)[1:]:
+			name, separator, value = field.partition("=")
+			if separator and name == key:
+				return value
+		return default
+
+	# Stops the test at its first limit failure (see LIMIT_EARLY_ABORT); the samples so far are still summarised
+	def __abort(self):
+		self.__sendMessage(MSG_FULL_STOP)
+		self.__state = SESSION_ABORTED
+		self.__endTime = time()
+		self.__log("Test aborted after a limit failure")
+		self.close()
+		self.__summarise()
+
+	# The summary comes from the streaming statistics, so it doesn't need another pass over the samples
+	def __summarise(self):
+		if self.__stats.getCount() == 0:
+			self.__log("ERROR: No test data was received")
+			return
+		self.__summary = self.__stats.getSummary()
+		self.__log("----------------------------------------")
+		self.__log("Data Summary:")
+		for index, (label, unit, (minimum, maximum, average)) in \
+				enumerate(zip(self.__schema.getLabels(), self.__schema.getUnits(), self.__summary)):
+			percentiles = " ".join(f"p{percentile}~{self.__stats.getPercentile(index, percentile):.4g}" \
+									for percentile in STATS_PERCENTILES)
+			self.__log(f"{label} Range ({unit}): {minimum}-{maximum} (Average={round(average, 3)}, " + \
+						f"SD={self.__stats.getStandardDeviation(index):.3f}, {percentiles})")
+		if self.__aggregate:
+			self.__log(f"Aggregated in windows of {self.__aggregate['window']} samples " + \
+						"(SD and percentiles are of the window means)")
+		for line in self.__limits.getReportLines():
+			self.__log(line)
+		if self.__deviceRate:
+			self.__log(f"Device Rate: {self.__deviceRate['achieved']:.1f} of {self.__deviceRate['requested']:.1f} " + \
+						f"samples/s (Max Lag={self.__deviceRate['maxLag']} us)")
+		if self.__rateChanges:
+			slowest = max(change["interval"] for change in self.__rateChanges)
+			self.__log(f"Rate Changes: {len(self.__rateChanges)} (slowest {1e6 / slowest:.1f} samples/s, " + \
+						f"finally {1e6 / self.__rateChanges[-1]['interval']:.1f} samples/s)")
+		self.__log("Link Quality:")
+		for line in self.__link.getReportLines():
+			self.__log(line)
+		self.__log("----------------------------------------")
+
+	# `arrival` is the time the datagram was received (`perf_counter` seconds)
+	def __processMessage(self, message, arrival):
+		messageType = message.split(";")[0]
+		if messageType == MSG_TYPE_DISCOVERY:
+			self.__log("Connection established!")
+			model = message.split(";")[1].split("=")[1]
+			serial = message.split(";")[2].split("=")[1]
+			self.__deviceName = f"{model} (#{serial})"
+			self.__model = model
+			self.__serial = serial
+			try:
+				self.__configureChannels(ChannelSchema.parse(self.__getMessageValue(message, "CHANNELS", \
+																					STATUS_DEFAULT_SCHEMA)))
+			except ValueError as error:
+				self.__log(f"ERROR: Invalid channel schema: {error}")
+				self.cancel()
+				return
+			for rule in LIMIT_RULES:
+				if rule.get("channel") not in self.__schema.getNames():
+					self.__log(f"Limit rule ignored (the device has no {rule.get('channel')} channel): {rule}")
+			if self.__captureEnabled:
+				self.__openCapture(model, serial)
+			outputMsg = f"TEST;CMD=START;DURATION={self.__duration};RATE={self.__interval};" + \
+						f"BATCH={STATUS_BATCH_SIZE};BATCHWINDOW={STATUS_BATCH_WINDOW};SEQ=1;"
+			if STATUS_FORMAT in self.__getMessageValue(message, "FORMATS", MSG_FORMAT_TEXT).split(","):
+				outputMsg += f"FORMAT={STATUS_FORMAT};"
+			if self.__aggregateWindow > 0:
+				if MSG_MODE_AGGREGATE in self.__getMessageValue(message, "MODES", MSG_MODE_RAW).split(","):
+					outputMsg += f"AGGREGATE={self.__aggregateWindow};TAIL={STATUS_AGGREGATE_TAIL};"
+				else:
+					self.__log("Device doesn't support aggregation - every sample will be sent")
+			if MSG_MODE_ADAPTIVE not in self.__getMessageValue(message, "MODES", MSG_MODE_RAW).split(","):
+				self.__adaptive = False	# The device keeps its rate whatever the interface reports
+			elif self.__adaptive:
+				outputMsg += f"MAXRATEUS={self.__interval * 1000 * RATE_MAX_SLOWDOWN};"
+			self.__log("Starting test...")
+			self.__sendMessage(outputMsg)
+		elif messageType == MSG_TYPE_TEST:
+			result = message.split(";")[1].split("=")[1]
+			if (result == MSG_RESULT_STARTED):
+				self.__state = SESSION_RUNNING
+				self.__running = arrival
+				self.__link.start(arrival)
+				if self.__getMessageValue(message, "WINDOW"):	# Aggregation mode, as applied by the device
+					self.__aggregate = {"window": int(self.__getMessageValue(message, "WINDOW")), \
+										"tail": int(self.__getMessageValue(message, "TAIL", "0"))}
+					self.__codec.aggregate(self.__aggregate["tail"])
+					self.__log(f"Receiving test data (aggregated in windows of {self.__aggregate['window']} samples)...")
+				else:
+					self.__log("Receiving test data...")
+			elif (result == MSG_RESULT_STOPPED):
+				self.__log("Test finishing...")
+				self.__state = SESSION_COMPLETED
+				self.__endTime = time()
+				sent = self.__getMessageValue(message, "SENT")	# Samples sent by the device (if it reports them)
+				self.__link.finish(int(sent) if sent else None)
+				if self.__getMessageValue(message, "ACHIEVEDHZ"):
+					self.__deviceRate = {
+						"requested": float(self.__getMessageValue(message, "REQUESTEDHZ")),	# Samples per second
+						"achieved": float(self.__getMessageValue(message, "ACHIEVEDHZ")),	# Samples per second
+						"maxLag": int(self.__getMessageValue(message, "MAXLAGUS"))			# Microseconds
+					}
+				self.close()
+				self.__summarise()
+			elif (result == MSG_RESULT_RATE):
+				change = {
+					"sequence": int(self.__getMessageValue(message, "SEQ")),	# First sample sent with the new settings
+					"time": round(arrival - self.__running, 3),					# Seconds from the start of the test
+					"interval": int(self.__getMessageValue(message, "RATEUS")),	# Microseconds
+					"batch": int(self.__getMessageValue(message, "BATCH")),		# Samples per datagram (at most)
+					"batchWindow": int(self.__getMessageValue(message, "BATCHWINDOW"))	# Milliseconds (0 = no limit)
+				}
+				self.__rateChanges.append(change)
+				self.__log(f"Device rate changed to {1e6 / change['interval']:.1f} samples/s (batches of up to " + \
+							f"{change['batch']} samples) from sample {change['sequence']}")
+			elif (result == MSG_RESULT_ERROR):
+				errorMessage = message.split(";")[2].split("=")[1]
+				self.__log(f"ERROR: {errorMessage}")
+			else:
+				self.__log("ERROR: Test message received with unknown result")
+		elif messageType == MSG_TYPE_STATUS:
+			self.__processSamples(self.__codec.decodeText, self.__observe, message, arrival)
+		else:
+			self.__log("ERROR: Unknown message type received")
+
+	# `decode` is one of the codec's decode methods, `observe` the matching observe method, and `payload` the datagram
+	# to decode
+	def __processSamples(self, decode, observe, payload, arrival):
+		profiler = self.__profiler
+		if profiler is None:
+			observe(decode(payload, self.__store), arrival)
+			return
+		start = profiler.now()
+		decoded = decode(payload, self.__store)
+		start = profiler.record("decode", start, decoded[1], self.__lane)
+		observe(decoded, arrival)
+		profiler.record("observe", start, decoded[1], self.__lane)
+
+	# `decoded` is the (sequence, count) returned by the codec; datagrams without samples are ignored
+	def __observe(self, decoded, arrival):
+		sequence, count = decoded
+		if count == 0 or len(self.__store) == 0:
+			return
+		self.__link.observe(sequence, count, int(self.__store.timestamps(len(self.__store) - 1)[0]), arrival)
+		timestamps, channels = self.__store.tail(count)
+		self.__stats.update(timestamps, channels)
+		self.__check(timestamps, channels)
+
+	# `decoded` is the (sequence, count, windows, points) returned by `StatusCodec.decodeAggregate`; datagrams without
+	# windows are ignored
+	def __observeWindows(self, decoded, arrival):
+		sequence, count, windows, points = decoded
+		if len(windows) == 0:
+			return
+		self.__link.observe(sequence, count, int(windows["end"][-1]), arrival)
+		self.__stats.updateWindows(windows["end"], windows["count"], windows["minima"], windows["maxima"], windows["means"])
+		self.__check(*self.__store.tail(points))
+
+	# Passes newly stored samples (or window envelopes) on to the ring and the limit rules
+	def __check(self, timestamps, channels):
+		if self.__ring is not None:
+			self.__ring.extend(timestamps, channels)
+		for failure in self.__limits.check(timestamps, channels):
+			self.__log(f"LIMIT FAILURE: {failure['message']}")
+		if LIMIT_EARLY_ABORT and self.__limits.isPassed() is False and self.__state == SESSION_RUNNING:
+			self.__abort()
+
+	# Reports how far behind the interface is to the device, if the test is adaptive: the latency of the newest samples
+	# processed (or none once nothing is left waiting), and `backlog`, the bytes waiting in the interface's socket (None
+	# if unknown)
+	def sendFeedback(self, backlog):
+		if self.__state != SESSION_RUNNING or not self.__adaptive:
+			return
+		latency = self.__link.getLatency() if backlog != 0 else 0	# A stale latency would hold the device back
+		self.__sendMessage(f"TEST;CMD=LAG;LAGUS={int(max(latency or 0, 0) * 1000)};BACKLOG={backlog or 0};")
+
+	# `arrival` is when the datagram was received (`perf_counter` seconds), for datagrams being replayed
+	def processDatagram(self, data, arrival=None):
+		if self.isFinished():
+			return	# Ignore anything still in flight after the test has ended (e.g. samples sent before a cancellation)
+		if arrival is None:
+			arrival = perf_counter()
+		if self.__datagramLog is not None:
+			self.__datagramLog.append(arrival - self.__started, data)
+		if self.__codec.isBinary(data):
+			self.__processSamples(self.__codec.decodeBinary, self.__observe, data, arrival)
+		elif self.__codec.isAggregate(data):
+			self.__processSamples(self.__codec.decodeAggregate, self.__observeWindows, data, arrival)
+		elif self.__profiler is None:
+			self.__processMessage(str(data, "utf-8"), arrival)	# `data` may be a memoryview (see `DatagramChannel.receive`)
+		else:
+			start = self.__profiler.now()
+			message = str(data, "utf-8")
+			self.__processMessage(message, arrival)
+			if not message.startswith(MSG_TYPE_STATUS + MSG_DELIMITER):	# Timed as decode and observe instead
+				self.__profiler.record("message", start, 1, self.__lane)
+		self.__indexSamples()	# Before `__streamCapture`, which may trim the store
+		self.__streamCapture()
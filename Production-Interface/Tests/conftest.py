@@ -0,0 +1,8 @@
+########################################
+# ***** IMPORTS *****
+import os
+import sys
+########################################
+
+# The interface's modules import each other (and Config) by name, as when run from the Production-Interface directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,94 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+import pytest
+
+from Config import *
+from DisplayPyramid import DisplayPyramid
+########################################
+
+# Min/max levels of the live display index (see DisplayPyramid)
+
+def createSamples(count, seed=1):
+	random = numpy.random.default_rng(seed)
+	timestamps = numpy.arange(count, dtype=numpy.int32) * 10
+	return timestamps, [random.integers(-1000, 1000, count, dtype=numpy.int32) for channel in range(2)]
+
+# (start, end, minimum, maximum) of each bucket of `size` samples, then of the samples left over
+def expectedBuckets(timestamps, data, size):
+	buckets = []
+	for first in range(0, len(timestamps), size):
+		last = min(first + size, len(timestamps)) - 1
+		buckets.append((timestamps[first], timestamps[last], data[first:last + 1].min(), data[first:last + 1].max()))
+	return buckets
+
+def buckets(timestamps, data):
+	return [(timestamps[index], timestamps[index + 1], data[index], data[index + 1]) for index in range(0, len(data), 2)]
+
+def createPyramid(timestamps, channels, chunk):
+	pyramid = DisplayPyramid(len(channels))
+	for first in range(0, len(timestamps), chunk):
+		pyramid.extend(timestamps[first:first + chunk], [data[first:first + chunk] for data in channels])
+	return pyramid
+
+def test_fewer_samples_than_a_bucket():
+	timestamps, channels = createSamples(PYRAMID_BASE - 1)
+	windowTimestamps, windowChannels = createPyramid(timestamps, channels, 4).window(0, 1000)
+	assert buckets(windowTimestamps, windowChannels[0]) == expectedBuckets(timestamps, channels[0], 1)
+
+@pytest.mark.parametrize("count", [PYRAMID_BASE, PYRAMID_BASE + 1, PYRAMID_BASE * PYRAMID_FACTOR, 1000])
+def test_finest_level(count):
+	timestamps, channels = createSamples(count)
+	windowTimestamps, windowChannels = createPyramid(timestamps, channels, 7).window(0, 10 ** 6)
+	for data, windowData in zip(channels, windowChannels):
+		assert buckets(windowTimestamps, windowData) == expectedBuckets(timestamps, data, PYRAMID_BASE)
+
+# Each level merges PYRAMID_FACTOR buckets of the one below, so a window of a few points comes from a coarse level
+# (the window leaves room for one bucket of the partially filled ones, even if there are none)
+@pytest.mark.parametrize("level", [1, 2])
+def test_coarser_levels(level):
+	size = PYRAMID_BASE * PYRAMID_FACTOR ** level
+	timestamps, channels = createSamples(size * 3)
+	windowTimestamps, windowChannels = createPyramid(timestamps, channels, 100).window(0, 2 * (3 + 1))
+	for data, windowData in zip(channels, windowChannels):
+		assert buckets(windowTimestamps, windowData) == expectedBuckets(timestamps, data, size)
+
+def test_chunking_does_not_change_the_levels():
+	timestamps, channels = createSamples(5000)
+	whole = createPyramid(timestamps, channels, len(timestamps))
+	for chunk in [1, PYRAMID_BASE - 1, PYRAMID_CHUNK]:
+		pyramid = createPyramid(timestamps, channels, chunk)
+		for points in [10, 100, 1000]:
+			expected, actual = whole.window(0, points), pyramid.window(0, points)
+			assert numpy.array_equal(expected[0], actual[0])
+			assert all(numpy.array_equal(*pair) for pair in zip(expected[1], actual[1]))
+
+def test_spikes_are_never_hidden():
+	timestamps, channels = createSamples(20000)
+	channels[0][12345] = 5000
+	channels[1][777] = -5000
+	for points in [4, 40, 400]:
+		windowTimestamps, windowChannels = createPyramid(timestamps, channels, PYRAMID_CHUNK).window(0, points)
+		assert len(windowTimestamps) <= points + 2 * PYRAMID_FACTOR	# Plus the partially filled buckets
+		assert windowChannels[0].max() == 5000
+		assert windowChannels[1].min() == -5000
+
+def test_window_from_a_start_time():
+	timestamps, channels = createSamples(1000)
+	start = timestamps[500] + 5
+	windowTimestamps, windowChannels = createPyramid(timestamps, channels, 50).window(start, 10 ** 6)
+	first = 500 // PYRAMID_BASE * PYRAMID_BASE	# The bucket holding `start`
+	assert buckets(windowTimestamps, windowChannels[0]) == \
+			expectedBuckets(timestamps[first:], channels[0][first:], PYRAMID_BASE)
+
+# Samples newer than the pyramid are shown raw, after the buckets covering the rest of the span
+def test_live_window_appends_unindexed_samples():
+	timestamps, channels = createSamples(1000)
+	indexed = 512
+	pyramid = createPyramid(timestamps[:indexed], [data[:indexed] for data in channels], PYRAMID_CHUNK)
+	tail = 300
+	windowTimestamps, windowChannels = pyramid.liveWindow(timestamps[-tail:], [data[-tail:] for data in channels], \
+															len(timestamps), indexed, timestamps[-1], 1000)
+	assert numpy.array_equal(windowTimestamps[-tail:], timestamps[-tail:])
+	assert buckets(windowTimestamps[:-tail], windowChannels[0][:-tail]) == \
+			expectedBuckets(timestamps[:indexed], channels[0][:indexed], PYRAMID_BASE)
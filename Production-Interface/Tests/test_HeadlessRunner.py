@@ -0,0 +1,73 @@
+########################################
+# ***** IMPORTS *****
+import json
+import socket
+import threading
+from time import perf_counter
+
+import pytest
+
+from Config import *
+import HeadlessRunner
+########################################
+
+# Devices that stop answering (see `TestSession.getDeadline`): the runner still writes its results and fails
+
+@pytest.fixture(autouse=True)
+def timeouts(monkeypatch, tmp_path):
+	monkeypatch.chdir(tmp_path)	# For the capture files
+	monkeypatch.setattr("TestSession.SESSION_CONTACT_TIMEOUT", 0.5)
+	monkeypatch.setattr("TestSession.SESSION_TEST_TIMEOUT", 0.5)
+
+# A device socket that answers the first `replies` messages it receives (in turn), then never again
+@pytest.fixture
+def device():
+	sockets = []
+	def create(replies=()):
+		device = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		device.bind(("127.0.0.1", 0))
+		device.settimeout(0.1)
+		sockets.append(device)
+		def answer():
+			for reply in replies:
+				while True:
+					try:
+						data, client = device.recvfrom(BUFFER_SIZE)
+						break
+					except socket.timeout:
+						continue
+					except OSError:	# Closed
+						return
+				device.sendto(bytes(reply, "utf-8"), client)
+		threading.Thread(target=answer, daemon=True).start()
+		return device.getsockname()[1]
+	yield create
+	for device in sockets:
+		device.close()
+
+def freePort():
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+		probe.bind((INTERFACE_ADDRESS, 0))
+		return probe.getsockname()[1]
+
+def run(tmp_path, portDevice):
+	output = tmp_path / "results.json"
+	start = perf_counter()
+	exitCode = HeadlessRunner.main(["--port", str(freePort()), "--duration", "1", "--interval", "10", "--device", \
+									f"127.0.0.1:{portDevice}", "--output", str(output), "--database", "", "--quiet"])
+	with open(output) as file:
+		return exitCode, json.load(file), perf_counter() - start
+
+def test_device_that_never_answers(tmp_path, device):
+	exitCode, results, elapsed = run(tmp_path, device())
+	assert exitCode == 1
+	assert [(result["state"], result["outcome"]) for result in results["results"]] == \
+			[(SESSION_TIMED_OUT, OUTCOME_ERROR)]
+	assert elapsed < 5
+
+def test_device_that_stops_answering_during_the_test(tmp_path, device):
+	exitCode, results, elapsed = run(tmp_path, device(["ID;MODEL=Silent;SERIAL=1;", "TEST;RESULT=STARTED;"]))
+	assert exitCode == 1
+	assert [(result["model"], result["state"], result["outcome"]) for result in results["results"]] == \
+			[("Silent", SESSION_TIMED_OUT, OUTCOME_ERROR)]
+	assert 1.5 <= elapsed < 5	# The test's duration and SESSION_TEST_TIMEOUT
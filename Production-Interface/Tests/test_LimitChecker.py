@@ -0,0 +1,89 @@
+########################################
+# ***** IMPORTS *****
+import numpy
+import pytest
+
+from LimitChecker import LimitChecker
+from StreamingStats import StreamingStats
+########################################
+
+# Limit rules (see LimitChecker), at and just past their thresholds
+
+CHANNELS = ["MV", "MA"]
+
+def check(rule, values, interval=10, batch=None):
+	checker = LimitChecker(interval, CHANNELS, [rule])
+	timestamps = numpy.arange(len(values), dtype=numpy.int32) * interval
+	values = numpy.array(values, dtype=numpy.int32)
+	batch = batch or len(values)
+	failures = []
+	for first in range(0, len(values), batch):
+		failures += checker.check(timestamps[first:first + batch], [values[first:first + batch], values[first:first + batch]])
+	return checker, failures
+
+@pytest.mark.parametrize("values", [[0, 50, 100], [100, 100], [0]])
+def test_bounds_at_the_threshold_pass(values):
+	checker, failures = check({"channel": "MV", "type": "bounds", "min": 0, "max": 100}, values)
+	assert (checker.isPassed(), failures) == (True, [])
+
+@pytest.mark.parametrize("value", [-1, 101])
+def test_bounds_just_past_the_threshold_fail(value):
+	checker, failures = check({"channel": "MV", "type": "bounds", "min": 0, "max": 100}, [50, value, 50, value])
+	assert checker.isPassed() is False
+	assert [(failure["time"], failure["value"]) for failure in failures] == [(10, value)]	# Only the first failure
+	assert checker.getReport()["rules"][0]["violations"] == 2
+
+def test_bounds_with_one_side_only():
+	checker, failures = check({"channel": "MV", "type": "bounds", "max": 100}, [-10 ** 6, 100])
+	assert checker.isPassed() is True
+
+# 10 units in 10 ms is exactly 1000 units per second
+def test_rate_at_the_threshold_passes():
+	checker, failures = check({"channel": "MV", "type": "rate", "max": 1000}, [0, 10, 20, 10, 0])
+	assert checker.isPassed() is True
+
+def test_rate_just_past_the_threshold_fails():
+	checker, failures = check({"channel": "MV", "type": "rate", "max": 1000}, [0, 10, 21, 10])
+	assert [(failure["time"], failure["value"]) for failure in failures] == [(20, 21)]
+
+# The change between the last sample of one batch and the first of the next is checked too
+def test_rate_across_batches():
+	checker, failures = check({"channel": "MV", "type": "rate", "max": 1000}, [0, 0, 100, 100], batch=2)
+	assert [(failure["time"], failure["value"]) for failure in failures] == [(20, 100)]
+
+# TIME only has millisecond resolution, so samples sharing a TIME are taken as 1 ms apart
+def test_rate_of_samples_sharing_a_time():
+	checker = LimitChecker(1, CHANNELS, [{"channel": "MV", "type": "rate", "max": 1000}])
+	timestamps = numpy.array([0, 0, 0], dtype=numpy.int32)
+	assert checker.check(timestamps, [numpy.array([0, 1, 2], dtype=numpy.int32)] * 2) == []
+	assert len(checker.check(timestamps, [numpy.array([2, 4, 4], dtype=numpy.int32)] * 2)) == 1
+
+# Each out-of-range sample counts as one 10 ms interval, so 3 of them are exactly 30 ms outside
+def test_outside_at_the_threshold_passes():
+	checker, failures = check({"channel": "MV", "type": "outside", "max": 100, "time": 30}, [101, 0, 101, 0, 101, 0], \
+								batch=2)
+	assert (checker.isPassed(), checker.getReport()["rules"][0]["violations"]) == (True, 3)
+
+def test_outside_just_past_the_threshold_fails():
+	checker, failures = check({"channel": "MV", "type": "outside", "max": 100, "time": 30}, [101, 0, 101, 101, 0, 101], \
+								batch=2)
+	assert [(failure["time"], failure["value"]) for failure in failures] == [(50, 101)]
+
+def test_no_rules():
+	checker = LimitChecker(10, CHANNELS, [])
+	assert (checker.hasRules(), checker.isPassed()) == (False, None)
+
+@pytest.mark.parametrize("rule", [{"channel": "MW", "type": "bounds", "max": 1}, {"channel": "MV", "type": "average"}])
+def test_invalid_rules(rule):
+	with pytest.raises(ValueError):
+		LimitChecker(10, CHANNELS, [rule])
+
+# Percentile estimates (see StreamingStats) never go past the values actually seen
+def test_percentiles_stay_within_the_observed_range():
+	stats = StreamingStats(CHANNELS)
+	values = numpy.arange(1000, dtype=numpy.int32)
+	stats.update(values, [values, -values])
+	for percentile in [0, 1, 50, 99, 100]:
+		assert 0 <= stats.getPercentile(0, percentile) <= 999
+		assert -999 <= stats.getPercentile(1, percentile) <= 0
+	assert stats.getPercentile(0, 100) == 999
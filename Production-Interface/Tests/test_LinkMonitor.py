@@ -0,0 +1,121 @@
+########################################
+# ***** IMPORTS *****
+import pytest
+
+from Config import *
+from ChannelSchema import ChannelSchema
+from LinkMonitor import LinkMonitor
+from SampleStore import SampleStore
+from StatusCodec import StatusCodec
+########################################
+
+# Loss, reordering and duplicate counting from STATUS sequence numbers (see LinkMonitor)
+
+WRAP = 2 ** 32	# Sequence numbers are uint32 on the wire
+
+# Observes datagrams given as (first sequence number, samples)
+def observe(datagrams):
+	link = LinkMonitor(10)
+	link.start(0.0)
+	for sequence, count in datagrams:
+		link.observe(sequence, count, 0, 0.0)
+	return link
+
+def counts(link):
+	report = link.getReport()
+	return {key: report[key] for key in ("expected", "received", "lost", "gaps", "longestGap", "reordered", "duplicates")}
+
+def test_in_order():
+	assert counts(observe([(0, 4), (4, 4), (8, 4)])) == \
+			{"expected": 12, "received": 12, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 0, "duplicates": 0}
+
+def test_gap():
+	link = observe([(0, 4), (10, 4)])
+	assert counts(link) == \
+			{"expected": 14, "received": 8, "lost": 6, "gaps": 1, "longestGap": 6, "reordered": 0, "duplicates": 0}
+	assert link.getLossPercent() == pytest.approx(100 * 6 / 14)
+
+def test_late_datagram_fills_its_gap():
+	assert counts(observe([(0, 4), (8, 4), (4, 4)])) == \
+			{"expected": 12, "received": 12, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 1, "duplicates": 0}
+
+def test_late_datagram_splits_its_gap():
+	assert counts(observe([(0, 2), (12, 2), (6, 2)])) == \
+			{"expected": 14, "received": 6, "lost": 8, "gaps": 2, "longestGap": 4, "reordered": 1, "duplicates": 0}
+
+def test_duplicate_datagram():
+	assert counts(observe([(0, 4), (4, 4), (4, 4), (8, 4)])) == \
+			{"expected": 12, "received": 12, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 0, "duplicates": 4}
+
+def test_duplicate_of_the_first_datagram():
+	assert counts(observe([(0, 4), (0, 4)])) == \
+			{"expected": 4, "received": 4, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 0, "duplicates": 4}
+
+# A datagram that partly fills a gap and partly repeats samples already received
+def test_datagram_overlapping_a_gap():
+	assert counts(observe([(0, 4), (6, 4), (2, 6)])) == \
+			{"expected": 10, "received": 10, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 1, "duplicates": 4}
+
+# A datagram that overlaps the end of the samples received so far and carries on past it
+def test_datagram_overlapping_the_end():
+	assert counts(observe([(0, 4), (2, 4)])) == \
+			{"expected": 6, "received": 6, "lost": 0, "gaps": 0, "longestGap": 0, "reordered": 0, "duplicates": 2}
+
+def test_sequence_wraparound():
+	link = LinkMonitor(10)
+	link.observe(0, WRAP - 8, 0, 0.0)	# Everything up to just before the wrap, as one (very large) datagram
+	link.observe(WRAP - 8, 4, 0, 0.0)
+	link.observe(WRAP - 4, 4, 0, 0.0)	# Ends exactly at the wrap
+	link.observe(0, 4, 0, 0.0)
+	link.observe(4, 4, 0, 0.0)
+	assert counts(link) == {"expected": WRAP + 8, "received": WRAP + 8, "lost": 0, "gaps": 0, "longestGap": 0, \
+							"reordered": 0, "duplicates": 0}
+
+def test_gap_across_the_wrap():
+	link = LinkMonitor(10)
+	link.observe(0, WRAP - 4, 0, 0.0)
+	link.observe(4, 4, 0, 0.0)	# The 4 samples before the wrap and the 4 after it are missing
+	assert counts(link)["lost"] == 8
+	link.observe(WRAP - 2, 4, 0, 0.0)	# Arrives late, straddling the wrap
+	report = counts(link)
+	assert (report["expected"], report["lost"], report["gaps"], report["reordered"], report["duplicates"]) == \
+			(WRAP + 8, 4, 2, 1, 0)
+
+def test_duplicate_after_the_wrap():
+	link = LinkMonitor(10)
+	link.observe(0, WRAP - 4, 0, 0.0)
+	link.observe(WRAP - 4, 8, 0, 0.0)
+	link.observe(WRAP - 4, 8, 0, 0.0)
+	assert counts(link)["duplicates"] == 8
+	assert counts(link)["expected"] == WRAP + 4
+
+# Text STATUS messages carry the same unsigned sequence numbers, printed in decimal
+def test_text_sequence_numbers_across_the_wrap():
+	schema = ChannelSchema.default()
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	link = LinkMonitor(10)
+	link.observe(0, WRAP - 4, 0, 0.0)
+	for first in [WRAP - 4, WRAP - 2, 0, 4]:	# The datagram starting at 2 is lost
+		message = f"STATUS;SEQ={first};" + "TIME=0;MV=1;MA=2;" * 2
+		sequence, count = codec.decodeText(message, store)
+		link.observe(sequence, count, 0, 0.0)
+	link.finish(6)
+	assert counts(link) == {"expected": WRAP + 6, "received": WRAP + 4, "lost": 2, "gaps": 1, "longestGap": 2, \
+							"reordered": 0, "duplicates": 0}
+
+def test_samples_lost_at_the_end():
+	link = observe([(0, 4), (4, 4)])
+	link.finish(12)
+	assert (link.getLost(), counts(link)["expected"]) == (4, 12)
+
+def test_samples_sent_across_the_wrap():
+	link = LinkMonitor(10)
+	link.observe(0, WRAP - 2, 0, 0.0)
+	link.finish(3)	# SENT= is also a wrapped count
+	assert (link.getLost(), counts(link)["expected"]) == (5, WRAP + 3)
+
+def test_unsequenced_loss_is_unknown():
+	link = observe([(None, 4), (None, 4)])
+	link.finish(100)
+	report = link.getReport()
+	assert (report["sequenced"], report["lost"], report["received"], link.getLossPercent()) == (False, None, 8, None)
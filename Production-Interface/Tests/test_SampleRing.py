@@ -0,0 +1,100 @@
+########################################
+# ***** IMPORTS *****
+from multiprocessing import shared_memory
+
+import numpy
+import pytest
+
+from SampleRing import SampleRing
+########################################
+
+# Wraparound and mirrored writes of the shared-memory sample ring (see SampleRing), read as the live view does, through
+# a second attachment
+
+CAPACITY = 10
+CHANNELS = 2
+
+@pytest.fixture
+def rings():
+	writer = SampleRing(size=64 + (CHANNELS + 1) * 2 * 4 * CAPACITY)
+	reader = SampleRing(name=writer.getName())
+	writer.configure(CHANNELS)
+	yield writer, reader
+	reader.close()
+	writer.close()
+	writer.unlink()
+
+def samples(first, count):
+	timestamps = numpy.arange(first, first + count, dtype=numpy.int32)
+	return timestamps, [timestamps * 2, -timestamps]
+
+def write(ring, total, chunk):
+	for first in range(0, total, chunk):
+		ring.extend(*samples(first, min(chunk, total - first)))
+
+def assertSamples(result, first, count):
+	timestamps, channels = result
+	expected, expectedChannels = samples(first, count)
+	assert timestamps.tolist() == expected.tolist()
+	assert [data.tolist() for data in channels] == [data.tolist() for data in expectedChannels]
+
+def test_layout(rings):
+	writer, reader = rings
+	assert (reader.getCapacity(), reader.getChannelCount(), reader.getCount()) == (CAPACITY, CHANNELS, 0)
+	assertSamples(reader.tail(5), 0, 0)
+
+@pytest.mark.parametrize("total", [CAPACITY - 1, CAPACITY, CAPACITY + 1, 2 * CAPACITY, 3 * CAPACITY + 7])
+@pytest.mark.parametrize("chunk", [1, 3, CAPACITY - 1, CAPACITY, CAPACITY + 1, 100])
+def test_tail_across_the_wrap(rings, total, chunk):
+	writer, reader = rings
+	write(writer, total, chunk)
+	newest = min(total, CAPACITY)
+	assert reader.getCount() == total
+	assertSamples(reader.tail(CAPACITY + 5), total - newest, newest)	# At most the capacity
+	for count in range(newest + 1):	# Every run of newest samples is one contiguous slice
+		assertSamples(reader.tail(count), total - count, count)
+
+# The accessors return views into the shared memory, not copies
+def test_views_are_not_copies(rings):
+	writer, reader = rings
+	write(writer, CAPACITY + 3, 4)
+	timestamps, channels = reader.tail(CAPACITY)
+	assert not timestamps.flags.owndata and not any(data.flags.owndata for data in channels)
+
+@pytest.mark.parametrize("total", [CAPACITY, CAPACITY + 1, 25])
+def test_since(rings, total):
+	writer, reader = rings
+	write(writer, total, 4)
+	first, timestamps, channels = reader.since(total - 3)
+	assert first == total - 3
+	assertSamples((timestamps, channels), total - 3, 3)
+	first, timestamps, channels = reader.since(0)	# The oldest samples have been overwritten
+	assert first == total - CAPACITY
+	assertSamples((timestamps, channels), total - CAPACITY, CAPACITY)
+	assert reader.since(total)[1].tolist() == []
+
+def test_reconfigure(rings):
+	writer, reader = rings
+	write(writer, 15, 4)
+	writer.configure(1)
+	capacity = (CHANNELS + 1) * CAPACITY // 2	# The same memory, with 2 columns instead of 3
+	assert (reader.getCount(), reader.getChannelCount(), reader.getCapacity()) == (0, 1, capacity)
+	timestamps = numpy.arange(4, dtype=numpy.int32)
+	writer.extend(timestamps, [timestamps + 100])
+	timestamps, channels = reader.tail(10)
+	assert (timestamps.tolist(), len(channels), channels[0].tolist()) == ([0, 1, 2, 3], 1, [100, 101, 102, 103])
+
+# While the writer is rewriting the header (its generation is odd), or once it has been rewritten since the reader
+# started reading it, readers see an empty ring rather than a mix of two layouts
+def test_header_being_rewritten_reads_as_empty(rings):
+	writer, reader = rings
+	write(writer, 5, 5)
+	memory = shared_memory.SharedMemory(name=writer.getName())
+	header = numpy.ndarray((4,), dtype=numpy.int64, buffer=memory.buf)
+	header[3] += 1
+	assert (reader.getCount(), reader.getChannelCount(), reader.getCapacity()) == (0, 0, 0)
+	assert reader.tail(5)[0].tolist() == []
+	header[3] += 1
+	assertSamples(reader.tail(5), 0, 5)
+	del header
+	memory.close()
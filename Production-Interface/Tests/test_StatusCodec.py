@@ -0,0 +1,101 @@
+########################################
+# ***** IMPORTS *****
+import struct
+
+import pytest
+
+from ChannelSchema import ChannelSchema
+from Config import *
+from SampleStore import SampleStore
+from StatusCodec import StatusCodec
+########################################
+
+# Binary STATUS framing (see StatusCodec): whole datagrams, and datagrams cut short
+
+MIXED_SCHEMA = "A:i16:mV:A,B:u8:mA:B,C:i32:mW:C"
+
+@pytest.fixture(params=[STATUS_DEFAULT_SCHEMA, MIXED_SCHEMA], ids=["uniform", "mixed"])
+def schema(request):
+	return ChannelSchema.parse(request.param)
+
+def encode(schema, samples):
+	record = struct.Struct(schema.getRecordFormat())
+	return b"".join(record.pack(*sample) for sample in samples)
+
+def sample(schema, index):
+	return (index * 10,) + tuple(index % 100 + channel for channel in range(len(schema)))	# Fits every channel type
+
+def decoded(store):
+	return [tuple(int(column[index]) for column in [store.timestamps()] + \
+					[store.channel(channel) for channel in range(len(store.getChannels()))]) for index in range(len(store))]
+
+def test_single_record(schema):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	assert codec.decodeBinary(STATUS_BINARY_MAGIC + encode(schema, [sample(schema, 3)]), store) == (None, 1)
+	assert decoded(store) == [sample(schema, 3)]
+
+def test_sequenced_batch(schema):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	samples = [sample(schema, index) for index in range(5)]
+	data = STATUS_SEQUENCED_MAGIC + struct.pack("<I", 2 ** 32 - 1) + encode(schema, samples)
+	assert codec.decodeBinary(data, store) == (2 ** 32 - 1, 5)
+	assert decoded(store) == samples
+
+@pytest.mark.parametrize("cut", [1, 2])
+def test_truncated_record_is_ignored(schema, cut):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	samples = [sample(schema, index) for index in range(cut + 1)]
+	data = STATUS_SEQUENCED_MAGIC + struct.pack("<I", 7) + encode(schema, samples)
+	assert codec.decodeBinary(data[:-1], store) == (7, cut)
+	assert decoded(store) == samples[:cut]
+
+def test_record_shorter_than_one_sample(schema):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	data = STATUS_BINARY_MAGIC + encode(schema, [sample(schema, 0)])
+	assert codec.decodeBinary(data[:-1], store) == (None, 0)
+	assert len(store) == 0
+
+@pytest.mark.parametrize("length", [1, 2, 4])
+def test_datagram_shorter_than_its_sequence_number(length):
+	codec, store = StatusCodec(ChannelSchema.default()), SampleStore(ChannelSchema.default().getNames())
+	data = STATUS_SEQUENCED_MAGIC + struct.pack("<I", 7)
+	assert codec.decodeBinary(data[:length], store) == (None, 0)
+	assert len(store) == 0
+
+def test_truncated_aggregate_window():
+	schema = ChannelSchema.default()
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	window = struct.pack("<iiI", 0, 90, 10) + struct.pack("<ii", 1, 2) + struct.pack("<ii", 8, 9) + \
+				struct.pack("<ff", 4.5, 5.5)
+	data = STATUS_AGGREGATE_MAGIC + struct.pack("<I", 0) + window * 2
+	sequence, count, windows, points = codec.decodeAggregate(data[:-1], store)
+	assert (sequence, count, len(windows), points) == (0, 10, 1, 2)
+	assert decoded(store) == [(0, 1, 2), (90, 8, 9)]
+	sequence, count, windows, points = codec.decodeAggregate(data[:3], store)
+	assert (count, len(windows), points, len(store)) == (0, 0, 0, 2)
+
+# Batches (see the BATCH= START parameter) of more samples than fit BUFFER_SIZE
+
+def test_oversized_batch(schema):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	samples = [sample(schema, index) for index in range(BUFFER_SIZE)]
+	data = STATUS_SEQUENCED_MAGIC + struct.pack("<I", 0) + encode(schema, samples)
+	assert len(data) > BUFFER_SIZE
+	assert codec.decodeBinary(data, store) == (0, len(samples))
+	assert decoded(store) == samples
+
+# As received by DatagramChannel, which truncates datagrams to BUFFER_SIZE
+def test_oversized_batch_truncated_to_buffer_size(schema):
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	samples = [sample(schema, index) for index in range(BUFFER_SIZE)]
+	data = STATUS_SEQUENCED_MAGIC + struct.pack("<I", 0) + encode(schema, samples)
+	fitting = (BUFFER_SIZE - 5) // codec.getRecordSize()
+	assert codec.decodeBinary(data[:BUFFER_SIZE], store) == (0, fitting)
+	assert decoded(store) == samples[:fitting]
+
+def test_text_batch():
+	schema = ChannelSchema.default()
+	codec, store = StatusCodec(schema), SampleStore(schema.getNames())
+	message = "STATUS;SEQ=4;" + "".join(f"TIME={index * 10};MV={index};MA={index + 1};" for index in range(3))
+	assert codec.decodeText(message, store) == (4, 3)
+	assert decoded(store) == [(index * 10, index, index + 1) for index in range(3)]
@@ -0,0 +1,2 @@
+cd Production-Interface
+python3 -m HeadlessRunner "$@"
\ No newline at end of file
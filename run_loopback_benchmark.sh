@@ -0,0 +1,2 @@
+cd Production-Interface
+python3 LoopbackBenchmark.py "$@"
\ No newline at end of file
@@ -0,0 +1 @@
+python3 ./Production-Interface/ParseBenchmark.py "$@"
\ No newline at end of file
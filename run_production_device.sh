@@ -1 +1 @@
-./Production-Device/Bin/Program
\ No newline at end of file
+./Production-Device/Bin/Program "$@"
\ No newline at end of file